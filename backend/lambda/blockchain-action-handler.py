@@ -6,17 +6,24 @@ Secure Lambda function for handling Solana blockchain operations
 
 import json
 import os
+import base64
 import logging
-import boto3
 import urllib.request
 import urllib.parse
 from decimal import Decimal
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import hashlib
+import math
+import statistics
+import threading
 import time
 import uuid
-from debug_logger import get_logger
+from concurrent.futures import ThreadPoolExecutor
+from debug_logger import get_logger, flush_logs
+from write_behind import WriteBehindWriter, flush_writes
+from lazy_init import lazy_resource
+from solana_rpc import get_rpc_client, LAMPORTS_PER_SOL, SolanaRPCClient, SolanaRPCError
 
 # Configure logging
 logger = logging.getLogger()
@@ -29,23 +36,64 @@ debug_logger = get_logger('blockchain-agent')
 SOLANA_COINBASE_ADDRESS = os.environ.get('SOLANA_COINBASE_ADDRESS')
 HELIUS_RPC_URL = os.environ.get('RPC_URL', 'https://mainnet.helius-rpc.com')
 # Removed COINGECKO_API_KEY - not needed, using fallback price
+SOL_PRICE_URL = os.environ.get('SOL_PRICE_URL', 'https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd')
+SOL_PRICE_TTL_SECONDS = int(os.environ.get('SOL_PRICE_TTL_SECONDS', '60'))
+SOL_PRICE_RETRY_SECONDS = 30  # after a failed fetch, don't block on the feed again for this long
+SOL_PRICE_TIMEOUT_SECONDS = float(os.environ.get('SOL_PRICE_TIMEOUT_SECONDS', '5'))
+FALLBACK_SOL_PRICE = 90.0
+
+MAX_BALANCE_WALLETS = 100  # wallets per /check-wallet-balance request
+MAX_HISTORY_LIMIT = 100  # transactions per /get-transaction-history page
+HISTORY_RPC_BATCH_SIZE = 20  # getTransaction calls per JSON-RPC batch
+HISTORY_RPC_CONCURRENCY = 4  # batches in flight
+NETWORK_SNAPSHOT_TTL_SECONDS = int(os.environ.get('NETWORK_SNAPSHOT_TTL_SECONDS', '10'))
+PERFORMANCE_SAMPLE_COUNT = 30  # getRecentPerformanceSamples, 60s each
+
+# Fee model: 5000 lamports per signature plus priority fee (micro-lamports per CU) x compute units
+BASE_FEE_LAMPORTS = 5000
+COMPUTE_UNITS = {'transfer': 450, 'token': 10_000, 'nft': 60_000}
+PRIORITY_PERCENTILES = {
+    'slow': 'p25', 'low': 'p25',
+    'standard': 'p50', 'medium': 'p50',
+    'fast': 'p75', 'high': 'p75',
+    'urgent': 'p95'
+}
+CONFIRMATION_TIMES = {'p25': '30-60 seconds', 'p50': '10-20 seconds', 'p75': '5-10 seconds', 'p95': '2-5 seconds'}
+# Static estimates (SOL) used when the RPC node can't be reached
+FALLBACK_FEES = {'p25': Decimal('0.000001'), 'p50': Decimal('0.000005'), 'p75': Decimal('0.00001'), 'p95': Decimal('0.00001')}
+FALLBACK_FEE_MULTIPLIERS = {'token': Decimal('1.5'), 'nft': Decimal('2')}
 
 # Security limits
 MAX_TRANSACTION_AMOUNT = Decimal('10.0')  # 10 SOL max per transaction
 MIN_TRANSACTION_AMOUNT = Decimal('0.001')  # 0.001 SOL minimum
 
-# DynamoDB for transaction logging
-dynamodb = boto3.resource('dynamodb')
+# DynamoDB for transaction logging - created on first use; fee and network
+# status requests never touch it, so their cold starts skip boto3 entirely
+dynamodb = lazy_resource('dynamodb')
+
+# SOL price cached across warm invocations; refreshed in the background once stale
+_sol_price_cache = {'price': None, 'fetched_at': 0.0, 'failed_at': 0.0, 'refreshing': False}
+_sol_price_lock = threading.Lock()
+
+# Network snapshot shared by every session on this container; the lock makes
+# concurrent callers wait for one upstream fetch instead of each making their own
+_network_snapshot = {'data': None, 'fetched_at': 0.0, 'failed_at': 0.0}
+_network_snapshot_lock = threading.Lock()
 
 # FIXED: Use correct table names (staging)
 WALLETS_TABLE = os.environ.get('WEB3_WALLETS_TABLE', 'Web3Wallets-staging')
 TRANSACTIONS_TABLE = os.environ.get('WEB3_TRANSACTIONS_TABLE', 'Web3Transactions-staging')
+# Transaction log entries are batch-written off the request path (flushed before the handler returns)
+transaction_log_writer = WriteBehindWriter(TRANSACTIONS_TABLE, dynamodb, key_attrs=('transactionId',))
+# GSI on Web3Transactions (see backend/scripts/create-web3-tables.py)
+WALLET_TIMESTAMP_INDEX = os.environ.get('WEB3_WALLET_INDEX', 'walletAddress-timestamp-index')
 
+@flush_writes(transaction_log_writer)
+@flush_logs(debug_logger)
 def lambda_handler(event, context):
     """Main Lambda handler for Blockchain Agent actions"""
     try:
-        logger.info(f"[BLOCKCHAIN] Event: {json.dumps(event)}")
-        debug_logger.debug("Lambda invoked", {"event": event})
+        debug_logger.info("[BLOCKCHAIN] Event", lambda: {"event": event})
         
         # Extract action details
         action_group = event.get('actionGroup', '')
@@ -151,7 +199,8 @@ def handle_send_sol_payment(user_id: str, request_body: Dict) -> Dict:
         amount_decimal = Decimal(str(amount_sol))
         
         # Get current SOL price for USD conversion
-        sol_price_usd = get_sol_price()
+        price_quote = get_sol_price_quote()
+        sol_price_usd = price_quote['price']
         amount_usd = float(amount_decimal * Decimal(str(sol_price_usd)))
         
         # FIXED: Get user's wallet
@@ -184,7 +233,8 @@ def handle_send_sol_payment(user_id: str, request_body: Dict) -> Dict:
                 'memo': memo,
                 'estimated_fee_sol': '0.000005',
                 'estimated_fee_usd': str(round(0.000005 * sol_price_usd, 4)),
-                'sol_price': str(sol_price_usd)
+                'sol_price': str(sol_price_usd),
+                **sol_price_fields(price_quote)
             },
             'security_checks': {
                 'address_valid': True,
@@ -218,6 +268,14 @@ def handle_check_wallet_balance(user_id: str, request_body: Dict) -> Dict:
         body = parse_request_body(request_body)
         wallet_address = body.get('wallet_address', '').strip()
         
+        # Several wallets at once: one getMultipleAccounts call instead of a getBalance each
+        wallet_addresses = body.get('wallet_addresses') or []
+        if isinstance(wallet_addresses, str):
+            wallet_addresses = [a.strip(' []"\'') for a in wallet_addresses.split(',')]
+        wallet_addresses = [a for a in wallet_addresses if a]
+        if wallet_addresses:
+            return check_wallet_balances(user_id, wallet_addresses)
+        
         # FIXED: If no wallet address provided, get user's wallet
         if not wallet_address:
             user_wallet = get_user_wallet(user_id)
@@ -238,6 +296,8 @@ def handle_check_wallet_balance(user_id: str, request_body: Dict) -> Dict:
             'balance_sol': balance_data.get('balance', '0'),
             'balance_usd': balance_data.get('balanceUSD', '0'),
             'sol_price': str(balance_data.get('solPrice', 0)),
+            'sol_price_age_seconds': balance_data.get('solPriceAgeSeconds'),
+            'sol_price_source': balance_data.get('solPriceSource', 'fallback'),
             'last_updated': datetime.utcnow().isoformat() + 'Z'
         }
         
@@ -250,6 +310,39 @@ def handle_check_wallet_balance(user_id: str, request_body: Dict) -> Dict:
         debug_logger.error("Balance check error", {"error": str(e)})
         return create_response(500, {'error': f'Balance check failed: {str(e)}'}, '/check-wallet-balance', 'POST')
 
+def check_wallet_balances(user_id: str, wallet_addresses: List[str]) -> Dict:
+    """Multi-wallet variant of /check-wallet-balance"""
+    if len(wallet_addresses) > MAX_BALANCE_WALLETS:
+        return create_response(400, {'error': f'At most {MAX_BALANCE_WALLETS} wallets per request'}, '/check-wallet-balance', 'POST')
+    invalid = [a for a in wallet_addresses if not is_valid_solana_address(a)]
+    if invalid:
+        return create_response(400, {'error': 'Invalid Solana address format', 'invalid_addresses': invalid}, '/check-wallet-balance', 'POST')
+    
+    balances = get_wallet_balances(wallet_addresses)
+    wallets = [
+        {
+            'wallet_address': address,
+            'balance_sol': balance['balance'],
+            'balance_usd': balance['balanceUSD']
+        }
+        for address, balance in balances.items()
+    ]
+    price = next(iter(balances.values()))
+    
+    response_data = {
+        'wallets': wallets,
+        'count': len(wallets),
+        'total_balance_sol': str(sum(Decimal(w['balance_sol']) for w in wallets)),
+        'sol_price': str(price['solPrice']),
+        'sol_price_age_seconds': price['solPriceAgeSeconds'],
+        'sol_price_source': price['solPriceSource'],
+        'last_updated': datetime.utcnow().isoformat() + 'Z'
+    }
+    
+    log_transaction(user_id, 'BALANCE_CHECK', {'wallets': [w['wallet_address'] for w in wallets]})
+    
+    return create_response(200, response_data, '/check-wallet-balance', 'POST')
+
 def handle_validate_wallet_address(user_id: str, request_body: Dict) -> Dict:
     """Validate Solana wallet address"""
     try:
@@ -287,6 +380,7 @@ def handle_get_transaction_history(user_id: str, request_body: Dict) -> Dict:
         body = parse_request_body(request_body)
         wallet_address = body.get('wallet_address', '').strip()
         limit = int(body.get('limit', 10))
+        cursor = body.get('cursor') or None
         
         # FIXED: If no wallet address provided, get user's wallet
         if not wallet_address:
@@ -300,7 +394,7 @@ def handle_get_transaction_history(user_id: str, request_body: Dict) -> Dict:
             return create_response(400, {'error': 'Invalid Solana address format'}, '/get-transaction-history', 'POST')
         
         # Get transaction history
-        transactions = get_transaction_history(wallet_address, limit)
+        transactions, next_cursor = get_transaction_history(wallet_address, limit, cursor)
         
         response_data = {
             'wallet_address': wallet_address,
@@ -309,9 +403,13 @@ def handle_get_transaction_history(user_id: str, request_body: Dict) -> Dict:
             'limit': limit,
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
+        if next_cursor:
+            response_data['next_cursor'] = next_cursor
         
         return create_response(200, response_data, '/get-transaction-history', 'POST')
         
+    except ValueError as e:
+        return create_response(400, {'error': str(e)}, '/get-transaction-history', 'POST')
     except Exception as e:
         logger.error(f"[BLOCKCHAIN] Transaction history error: {str(e)}")
         debug_logger.error("Transaction history error", {"error": str(e)})
@@ -321,6 +419,7 @@ def handle_get_network_status(user_id: str) -> Dict:
     """Get Solana network status"""
     try:
         status = get_solana_network_status()
+        price_quote = get_sol_price_quote()
         
         response_data = {
             'network': 'solana',
@@ -328,9 +427,14 @@ def handle_get_network_status(user_id: str) -> Dict:
             'block_height': status.get('block_height', 0),
             'transaction_count': status.get('transaction_count', 0),
             'avg_transaction_fee': str(status.get('avg_transaction_fee', 0)),
-            'current_price_usd': str(get_sol_price()),
+            'current_price_usd': str(price_quote['price']),
+            **sol_price_fields(price_quote),
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
+        for field in ('epoch', 'epoch_progress', 'tps', 'non_vote_tps', 'avg_slot_time_ms',
+                      'priority_fee_percentiles', 'snapshot_age_seconds'):
+            if field in status:
+                response_data[field] = status[field]
         
         return create_response(200, response_data, '/get-network-status', 'GET')
         
@@ -346,14 +450,20 @@ def handle_calculate_transaction_fees(user_id: str, request_body: Dict) -> Dict:
         priority_level = body.get('priority_level', 'standard').lower()
         
         fees = calculate_transaction_fees(transaction_type, priority_level)
-        sol_price = get_sol_price()
+        price_quote = get_sol_price_quote()
+        sol_price = price_quote['price']
         
         response_data = {
             'transaction_type': transaction_type,
             'priority_level': priority_level,
             'fee_sol': fees['fee_sol'],
-            'fee_usd': str(round(float(Decimal(fees['fee_sol']) * Decimal(str(sol_price))), 4)),
+            'fee_usd': str((Decimal(fees['fee_sol']) * Decimal(str(sol_price))).quantize(Decimal('0.0001'))),
             'sol_price': str(sol_price),
+            **sol_price_fields(price_quote),
+            'fee_lamports': fees['fee_lamports'],
+            'priority_fee_micro_lamports_per_cu': fees['priority_fee_micro_lamports'],
+            'fee_percentile': fees['percentile'],
+            'fee_source': fees['fee_source'],
             'estimated_confirmation_time': fees['estimated_confirmation_time'],
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
@@ -441,59 +551,101 @@ def is_valid_solana_address(address: str) -> bool:
     except:
         return False
 
-def get_sol_price() -> float:
-    """Get current SOL price in USD"""
+def fetch_sol_price() -> float:
+    """Fetch the current SOL price in USD from the price feed (raises on failure)"""
+    req = urllib.request.Request(SOL_PRICE_URL)
+    with urllib.request.urlopen(req, timeout=SOL_PRICE_TIMEOUT_SECONDS) as response:
+        data = json.loads(response.read().decode())
+        return float(data['solana']['usd'])
+
+def refresh_sol_price() -> Optional[float]:
+    """Fetch the price and store it in the cache; returns None if the feed failed"""
     try:
-        req = urllib.request.Request('https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode())
-            return float(data['solana']['usd'])
-    except:
-        pass
+        price = fetch_sol_price()
+    except Exception as e:
+        logger.warning(f"[BLOCKCHAIN] SOL price refresh failed: {str(e)}")
+        with _sol_price_lock:
+            _sol_price_cache['failed_at'] = time.time()
+            _sol_price_cache['refreshing'] = False
+        return None
+    
+    with _sol_price_lock:
+        _sol_price_cache['price'] = price
+        _sol_price_cache['fetched_at'] = time.time()
+        _sol_price_cache['refreshing'] = False
+    return price
+
+def get_sol_price_quote() -> Dict:
+    """SOL price with its age, without blocking warm invocations on the price feed.
+    
+    Fresh (younger than SOL_PRICE_TTL_SECONDS): served from the cache.
+    Stale: the last known price is served and a background thread refreshes it
+    (stale-while-revalidate); Lambda freezes the thread between invocations,
+    so a refresh can finish on the next one.
+    Never fetched: a cold container fetches synchronously once; if that fails
+    the fallback price is served and the feed is retried in the background,
+    at most every SOL_PRICE_RETRY_SECONDS.
     
-    # Fallback price if API fails
-    return 90.0  # Default fallback price
+    source is 'cache', 'stale', 'live' or 'fallback'; age_seconds is None for the fallback.
+    """
+    now = time.time()
+    with _sol_price_lock:
+        price = _sol_price_cache['price']
+        age = now - _sol_price_cache['fetched_at']
+        if price is not None and age < SOL_PRICE_TTL_SECONDS:
+            return {'price': price, 'age_seconds': round(age, 1), 'source': 'cache'}
+        
+        failed_at = _sol_price_cache['failed_at']
+        refreshing = _sol_price_cache['refreshing']
+        first_fetch = price is None and failed_at == 0.0 and not refreshing
+        background = not first_fetch and not refreshing and now - failed_at >= SOL_PRICE_RETRY_SECONDS
+        if first_fetch or background:
+            _sol_price_cache['refreshing'] = True
+    
+    if background:
+        threading.Thread(target=refresh_sol_price, daemon=True).start()
+    
+    if price is not None:
+        return {'price': price, 'age_seconds': round(age, 1), 'source': 'stale'}
+    
+    if first_fetch:
+        live_price = refresh_sol_price()
+        if live_price is not None:
+            return {'price': live_price, 'age_seconds': 0.0, 'source': 'live'}
+    
+    # Fallback price if the feed is unavailable
+    return {'price': FALLBACK_SOL_PRICE, 'age_seconds': None, 'source': 'fallback'}
+
+def get_sol_price() -> float:
+    """Get current SOL price in USD"""
+    return get_sol_price_quote()['price']
+
+def sol_price_fields(quote: Dict) -> Dict:
+    """Response fields describing where a SOL price came from"""
+    return {'sol_price_age_seconds': quote['age_seconds'], 'sol_price_source': quote['source']}
+
+def rpc_client() -> SolanaRPCClient:
+    """Pooled RPC client, reused across warm invocations"""
+    rpc_url = HELIUS_RPC_URL
+    if not rpc_url.startswith('http'):
+        rpc_url = 'https://api.mainnet-beta.solana.com'  # Fallback
+    return get_rpc_client(rpc_url)
+
+def format_balance(lamports: int, price_quote: Dict) -> Dict:
+    sol_balance = lamports / LAMPORTS_PER_SOL  # Convert lamports to SOL
+    return {
+        'balance': str(sol_balance),
+        'balanceUSD': str(round(sol_balance * price_quote['price'], 2)),
+        'solPrice': price_quote['price'],
+        'solPriceAgeSeconds': price_quote['age_seconds'],
+        'solPriceSource': price_quote['source']
+    }
 
 def get_wallet_balance(wallet_address: str) -> Dict:
     """Get wallet balance from Solana RPC"""
     try:
-        # Try to use Helius RPC if available
-        rpc_url = HELIUS_RPC_URL
-        if not rpc_url.startswith('http'):
-            rpc_url = 'https://api.mainnet-beta.solana.com'  # Fallback
-        
-        headers = {'Content-Type': 'application/json'}
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getBalance",
-            "params": [wallet_address]
-        }
-        
-        req = urllib.request.Request(rpc_url, 
-            data=json.dumps(payload).encode('utf-8'),
-            headers=headers)
-        
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            if 'result' in data and 'value' in data['result']:
-                lamports = data['result']['value']
-                sol_balance = lamports / 1_000_000_000  # Convert lamports to SOL
-                sol_price = get_sol_price()
-                usd_balance = sol_balance * sol_price
-                
-                return {
-                    'balance': str(sol_balance),
-                    'balanceUSD': str(round(usd_balance, 2)),
-                    'solPrice': sol_price
-                }
-        
-        # Mock balance if RPC fails
-        return {
-            'balance': '1.5',
-            'balanceUSD': '135.00',
-            'solPrice': 90.0
-        }
+        lamports = rpc_client().get_balance(wallet_address)
+        return format_balance(lamports, get_sol_price_quote())
     except Exception as e:
         logger.error(f"Error getting wallet balance: {str(e)}")
         # Mock balance on error
@@ -503,109 +655,403 @@ def get_wallet_balance(wallet_address: str) -> Dict:
             'solPrice': 90.0
         }
 
-def get_transaction_history(wallet_address: str, limit: int = 10) -> List[Dict]:
-    """Get transaction history from DynamoDB or Solana RPC"""
+def get_wallet_balances(wallet_addresses: List[str]) -> Dict[str, Dict]:
+    """Balances of several wallets with getMultipleAccounts (one RPC call per 100 wallets)"""
+    lamports_by_address = rpc_client().get_balances(wallet_addresses)
+    price_quote = get_sol_price_quote()
+    return {address: format_balance(lamports, price_quote) for address, lamports in lamports_by_address.items()}
+
+def encode_cursor(position: Optional[Dict]) -> Optional[str]:
+    """Opaque pagination cursor: {'before': signature} on chain, {'lastKey': LastEvaluatedKey} in the log"""
+    if not position:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(position, default=str).encode()).decode()
+
+def decode_cursor(cursor: Optional[str]) -> Dict:
+    """Position from a cursor produced by encode_cursor"""
+    if not cursor:
+        return {}
     try:
-        # Try DynamoDB first for known transactions
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(position, dict):
+        raise ValueError('Invalid cursor')
+    return position
+
+def get_transaction_history(wallet_address: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Get a page of transaction history (newest first) and the cursor for the next page.
+    
+    Reads the chain; if the RPC node is unavailable, falls back to the app's own
+    transaction log in DynamoDB.
+    """
+    limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+    position = decode_cursor(cursor)
+    
+    if 'lastKey' not in position:
+        try:
+            return get_onchain_history(wallet_address, limit, position.get('before'))
+        except Exception as e:
+            logger.error(f"On-chain history unavailable, using transaction log: {str(e)}")
+    
+    return get_logged_history(wallet_address, limit, position.get('lastKey'))
+
+def get_onchain_history(wallet_address: str, limit: int, before: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """History from getSignaturesForAddress, with transaction details cached in Web3Transactions.
+    
+    Finalized transactions never change, so once fetched their details are
+    written to the table (write-once, one item per wallet that saw them) and
+    later pages cost one getSignaturesForAddress call plus a BatchGetItem.
+    Details that are not cached are fetched with getTransaction in concurrent
+    JSON-RPC batches.
+    """
+    params = {'limit': limit}
+    if before:
+        params['before'] = before
+    signatures = rpc_client().call('getSignaturesForAddress', [wallet_address, params]) or []
+    
+    cached = get_cached_transactions(wallet_address, [info['signature'] for info in signatures])
+    missing = [info['signature'] for info in signatures if info['signature'] not in cached]
+    fetched = fetch_transactions(missing)
+    
+    cache_transactions(wallet_address, [
+        fetched[info['signature']] for info in signatures
+        if info.get('confirmationStatus') == 'finalized' and info['signature'] in fetched
+    ])
+    
+    transactions = [
+        format_onchain_transaction(wallet_address, cached.get(info['signature']) or fetched.get(info['signature']), info)
+        for info in signatures
+    ]
+    next_cursor = encode_cursor({'before': signatures[-1]['signature']}) if len(signatures) == limit else None
+    return transactions, next_cursor
+
+def fetch_transactions(signatures: List[str]) -> Dict[str, Dict]:
+    """Summaries of the given transactions via getTransaction, batched and fetched concurrently"""
+    if not signatures:
+        return {}
+    
+    client = rpc_client()
+    config = {'encoding': 'jsonParsed', 'maxSupportedTransactionVersion': 0, 'commitment': 'confirmed'}
+    chunks = [signatures[i:i + HISTORY_RPC_BATCH_SIZE] for i in range(0, len(signatures), HISTORY_RPC_BATCH_SIZE)]
+    
+    def fetch_chunk(chunk):
+        return client.batch([('getTransaction', [signature, config]) for signature in chunk])
+    
+    summaries = {}
+    with ThreadPoolExecutor(max_workers=min(HISTORY_RPC_CONCURRENCY, len(chunks))) as executor:
+        for chunk, results in zip(chunks, executor.map(fetch_chunk, chunks)):
+            for signature, result in zip(chunk, results):
+                if isinstance(result, SolanaRPCError) or not result:
+                    continue
+                summaries[signature] = summarize_transaction(signature, result)
+    return summaries
+
+def summarize_transaction(signature: str, tx: Dict) -> Dict:
+    """Wallet-independent record of a transaction, as stored in Web3Transactions"""
+    meta = tx.get('meta') or {}
+    message = (tx.get('transaction') or {}).get('message', {})
+    account_keys = [key['pubkey'] if isinstance(key, dict) else key for key in message.get('accountKeys', [])]
+    
+    balance_changes = {}
+    for account, pre, post in zip(account_keys, meta.get('preBalances', []), meta.get('postBalances', [])):
+        if post != pre:
+            balance_changes[account] = post - pre
+    
+    record = {
+        'transactionId': signature,
+        'blockchainId': signature,
+        'source': 'solana',
+        'slot': tx.get('slot', 0),
+        'fee': meta.get('fee', 0),
+        'feePayer': account_keys[0] if account_keys else '',
+        'status': 'failed' if meta.get('err') else 'confirmed',
+        'balanceChanges': balance_changes
+    }
+    if tx.get('blockTime'):
+        record['timestamp'] = str(tx['blockTime'])
+    return record
+
+def format_onchain_transaction(wallet_address: str, record: Optional[Dict], info: Optional[Dict] = None) -> Dict:
+    """Transaction as seen from wallet_address (amounts exclude the network fee)"""
+    info = info or {}
+    signature = (record or {}).get('blockchainId') or info.get('signature', '')
+    block_time = (record or {}).get('timestamp') or info.get('blockTime')
+    timestamp = datetime.utcfromtimestamp(int(block_time)).isoformat() + 'Z' if block_time else ''
+    
+    if record is None:
+        # Details unavailable right now - return what getSignaturesForAddress told us
+        return {
+            'id': signature,
+            'timestamp': timestamp,
+            'type': 'unknown',
+            'status': 'failed' if info.get('err') else info.get('confirmationStatus', 'unknown'),
+            'amount': '0',
+            'from': '',
+            'to': '',
+            'blockchainId': signature
+        }
+    
+    changes = {account: int(delta) for account, delta in record.get('balanceChanges', {}).items()}
+    fee = int(record.get('fee', 0))
+    delta = changes.get(wallet_address, 0)
+    if record.get('feePayer') == wallet_address:
+        delta += fee
+    
+    tx_type = 'send' if delta < 0 else 'receive' if delta > 0 else 'other'
+    counterparties = sorted(
+        (account for account, change in changes.items() if account != wallet_address and change * delta < 0),
+        key=lambda account: -abs(changes[account])
+    )
+    counterparty = counterparties[0] if counterparties else ''
+    
+    return {
+        'id': signature,
+        'timestamp': timestamp,
+        'type': tx_type,
+        'status': record.get('status', 'unknown'),
+        'amount': str(Decimal(abs(delta)) / LAMPORTS_PER_SOL),
+        'fee_sol': str(Decimal(fee) / LAMPORTS_PER_SOL),
+        'from': wallet_address if tx_type == 'send' else counterparty,
+        'to': counterparty if tx_type == 'send' else wallet_address,
+        'blockchainId': signature,
+        'slot': int(record.get('slot', 0))
+    }
+
+def transaction_cache_key(wallet_address: str, signature: str) -> str:
+    """transactionId of a cached on-chain record: one item per (signature, wallet), so a transfer
+    between two watched wallets is in both wallets' walletAddress-timestamp-index partitions"""
+    return f"{signature}#{wallet_address}"
+
+def get_cached_transactions(wallet_address: str, signatures: List[str]) -> Dict[str, Dict]:
+    """This wallet's cached transaction records by signature (BatchGetItem, 100 keys per request)"""
+    cached = {}
+    keys = [{'transactionId': transaction_cache_key(wallet_address, sig)} for sig in signatures]
+    try:
+        for offset in range(0, len(keys), 100):
+            request = {TRANSACTIONS_TABLE: {'Keys': keys[offset:offset + 100]}}
+            for attempt in range(3):
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(TRANSACTIONS_TABLE, []):
+                    if item.get('source') == 'solana':
+                        cached[item['blockchainId']] = item
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+    except Exception as e:
+        # Cache is best effort - anything not found is fetched from the chain
+        logger.error(f"Error reading transaction cache: {str(e)}")
+    return cached
+
+def cache_transactions(wallet_address: str, records: List[Dict]):
+    """Persist finalized transaction records (BatchWriteItem, 25 per request).
+    
+    Only records not yet cached under this wallet are written, and finalized
+    transactions are immutable, so each item is written once per wallet.
+    """
+    try:
+        for offset in range(0, len(records), 25):
+            request = {TRANSACTIONS_TABLE: [
+                {'PutRequest': {'Item': {
+                    **record,
+                    'transactionId': transaction_cache_key(wallet_address, record['blockchainId']),
+                    'walletAddress': wallet_address,
+                    'createdAt': datetime.utcnow().isoformat() + 'Z'
+                }}}
+                for record in records[offset:offset + 25]
+            ]}
+            for attempt in range(3):
+                request = dynamodb.batch_write_item(RequestItems=request).get('UnprocessedItems') or {}
+                if not request:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+    except Exception as e:
+        logger.error(f"Error caching transactions: {str(e)}")
+
+def get_logged_history(wallet_address: str, limit: int, exclusive_start_key: Optional[Dict] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Page of the app's own transaction log for a wallet (newest first)"""
+    try:
+        # Query the wallet's partition of the GSI - cost scales with the page, not the table
+        from boto3.dynamodb.conditions import Key
+        
         table = dynamodb.Table(TRANSACTIONS_TABLE)
-        response = table.scan(
-            FilterExpression='walletAddress = :addr',
-            ExpressionAttributeValues={':addr': wallet_address},
-            Limit=limit
-        )
-        
-        if 'Items' in response and response['Items']:
-            # Convert DynamoDB items to transaction format
-            transactions = []
-            for item in response['Items']:
-                tx = {
-                    'id': item.get('transactionId', ''),
-                    'timestamp': item.get('timestamp', ''),
-                    'type': item.get('type', 'unknown'),
-                    'status': item.get('status', 'unknown'),
-                    'amount': item.get('amount', '0'),
-                    'from': wallet_address if item.get('type') == 'send' else item.get('senderAddress', ''),
-                    'to': item.get('recipientAddress', '') if item.get('type') == 'send' else wallet_address,
-                    'blockchainId': item.get('blockchainId', '')
-                }
-                transactions.append(tx)
-                
-            # Sort by timestamp (newest first)
-            transactions.sort(key=lambda x: x.get('timestamp', '0'), reverse=True)
-            return transactions[:limit]
+        query_args = {
+            'IndexName': WALLET_TIMESTAMP_INDEX,
+            'KeyConditionExpression': Key('walletAddress').eq(wallet_address),
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if exclusive_start_key:
+            query_args['ExclusiveStartKey'] = exclusive_start_key
+        
+        response = table.query(**query_args)
         
-        # If no transactions in DynamoDB, return empty list (in future, could fetch from RPC)
-        return []
+        # Convert DynamoDB items to transaction format
+        transactions = []
+        for item in response.get('Items', []):
+            if item.get('source') == 'solana':
+                transactions.append(format_onchain_transaction(wallet_address, item))
+                continue
+            tx = {
+                'id': item.get('transactionId', ''),
+                'timestamp': item.get('timestamp', ''),
+                'type': item.get('type', 'unknown'),
+                'status': item.get('status', 'unknown'),
+                'amount': item.get('amount', '0'),
+                'from': wallet_address if item.get('type') == 'send' else item.get('senderAddress', ''),
+                'to': item.get('recipientAddress', '') if item.get('type') == 'send' else wallet_address,
+                'blockchainId': item.get('blockchainId', '')
+            }
+            transactions.append(tx)
+        
+        last_key = response.get('LastEvaluatedKey')
+        return transactions, encode_cursor({'lastKey': last_key} if last_key else None)
         
     except Exception as e:
         logger.error(f"Error getting transaction history: {str(e)}")
-        return []
+        return [], None
+
+def fee_percentiles(fees: List[int]) -> Dict[str, int]:
+    """p25/p50/p75/p95 of priority fees (micro-lamports per CU), from one sort of the window"""
+    if not fees:
+        return {'p25': 0, 'p50': 0, 'p75': 0, 'p95': 0}
+    if len(fees) == 1:
+        return {'p25': fees[0], 'p50': fees[0], 'p75': fees[0], 'p95': fees[0]}
+    cuts = statistics.quantiles(fees, n=100, method='inclusive')
+    return {name: math.ceil(cuts[pct - 1]) for name, pct in (('p25', 25), ('p50', 50), ('p75', 75), ('p95', 95))}
+
+def fetch_network_snapshot() -> Dict:
+    """Network state from one JSON-RPC batch: epoch info, performance samples, prioritization fees"""
+    epoch_info, samples, prioritization_fees = rpc_client().batch([
+        ('getEpochInfo', []),
+        ('getRecentPerformanceSamples', [PERFORMANCE_SAMPLE_COUNT]),
+        ('getRecentPrioritizationFees', [])
+    ])
+    for result in (epoch_info, samples, prioritization_fees):
+        if isinstance(result, SolanaRPCError):
+            raise result
+    
+    seconds = sum(sample['samplePeriodSecs'] for sample in samples)
+    slots = sum(sample['numSlots'] for sample in samples)
+    transactions = sum(sample['numTransactions'] for sample in samples)
+    non_vote = sum(sample.get('numNonVoteTransactions', 0) for sample in samples)
+    
+    return {
+        'current_slot': epoch_info['absoluteSlot'],
+        'block_height': epoch_info['blockHeight'],
+        'epoch': epoch_info['epoch'],
+        'epoch_progress': round(epoch_info['slotIndex'] / epoch_info['slotsInEpoch'], 4),
+        'transaction_count': epoch_info.get('transactionCount', 0),
+        'tps': round(transactions / seconds, 1) if seconds else 0,
+        'non_vote_tps': round(non_vote / seconds, 1) if seconds else 0,
+        'avg_slot_time_ms': round(seconds * 1000 / slots) if slots else 0,
+        'priority_fee_percentiles': fee_percentiles([entry['prioritizationFee'] for entry in prioritization_fees]),
+        'priority_fee_window_slots': len(prioritization_fees)
+    }
+
+def get_network_snapshot() -> Optional[Dict]:
+    """Cached network snapshot, refreshed at most every NETWORK_SNAPSHOT_TTL_SECONDS.
+    
+    Returns the snapshot with its age, or None when the RPC node is unavailable
+    and nothing was fetched yet. A failed refresh keeps serving the last snapshot
+    and is not retried for another TTL.
+    """
+    with _network_snapshot_lock:
+        now = time.time()
+        age = now - _network_snapshot['fetched_at']
+        expired = _network_snapshot['data'] is None or age >= NETWORK_SNAPSHOT_TTL_SECONDS
+        if expired and now - _network_snapshot['failed_at'] >= NETWORK_SNAPSHOT_TTL_SECONDS:
+            try:
+                _network_snapshot['data'] = fetch_network_snapshot()
+                _network_snapshot['fetched_at'] = time.time()
+                age = 0.0
+            except Exception as e:
+                _network_snapshot['failed_at'] = time.time()
+                logger.error(f"[BLOCKCHAIN] Error getting network status: {str(e)}")
+        
+        if _network_snapshot['data'] is None:
+            return None
+        return {**_network_snapshot['data'], 'snapshot_age_seconds': round(age, 1)}
 
 def get_solana_network_status() -> Dict:
     """Get Solana network status"""
-    try:
-        # Mock response for now
-        return {
-            'current_slot': 234567890,
-            'block_height': 234567890,
-            'transaction_count': 150000000000,
-            'avg_transaction_fee': 0.000005
-        }
-    except Exception as e:
-        logger.error(f"Error getting network status: {str(e)}")
+    snapshot = get_network_snapshot()
+    if snapshot is None:
         return {
             'current_slot': 0,
             'block_height': 0,
             'transaction_count': 0,
             'avg_transaction_fee': 0
         }
+    
+    fee = calculate_transaction_fees('transfer', 'standard', snapshot)
+    return {**snapshot, 'avg_transaction_fee': fee['fee_sol']}
 
-def calculate_transaction_fees(transaction_type: str, priority_level: str) -> Dict:
-    """Calculate transaction fees"""
-    base_fee = '0.000005'
-    confirmation_time = '10-20 seconds'
-    
-    # Adjust for priority
-    if priority_level == 'fast':
-        base_fee = '0.00001'
-        confirmation_time = '5-10 seconds'
-    elif priority_level == 'slow':
-        base_fee = '0.000001'
-        confirmation_time = '30-60 seconds'
-    
-    # Adjust for transaction type
-    if transaction_type == 'token':
-        base_fee = str(float(base_fee) * 1.5)  # Token transfers cost more
-    elif transaction_type == 'nft':
-        base_fee = str(float(base_fee) * 2)  # NFT transfers cost even more
+def calculate_transaction_fees(transaction_type: str, priority_level: str, snapshot: Optional[Dict] = None) -> Dict:
+    """Calculate transaction fees from recent prioritization fees (exact lamport math)"""
+    percentile = PRIORITY_PERCENTILES.get(priority_level, 'p50')
+    compute_units = COMPUTE_UNITS.get(transaction_type, COMPUTE_UNITS['transfer'])
+    snapshot = snapshot or get_network_snapshot()
+    
+    if snapshot is None:
+        fee_sol = FALLBACK_FEES[percentile] * FALLBACK_FEE_MULTIPLIERS.get(transaction_type, Decimal('1'))
+        return {
+            'fee_sol': str(fee_sol),
+            'fee_lamports': int(fee_sol * LAMPORTS_PER_SOL),
+            'priority_fee_micro_lamports': None,
+            'compute_units': compute_units,
+            'percentile': percentile,
+            'fee_source': 'estimate',
+            'estimated_confirmation_time': CONFIRMATION_TIMES[percentile]
+        }
+    
+    # micro-lamports per CU x CU -> lamports, rounded up like the runtime does
+    priority_fee = snapshot['priority_fee_percentiles'][percentile]
+    priority_lamports = -(-priority_fee * compute_units // 1_000_000)
+    fee_lamports = BASE_FEE_LAMPORTS + priority_lamports
     
     return {
-        'fee_sol': base_fee,
-        'estimated_confirmation_time': confirmation_time
+        'fee_sol': str(Decimal(fee_lamports) / LAMPORTS_PER_SOL),
+        'fee_lamports': fee_lamports,
+        'priority_fee_micro_lamports': priority_fee,
+        'compute_units': compute_units,
+        'percentile': percentile,
+        'fee_source': 'network',
+        'estimated_confirmation_time': CONFIRMATION_TIMES[percentile]
     }
 
 def log_transaction(user_id: str, action: str, data: Dict):
-    """Log transaction to DynamoDB"""
+    """Log transaction to DynamoDB (queued for the write-behind writer)"""
     try:
         timestamp = int(time.time())
         item = {
             'transactionId': str(uuid.uuid4()),
             'userId': user_id,
             'action': action,
-            'timestamp': str(timestamp),
+            'timestamp': str(timestamp),  # string, like the GSI range keys (and the cached on-chain records)
             'data': data,
             'createdAt': datetime.utcnow().isoformat() + 'Z'
         }
+        if action == 'PAYMENT_INITIATED' and data.get('wallet'):
+            # Payments go in the wallet's walletAddress-timestamp-index partition, which
+            # get_logged_history reads when the RPC node is down; balance checks stay out of it
+            item.update({
+                'walletAddress': data['wallet'],
+                'type': 'send',
+                'status': 'initiated',
+                'amount': data.get('amount_sol', '0'),
+                'recipientAddress': data.get('recipient', '')
+            })
         
-        table = dynamodb.Table(TRANSACTIONS_TABLE)
-        table.put_item(Item=item)
+        transaction_log_writer.put(item)
         
     except Exception as e:
         logger.error(f"Error logging transaction: {str(e)}")
 
 def create_response(status_code: int, body: Dict, api_path: str, http_method: str = 'POST') -> Dict:
     """Create standardized response"""
-    debug_logger.debug("Creating response", {
+    debug_logger.debug("Creating response", lambda: {
         "status_code": status_code,
         "api_path": api_path,
         "http_method": http_method,
@@ -625,24 +1071,29 @@ def create_response(status_code: int, body: Dict, api_path: str, http_method: st
 def get_user_wallet(user_id: str) -> Optional[Dict]:
     """Get user's wallet from DynamoDB"""
     try:
+        from boto3.dynamodb.conditions import Key
+        
         table = dynamodb.Table(WALLETS_TABLE)
         
-        # Query for user's wallet
-        response = table.scan(
-            FilterExpression='userId = :uid',
-            ExpressionAttributeValues={':uid': user_id}
-        )
+        # Query the user's partition (userId is the hash key); a user has few wallets,
+        # but follow LastEvaluatedKey in case the partition spans pages
+        first_wallet = None
+        query_args = {'KeyConditionExpression': Key('userId').eq(user_id)}
         
-        if 'Items' in response and response['Items']:
-            # Return the first active wallet
-            for wallet in response['Items']:
+        while True:
+            response = table.query(**query_args)
+            for wallet in response.get('Items', []):
+                # Return the first active wallet
                 if wallet.get('isActive', True):
                     return wallet
+                first_wallet = first_wallet or wallet
             
-            # If no active wallet, return the first one
-            return response['Items'][0]
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
         
-        return None
+        # If no active wallet, return the first one
+        return first_wallet
         
     except Exception as e:
         logger.error(f"Error getting user wallet: {str(e)}")
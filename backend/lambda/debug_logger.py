@@ -1,62 +1,207 @@
 import json
-import boto3
+import functools
 import os
+import queue
+import random
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Union
+from lazy_init import lazy_client
+
+# Log data can be a dict, or a zero-argument callable returning one.
+# Callables are only invoked when the line is actually written, so
+# expensive payloads (json.dumps(event), str(item), full responses)
+# cost nothing when the level is disabled:
+#   debug_logger.debug("Raw item", lambda: {'raw_item': str(item)})
+LogData = Union[Dict[Any, Any], Callable[[], Dict[Any, Any]], None]
+
+def resolve_data(data: LogData) -> Dict[Any, Any]:
+    """Build the log payload, invoking deferred (callable) data"""
+    if callable(data):
+        try:
+            data = data()
+        except Exception as e:
+            return {'log_data_error': str(e)}
+    return data or {}
 
 class NoOpLogger:
     """No-operation logger for production - zero overhead"""
-    def debug(self, message: str, data: Dict[Any, Any] = None): pass
-    def info(self, message: str, data: Dict[Any, Any] = None): pass
-    def error(self, message: str, data: Dict[Any, Any] = None): pass
-    def trace_event(self, event_name: str, event_data: Dict[Any, Any]): pass
+    def enabled_for(self, level: str) -> bool: return False
+    def debug(self, message: str, data: LogData = None): pass
+    def info(self, message: str, data: LogData = None): pass
+    def error(self, message: str, data: LogData = None): pass
+    def trace_event(self, event_name: str, event_data: LogData): pass
+    def flush(self, wait: bool = True): pass
+
+class S3LogWriter:
+    """Background thread that uploads NDJSON log chunks to S3.
+    
+    The queue is bounded: if S3 falls behind, new chunks are dropped
+    (and counted) instead of blocking the request path.
+    """
+    def __init__(self, bucket_name: str, max_queue: int = 8):
+        self.bucket_name = bucket_name
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped_chunks = 0
+        self._s3_client = lazy_client('s3')  # only built once debug logs are written
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def submit(self, key: str, body: str):
+        """Queue a chunk for upload without blocking"""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((key, body))
+        except queue.Full:
+            self.dropped_chunks += 1
+            print(f"[ERROR] Debug log queue full - dropped chunk {key}")
+    
+    def wait(self, timeout: float) -> bool:
+        """Block until all queued chunks are uploaded, or timeout. Returns True if drained."""
+        with self.queue.all_tasks_done:
+            return self.queue.all_tasks_done.wait_for(lambda: self.queue.unfinished_tasks == 0, timeout)
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='debug-log-writer', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while True:
+            key, body = self.queue.get()
+            try:
+                self._s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=body.encode('utf-8'),
+                    ContentType='application/x-ndjson'
+                )
+            except Exception as e:
+                print(f"[ERROR] Failed to write debug log to S3: {str(e)}")
+            finally:
+                self.queue.task_done()
 
 class DevDebugLogger:
-    """Full debug logger for development with S3 storage"""
-    def __init__(self, agent_name: str):
+    """Full debug logger for development with S3 storage
+    
+    Log lines are kept in an in-memory ring buffer and written to S3 as one
+    NDJSON object per invocation (see flush_logs), or earlier once the buffer
+    passes flush_bytes. Uploads run on a background S3LogWriter thread.
+    """
+    def __init__(self, agent_name: str, sample_rate: float = 1.0,
+                 max_entries: int = 2000, flush_bytes: int = 512 * 1024, max_queue: int = 8):
         self.agent_name = agent_name
-        self.s3_client = boto3.client('s3')
         self.bucket_name = 'patchline-files-us-east-1'
+        # Fraction of DEBUG/INFO lines to keep - errors are always logged
+        self.sample_rate = sample_rate
+        self.flush_bytes = flush_bytes
+        self.flush_timeout = float(os.environ.get('DEBUG_LOG_FLUSH_TIMEOUT', '2.0'))
+        self._buffer = deque()
+        self._max_entries = max_entries
+        self._buffered_bytes = 0
+        self._dropped_lines = 0
+        self._chunk_seq = 0
+        self._buffer_lock = threading.Lock()
+        self._writer = S3LogWriter(self.bucket_name, max_queue)
+        self._sample = threading.local()  # decision drawn by enabled_for, used by the next log()
+    
+    def enabled_for(self, level: str) -> bool:
+        """Guard for call sites that need more than a lambda to build their payload.
+        
+        The sampling decision is kept for the next log call on this thread, so
+        `if enabled_for('DEBUG'): debug(...)` samples the record once, not twice.
+        """
+        if level.upper() == 'ERROR' or self.sample_rate >= 1.0:
+            return True
+        self._sample.keep = random.random() < self.sample_rate
+        return self._sample.keep
+    
+    def _sampled(self, level: str) -> bool:
+        """One sampling decision per record - reuses a pending enabled_for draw"""
+        if level.upper() == 'ERROR' or self.sample_rate >= 1.0:
+            return True
+        keep = getattr(self._sample, 'keep', None)
+        if keep is None:
+            return random.random() < self.sample_rate
+        self._sample.keep = None
+        return keep
+        
+    def log(self, level: str, message: str, data: LogData = None):
+        """Enhanced logging with buffered S3 storage for debugging"""
+        if not self._sampled(level):
+            return
         
-    def log(self, level: str, message: str, data: Dict[Any, Any] = None):
-        """Enhanced logging with S3 storage for debugging"""
         timestamp = datetime.utcnow().isoformat()
         
         # Console log (always in dev)
         console_msg = f"[{level.upper()}] {timestamp} {self.agent_name} {message}"
         print(console_msg)
         
-        # S3 log for debugging (always in dev)
+        # S3 log for debugging (always in dev) - data is resolved now, so later mutation doesn't leak in
         log_entry = {
             'timestamp': timestamp,
             'agent': self.agent_name,
             'level': level,
             'message': message,
-            'data': data or {}
+            'data': resolve_data(data)
         }
+        line = json.dumps(log_entry, default=str)
         
-        try:
-            # Write to S3 for real-time debugging
-            s3_key = f"debug-logs/{self.agent_name}/{datetime.utcnow().strftime('%Y/%m/%d')}/{timestamp}-{level}.json"
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=json.dumps(log_entry, indent=2, default=str),
-                ContentType='application/json'
-            )
-        except Exception as e:
-            print(f"[ERROR] Failed to write debug log to S3: {str(e)}")
+        with self._buffer_lock:
+            # Ring buffer: drop the oldest line rather than grow without bound
+            if len(self._buffer) >= self._max_entries:
+                self._buffered_bytes -= len(self._buffer.popleft())
+                self._dropped_lines += 1
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            over_threshold = self._buffered_bytes >= self.flush_bytes
+        
+        if over_threshold:
+            self.flush(wait=False)
+    
+    def flush(self, wait: bool = True):
+        """Write buffered lines to S3 as a single NDJSON object.
+        
+        With wait=True (end of invocation) this blocks until the upload finishes,
+        bounded by DEBUG_LOG_FLUSH_TIMEOUT, so logs aren't lost when Lambda freezes.
+        """
+        with self._buffer_lock:
+            lines = list(self._buffer)
+            dropped = self._dropped_lines
+            self._buffer.clear()
+            self._buffered_bytes = 0
+            self._dropped_lines = 0
+            self._chunk_seq += 1
+            seq = self._chunk_seq
+        
+        if lines:
+            if dropped:
+                lines.append(json.dumps({
+                    'timestamp': datetime.utcnow().isoformat(),
+                    'agent': self.agent_name,
+                    'level': 'ERROR',
+                    'message': f"Debug log ring buffer overflowed - {dropped} oldest lines dropped",
+                    'data': {}
+                }))
+            now = datetime.utcnow()
+            s3_key = f"debug-logs/{self.agent_name}/{now.strftime('%Y/%m/%d')}/{now.isoformat()}-{seq:04d}.ndjson"
+            self._writer.submit(s3_key, '\n'.join(lines) + '\n')
+        
+        if wait and not self._writer.wait(self.flush_timeout):
+            print(f"[ERROR] Timed out after {self.flush_timeout}s waiting for debug logs to upload")
     
-    def debug(self, message: str, data: Dict[Any, Any] = None):
+    def debug(self, message: str, data: LogData = None):
         self.log('DEBUG', message, data)
     
-    def info(self, message: str, data: Dict[Any, Any] = None):
+    def info(self, message: str, data: LogData = None):
         self.log('INFO', message, data)
     
-    def error(self, message: str, data: Dict[Any, Any] = None):
+    def error(self, message: str, data: LogData = None):
         self.log('ERROR', message, data)
     
-    def trace_event(self, event_name: str, event_data: Dict[Any, Any]):
+    def trace_event(self, event_name: str, event_data: LogData):
         """Log detailed event traces"""
         self.debug(f"TRACE: {event_name}", event_data)
 
@@ -64,31 +209,58 @@ class ProdLogger:
     """Production logger - only critical errors, no S3"""
     def __init__(self, agent_name: str):
         self.agent_name = agent_name
+    
+    def enabled_for(self, level: str) -> bool:
+        return level.upper() == 'ERROR'
         
-    def debug(self, message: str, data: Dict[Any, Any] = None): 
+    def debug(self, message: str, data: LogData = None): 
         pass  # No debug logs in prod
     
-    def info(self, message: str, data: Dict[Any, Any] = None): 
+    def info(self, message: str, data: LogData = None): 
         pass  # No info logs in prod
     
-    def error(self, message: str, data: Dict[Any, Any] = None):
-        # Only errors in prod
+    def error(self, message: str, data: LogData = None):
+        # Only errors in prod - data is never resolved, so deferred payloads stay free
         timestamp = datetime.utcnow().isoformat()
         print(f"[ERROR] {timestamp} {self.agent_name} {message}")
     
-    def trace_event(self, event_name: str, event_data: Dict[Any, Any]): 
+    def trace_event(self, event_name: str, event_data: LogData): 
         pass  # No traces in prod
+    
+    def flush(self, wait: bool = True):
+        pass  # Nothing buffered in prod
+
+def flush_logs(debug_logger):
+    """Decorator for lambda_handler that guarantees a final flush of buffered debug logs
+    
+        @flush_logs(debug_logger)
+        def lambda_handler(event, context): ...
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            try:
+                return handler(event, context)
+            finally:
+                debug_logger.flush()
+        return wrapper
+    return decorator
 
 def get_logger(agent_name: str):
     """Factory function to get the right logger based on environment"""
     debug_mode = os.environ.get('DEBUG_MODE', 'prod').lower()
     
     if debug_mode == 'dev':
-        print(f"[INIT] Using DEV debug logger for {agent_name}")
-        return DevDebugLogger(agent_name)
+        try:
+            sample_rate = float(os.environ.get('DEBUG_LOG_SAMPLE_RATE', '1.0'))
+        except ValueError:
+            print(f"[ERROR] Invalid DEBUG_LOG_SAMPLE_RATE {os.environ['DEBUG_LOG_SAMPLE_RATE']!r} - logging every line")
+            sample_rate = 1.0
+        print(f"[INIT] Using DEV debug logger for {agent_name} (sample rate {sample_rate})")
+        return DevDebugLogger(agent_name, sample_rate)
     elif debug_mode == 'extreme':
         print(f"[INIT] Using EXTREME debug logger for {agent_name}")
-        return DevDebugLogger(agent_name)  # Could be even more verbose
+        return DevDebugLogger(agent_name)  # Could be even more verbose - never sampled
     elif debug_mode == 'off':
         return NoOpLogger()
     else:  # 'prod' or any other value
@@ -98,4 +270,6 @@ def get_logger(agent_name: str):
 # DEBUG_MODE=dev     -> Full S3 logging + console
 # DEBUG_MODE=extreme -> Same as dev (could extend for more detail)  
 # DEBUG_MODE=prod    -> Only error console logs
-# DEBUG_MODE=off     -> Zero logging (no-op) 
\ No newline at end of file
+# DEBUG_MODE=off     -> Zero logging (no-op)
+# DEBUG_LOG_SAMPLE_RATE=0.1 -> In dev, keep ~10% of DEBUG/INFO lines (errors always kept)
+# DEBUG_LOG_FLUSH_TIMEOUT=2 -> Max seconds the final flush waits for the S3 upload
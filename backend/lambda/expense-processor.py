@@ -1,14 +1,108 @@
 import json
+import os
+import random
 import re
 import hashlib
+import time
+from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
 import boto3
 
 dynamodb = boto3.resource('dynamodb')
 textract = boto3.client('textract')
 
+TAX_EXPENSES_TABLE = os.environ.get('TAX_EXPENSES_TABLE', 'TaxExpenses-dev')
+BATCH_WRITE_SIZE = 25  # BatchWriteItem limit
+BATCH_WRITE_MAX_RETRIES = int(os.environ.get('BATCH_WRITE_MAX_RETRIES', '8'))
+BATCH_WRITE_BASE_DELAY = 0.05  # seconds, doubled on every retry
+BATCH_WRITE_MAX_DELAY = 2.0
+
+class TextractDocument:
+    """Index over Textract blocks, built once per document and shared by all parsers.
+    
+    Textract returns a flat list of blocks that reference each other by Id.
+    Resolving those references by scanning the list makes table parsing
+    O(cells x words x blocks); this index makes every lookup O(1):
+      - id -> block map
+      - blocks grouped by type and by page (in document order)
+      - table -> row/column grid of CELL blocks (cached per table)
+      - cell -> text (cached per cell)
+    """
+    
+    def __init__(self, textract_data: Optional[Dict] = None):
+        self.blocks_by_id: Dict[str, Dict] = {}
+        self.blocks_by_type: Dict[str, List[Dict]] = defaultdict(list)
+        self.blocks_by_page: Dict[int, List[Dict]] = defaultdict(list)
+        self._table_rows_cache: Dict[str, Dict[int, List[Dict]]] = {}
+        self._cell_text_cache: Dict[str, str] = {}
+        
+        if textract_data:
+            self.add_blocks(textract_data.get('Blocks', []))
+    
+    def add_blocks(self, blocks: List[Dict]):
+        """Index a batch of blocks (e.g. one page of get_document_analysis results)"""
+        for block in blocks:
+            block_id = block.get('Id')
+            if block_id:
+                self.blocks_by_id[block_id] = block
+            self.blocks_by_type[block.get('BlockType', '')].append(block)
+            self.blocks_by_page[block.get('Page', 1)].append(block)
+    
+    def get_block(self, block_id: str) -> Optional[Dict]:
+        """Get a block by its ID"""
+        return self.blocks_by_id.get(block_id)
+    
+    def children(self, block: Dict, block_types: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        """Resolve a block's CHILD relationships, optionally filtered by BlockType"""
+        result = []
+        for relationship in block.get('Relationships', []):
+            if relationship['Type'] == 'CHILD':
+                for child_id in relationship['Ids']:
+                    child = self.blocks_by_id.get(child_id)
+                    if child and (block_types is None or child['BlockType'] in block_types):
+                        result.append(child)
+        return result
+    
+    def tables(self) -> List[Dict]:
+        return self.blocks_by_type.get('TABLE', [])
+    
+    def lines(self) -> List[Dict]:
+        return self.blocks_by_type.get('LINE', [])
+    
+    def pages(self) -> List[int]:
+        return sorted(self.blocks_by_page)
+    
+    def table_rows(self, table_block: Dict) -> Dict[int, List[Dict]]:
+        """Get a table's cells grouped by RowIndex, each row sorted by ColumnIndex"""
+        table_id = table_block.get('Id')
+        if table_id in self._table_rows_cache:
+            return self._table_rows_cache[table_id]
+        
+        rows = defaultdict(list)
+        for cell in self.children(table_block, ('CELL',)):
+            rows[cell.get('RowIndex', 0)].append(cell)
+        for row_cells in rows.values():
+            row_cells.sort(key=lambda x: x.get('ColumnIndex', 0))
+        
+        rows = dict(rows)
+        if table_id:
+            self._table_rows_cache[table_id] = rows
+        return rows
+    
+    def cell_text(self, cell: Dict) -> str:
+        """Get text content from a cell"""
+        cell_id = cell.get('Id')
+        if cell_id in self._cell_text_cache:
+            return self._cell_text_cache[cell_id]
+        
+        text = ' '.join(child.get('Text', '') for child in self.children(cell, ('WORD', 'LINE')))
+        if cell_id:
+            self._cell_text_cache[cell_id] = text
+        return text
+
+
 class BankStatementParser:
     """Base class for bank statement parsers"""
     
@@ -22,6 +116,24 @@ class BankStatementParser:
         """Parse Textract output and extract expenses"""
         raise NotImplementedError("Subclasses must implement parse_textract_output")
     
+    def parse_pages(self, pages: Iterable[List[Dict]]) -> List[Dict]:
+        """Parse a stream of per-page block lists (see iter_document_pages).
+        
+        Default: index every page into one TextractDocument, then parse once.
+        Parsers whose structures never cross a page boundary override this to
+        parse and release each page, keeping memory bounded by one page.
+        """
+        document = TextractDocument()
+        for blocks in pages:
+            document.add_blocks(blocks)
+        return self.parse_textract_output(document)
+    
+    def load_document(self, textract_data) -> TextractDocument:
+        """Index raw Textract output once - accepts an already built TextractDocument as-is"""
+        if isinstance(textract_data, TextractDocument):
+            return textract_data
+        return TextractDocument(textract_data)
+    
     def extract_date(self, date_str: str) -> Optional[str]:
         """Extract and normalize date from various formats"""
         if not date_str:
@@ -121,48 +233,41 @@ class ChaseStatementParser(BankStatementParser):
     def parse_textract_output(self, textract_data: Dict) -> List[Dict]:
         """Parse Chase statement format"""
         expenses = []
+        document = self.load_document(textract_data)
         
         # Look for tables in Textract output
-        for item in textract_data.get('Blocks', []):
-            if item['BlockType'] == 'TABLE':
-                table_expenses = self._parse_table(item, textract_data)
-                expenses.extend(table_expenses)
+        for table_block in document.tables():
+            table_expenses = self._parse_table(table_block, document)
+            expenses.extend(table_expenses)
         
         return expenses
     
-    def _parse_table(self, table_block: Dict, full_data: Dict) -> List[Dict]:
+    def parse_pages(self, pages: Iterable[List[Dict]]) -> List[Dict]:
+        """Textract tables never span pages, so each page is parsed on its own"""
+        expenses = []
+        for blocks in pages:
+            expenses.extend(self.parse_textract_output(TextractDocument({'Blocks': blocks})))
+        return expenses
+    
+    def _parse_table(self, table_block: Dict, document: TextractDocument) -> List[Dict]:
         """Parse a table from Chase statement"""
         expenses = []
         
-        # Get all cells in the table
-        cells = []
-        for relationship in table_block.get('Relationships', []):
-            if relationship['Type'] == 'CHILD':
-                for cell_id in relationship['Ids']:
-                    cell_block = self._get_block_by_id(cell_id, full_data)
-                    if cell_block and cell_block['BlockType'] == 'CELL':
-                        cells.append(cell_block)
-        
-        # Group cells by row
-        rows = {}
-        for cell in cells:
-            row_index = cell.get('RowIndex', 0)
-            if row_index not in rows:
-                rows[row_index] = []
-            rows[row_index].append(cell)
+        # Cells grouped by row, each row sorted by column
+        rows = document.table_rows(table_block)
         
         # Process each row
         for row_index in sorted(rows.keys()):
             if row_index == 1:  # Skip header row
                 continue
                 
-            row_cells = sorted(rows[row_index], key=lambda x: x.get('ColumnIndex', 0))
+            row_cells = rows[row_index]
             
             # Extract data based on column positions
             if len(row_cells) >= 3:
-                date_text = self._get_cell_text(row_cells[0], full_data)
-                desc_text = self._get_cell_text(row_cells[1], full_data) if len(row_cells) > 1 else ""
-                amount_text = self._get_cell_text(row_cells[-1], full_data)  # Amount usually in last column
+                date_text = document.cell_text(row_cells[0])
+                desc_text = document.cell_text(row_cells[1]) if len(row_cells) > 1 else ""
+                amount_text = document.cell_text(row_cells[-1])  # Amount usually in last column
                 
                 # Parse the extracted data
                 date = self.extract_date(date_text)
@@ -190,26 +295,6 @@ class ChaseStatementParser(BankStatementParser):
                     expenses.append(expense)
         
         return expenses
-    
-    def _get_block_by_id(self, block_id: str, full_data: Dict) -> Optional[Dict]:
-        """Get a block by its ID"""
-        for block in full_data.get('Blocks', []):
-            if block.get('Id') == block_id:
-                return block
-        return None
-    
-    def _get_cell_text(self, cell: Dict, full_data: Dict) -> str:
-        """Get text content from a cell"""
-        text_parts = []
-        
-        for relationship in cell.get('Relationships', []):
-            if relationship['Type'] == 'CHILD':
-                for child_id in relationship['Ids']:
-                    child_block = self._get_block_by_id(child_id, full_data)
-                    if child_block and child_block['BlockType'] in ['WORD', 'LINE']:
-                        text_parts.append(child_block.get('Text', ''))
-        
-        return ' '.join(text_parts)
 
 
 class BiltStatementParser(BankStatementParser):
@@ -218,34 +303,33 @@ class BiltStatementParser(BankStatementParser):
     def parse_textract_output(self, textract_data: Dict) -> List[Dict]:
         """Parse Bilt statement format"""
         expenses = []
+        document = self.load_document(textract_data)
         
         # Bilt has a specific transaction summary format
         in_transaction_section = False
         
-        for block in textract_data.get('Blocks', []):
-            if block['BlockType'] == 'LINE':
-                text = block.get('Text', '')
-                
-                # Look for transaction section start
-                if 'transaction summary' in text.lower():
-                    in_transaction_section = True
-                    continue
-                
-                # Look for section end
-                if in_transaction_section and 'important information' in text.lower():
-                    break
-                
-                # Parse transaction lines
-                if in_transaction_section:
-                    expense = self._parse_transaction_line(text)
-                    if expense:
-                        expenses.append(expense)
+        for block in document.lines():
+            text = block.get('Text', '')
+            
+            # Look for transaction section start
+            if 'transaction summary' in text.lower():
+                in_transaction_section = True
+                continue
+            
+            # Look for section end
+            if in_transaction_section and 'important information' in text.lower():
+                break
+            
+            # Parse transaction lines
+            if in_transaction_section:
+                expense = self._parse_transaction_line(text)
+                if expense:
+                    expenses.append(expense)
         
         # Also check tables
-        for item in textract_data.get('Blocks', []):
-            if item['BlockType'] == 'TABLE':
-                table_expenses = self._parse_bilt_table(item, textract_data)
-                expenses.extend(table_expenses)
+        for table_block in document.tables():
+            table_expenses = self._parse_bilt_table(table_block, document)
+            expenses.extend(table_expenses)
         
         return expenses
     
@@ -283,7 +367,7 @@ class BiltStatementParser(BankStatementParser):
         
         return None
     
-    def _parse_bilt_table(self, table_block: Dict, full_data: Dict) -> List[Dict]:
+    def _parse_bilt_table(self, table_block: Dict, document: TextractDocument) -> List[Dict]:
         """Parse Bilt transaction table"""
         # Similar to Chase parser but adapted for Bilt format
         return []  # Implement if needed
@@ -303,6 +387,118 @@ def get_parser(bank_type: str, user_id: str, document_id: str) -> BankStatementP
     return parser_class(bank_type, user_id, document_id)
 
 
+def iter_textract_responses(job_id: str, client=None) -> Iterator[Dict]:
+    """Yield every get_document_analysis response of a job, following NextToken"""
+    client = client or textract
+    kwargs = {'JobId': job_id, 'MaxResults': 1000}
+    
+    while True:
+        response = client.get_document_analysis(**kwargs)
+        status = response.get('JobStatus', 'SUCCEEDED')
+        if status not in ('SUCCEEDED', 'PARTIAL_SUCCESS'):
+            raise Exception(f"Textract job {job_id} is {status}: {response.get('StatusMessage', '')}")
+        
+        yield response
+        
+        next_token = response.get('NextToken')
+        if not next_token:
+            break
+        kwargs['NextToken'] = next_token
+
+def iter_document_pages(jobs: List[Dict], client=None) -> Iterator[List[Dict]]:
+    """Stream the blocks of one or more Textract jobs, one document page at a time.
+    
+    `jobs` is a list of {'jobId', 'pageNum'} - pdf-preprocessor starts one job per
+    transaction page. Jobs are read in pageNum order and each block's Page is
+    shifted to its page in the original statement. Textract returns blocks in
+    page order, so a page is complete (and yielded) once the next one starts.
+    Only one page of blocks is held in memory at a time.
+    """
+    for job in sorted(jobs, key=lambda j: j.get('pageNum', 1)):
+        page_offset = job.get('pageNum', 1) - 1
+        current_page = None
+        page_blocks = []
+        
+        for response in iter_textract_responses(job['jobId'], client):
+            for block in response.get('Blocks', []):
+                page = block.get('Page', 1) + page_offset
+                block['Page'] = page
+                if current_page is not None and page != current_page and page_blocks:
+                    yield page_blocks
+                    page_blocks = []
+                current_page = page
+                page_blocks.append(block)
+        
+        if page_blocks:
+            yield page_blocks
+
+def get_textract_jobs(body: Dict) -> List[Dict]:
+    """Textract jobs for this request - a single jobId, or per-page jobs from pdf-preprocessor"""
+    if body.get('jobs'):
+        return body['jobs']
+    if body.get('transactionPages'):
+        return [{'jobId': p['job_id'], 'pageNum': p['page_num']} for p in body['transactionPages'] if p.get('job_id')]
+    if body.get('jobId'):
+        return [{'jobId': body['jobId'], 'pageNum': 1}]
+    return []
+
+def write_expenses(expenses: List[Dict], table_name: Optional[str] = None, client=None) -> Dict[str, Any]:
+    """Upsert expenses with BatchWriteItem, 25 items per request.
+    
+    expenseId is a deterministic hash (generate_expense_id), so re-processing a
+    statement overwrites the same items instead of duplicating them. Duplicate ids
+    within one run are collapsed first - BatchWriteItem rejects a request that
+    contains the same key twice. UnprocessedItems are retried with exponential
+    backoff and jitter; whatever is still unprocessed after BATCH_WRITE_MAX_RETRIES
+    is counted as failed.
+    """
+    table_name = table_name or TAX_EXPENSES_TABLE
+    # The resource's client accepts plain Python values (same as table.put_item)
+    client = client or dynamodb.meta.client
+    
+    unique = {}
+    for expense in expenses:
+        unique[expense['expenseId']] = expense
+    items = list(unique.values())
+    
+    result = {'saved': 0, 'failed': 0, 'batches': 0, 'retries': 0}
+    started = time.perf_counter()
+    
+    for offset in range(0, len(items), BATCH_WRITE_SIZE):
+        batch = items[offset:offset + BATCH_WRITE_SIZE]
+        pending = {table_name: [{'PutRequest': {'Item': item}} for item in batch]}
+        batch_started = time.perf_counter()
+        retries = 0
+        
+        while True:
+            try:
+                response = client.batch_write_item(RequestItems=pending)
+                pending = response.get('UnprocessedItems') or {}
+            except Exception as e:
+                print(f"Error writing expense batch: {str(e)}")
+            
+            if not pending.get(table_name) or retries >= BATCH_WRITE_MAX_RETRIES:
+                break
+            retries += 1
+            delay = min(BATCH_WRITE_MAX_DELAY, BATCH_WRITE_BASE_DELAY * 2 ** (retries - 1))
+            time.sleep(random.uniform(delay / 2, delay))
+        
+        failed = len(pending.get(table_name, []))
+        elapsed = time.perf_counter() - batch_started
+        result['batches'] += 1
+        result['retries'] += retries
+        result['saved'] += len(batch) - failed
+        result['failed'] += failed
+        print(f"Batch {result['batches']}: {len(batch) - failed}/{len(batch)} items in {elapsed * 1000:.0f}ms "
+              f"({len(batch) / elapsed if elapsed else 0:.0f} items/sec, {retries} retries)")
+    
+    elapsed = time.perf_counter() - started
+    result['duplicates'] = len(expenses) - len(items)
+    result['itemsPerSecond'] = round(result['saved'] / elapsed, 1) if elapsed else 0.0
+    print(f"Saved {result['saved']}/{len(items)} expenses to {table_name} in {result['batches']} batches "
+          f"({result['itemsPerSecond']} items/sec, {result['retries']} retries, {result['failed']} failed)")
+    return result
+
 def lambda_handler(event, context):
     """Process expenses from Textract output"""
     body = json.loads(event['body']) if isinstance(event.get('body'), str) else event
@@ -310,40 +506,35 @@ def lambda_handler(event, context):
     user_id = body['userId']
     document_id = body['documentId']
     bank_type = body.get('bankType', 'unknown')
-    textract_job_id = body.get('jobId')
+    textract_jobs = get_textract_jobs(body)
     
     print(f"Processing expenses for document {document_id}")
     print(f"Bank type: {bank_type}")
-    print(f"Textract job: {textract_job_id}")
+    print(f"Textract jobs: {[job['jobId'] for job in textract_jobs]}")
     
-    # Get Textract results
-    textract_data = textract.get_document_analysis(JobId=textract_job_id)
+    if not textract_jobs:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'success': False, 'error': 'jobId or jobs is required'})
+        }
     
     # Get the appropriate parser
     parser = get_parser(bank_type, user_id, document_id)
     
-    # Parse expenses
-    expenses = parser.parse_textract_output(textract_data)
+    # Stream Textract results (all NextToken pages of every job) into the parser
+    expenses = parser.parse_pages(iter_document_pages(textract_jobs))
     
     print(f"Extracted {len(expenses)} expenses")
     
     # Save to DynamoDB
-    table = dynamodb.Table('TaxExpenses-dev')
-    saved_count = 0
-    
-    for expense in expenses:
-        try:
-            table.put_item(Item=expense)
-            saved_count += 1
-        except Exception as e:
-            print(f"Error saving expense: {str(e)}")
-            print(f"Expense data: {json.dumps(expense)}")
+    write_result = write_expenses(expenses)
     
     return {
         'statusCode': 200,
         'body': json.dumps({
             'success': True,
             'expensesExtracted': len(expenses),
-            'expensesSaved': saved_count
+            'expensesSaved': write_result['saved'],
+            'expensesFailed': write_result['failed']
         })
     } 
\ No newline at end of file
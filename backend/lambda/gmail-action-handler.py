@@ -1,18 +1,17 @@
 import json
 import os
-import boto3
 import logging
 import base64
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Union
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from boto3.dynamodb.types import TypeDeserializer
-from debug_logger import get_logger
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple, Union
+from debug_logger import get_logger, flush_logs
+from lazy_init import LazyObject, lazy_client, lazy_resource, prefetch
+from tiered_cache import TieredCache, DynamoDBCacheTier, S3CacheTier
 import traceback
 
 logger = logging.getLogger()
@@ -21,20 +20,129 @@ logger.setLevel(logging.INFO)
 # Smart debugging - zero overhead in prod
 debug_logger = get_logger('gmail-agent')
 
-# AWS Services
-dynamodb = boto3.resource('dynamodb')
-secrets_manager = boto3.client('secretsmanager')
-s3_client = boto3.client('s3')
+# AWS Services - created on first use, so cold starts only build the clients a route needs.
+# The Google client libraries (~250 ms to import) are likewise imported by the functions that use them.
+dynamodb = lazy_resource('dynamodb')
+secrets_manager = lazy_client('secretsmanager')
+s3_client = lazy_client('s3')
+bedrock_agent = lazy_client('bedrock-agent')
+lambda_client = lazy_client('lambda')
 
 # Environment variables
 PLATFORM_CONNECTIONS_TABLE = os.environ.get('PATCHLINE_DDB_TABLE', 'PlatformConnections-staging')
 GMAIL_SECRETS_NAME = os.environ.get('GMAIL_SECRETS_NAME', 'patchline/gmail-oauth')
 KNOWLEDGE_BASE_BUCKET = os.environ.get('KNOWLEDGE_BASE_BUCKET', 'patchline-email-knowledge-base')
 
+# Gmail batch endpoint - one HTTP round trip for many messages().get calls.
+# Gmail starts rate limiting batches larger than ~50 sub-requests, so keep the cap modest.
+GMAIL_BATCH_URI = os.environ.get('GMAIL_BATCH_URI', 'https://gmail.googleapis.com/batch/gmail/v1')
+# Overrides the Gmail REST endpoint (local stand-ins for load tests); unset in deployed functions
+GMAIL_API_ENDPOINT = os.environ.get('GMAIL_API_ENDPOINT')
+GMAIL_BATCH_MAX_CONCURRENCY = int(os.environ.get('GMAIL_BATCH_MAX_CONCURRENCY', '25'))
+METADATA_HEADERS = ['Subject', 'From', 'Date']
+
+# Search pages: Bedrock rejects action-group responses over 25 KB, so each page is cut at
+# GMAIL_SEARCH_RESPONSE_BYTES and the rest of the results continue from the returned cursor
+GMAIL_SEARCH_RESPONSE_BYTES = int(os.environ.get('GMAIL_SEARCH_RESPONSE_BYTES', '20000'))
+GMAIL_SEARCH_MAX_PAGE_SIZE = 100
+GMAIL_SEARCH_PREFETCH_MAX = 32  # next pages held per container
+
+# Mailbox stats come from labels().get counts; these labels are reported when a request names none
+DEFAULT_STATS_LABELS = ['INBOX', 'SENT', 'UNREAD']
+GMAIL_SYSTEM_LABELS = {'INBOX', 'SENT', 'UNREAD', 'STARRED', 'IMPORTANT', 'DRAFT', 'SPAM', 'TRASH',
+                       'CATEGORY_PERSONAL', 'CATEGORY_SOCIAL', 'CATEGORY_PROMOTIONS', 'CATEGORY_UPDATES',
+                       'CATEGORY_FORUMS'}
+
+# Incremental Gmail -> Knowledge Base sync (see sync_knowledge_base). Emails are written to
+# KNOWLEDGE_BASE_BUCKET as NDJSON shards; an ingestion job starts once a user has
+# GMAIL_KB_INGEST_SHARD_THRESHOLD new shards, or has waited GMAIL_KB_INGEST_MAX_DELAY_SECONDS.
+EMAIL_KNOWLEDGE_BASE_ID = os.environ.get('EMAIL_KNOWLEDGE_BASE_ID')
+EMAIL_KB_DATA_SOURCE_ID = os.environ.get('EMAIL_KB_DATA_SOURCE_ID')
+GMAIL_KB_SHARD_MAX_DOCS = int(os.environ.get('GMAIL_KB_SHARD_MAX_DOCS', '200'))
+GMAIL_KB_SHARD_MAX_BYTES = int(os.environ.get('GMAIL_KB_SHARD_MAX_BYTES', str(4 * 1024 * 1024)))
+GMAIL_KB_MAX_MESSAGES_PER_SYNC = int(os.environ.get('GMAIL_KB_MAX_MESSAGES_PER_SYNC', '500'))
+GMAIL_KB_MAX_FETCH_ATTEMPTS = int(os.environ.get('GMAIL_KB_MAX_FETCH_ATTEMPTS', '3'))  # per message, across runs
+GMAIL_KB_INITIAL_QUERY = os.environ.get('GMAIL_KB_INITIAL_QUERY', 'newer_than:30d')  # first sync of a mailbox
+GMAIL_KB_INGEST_SHARD_THRESHOLD = int(os.environ.get('GMAIL_KB_INGEST_SHARD_THRESHOLD', '5'))
+GMAIL_KB_INGEST_MAX_DELAY_SECONDS = int(os.environ.get('GMAIL_KB_INGEST_MAX_DELAY_SECONDS', str(6 * 60 * 60)))
+GMAIL_KB_MAX_BODY_CHARS = 20000
+GMAIL_KB_SKIP_LABELS = {'DRAFT', 'SPAM', 'TRASH', 'CHAT'}
+
+# Attachment export (/export-attachment): the body streams from Gmail into S3 in parts of
+# GMAIL_ATTACHMENT_PART_BYTES (S3's minimum is 5 MB), so a container holds a few parts at most
+# whatever the attachment size. The S3 object is then handed to the PDF or legal pipeline.
+GMAIL_ATTACHMENT_BUCKET = os.environ.get('GMAIL_ATTACHMENT_BUCKET',
+                                         os.environ.get('PATCHLINE_S3_BUCKET', 'patchline-files-us-east-1'))
+GMAIL_ATTACHMENT_PART_BYTES = max(int(os.environ.get('GMAIL_ATTACHMENT_PART_BYTES', str(8 * 1024 * 1024))),
+                                  5 * 1024 * 1024)
+GMAIL_ATTACHMENT_UPLOAD_CONCURRENCY = int(os.environ.get('GMAIL_ATTACHMENT_UPLOAD_CONCURRENCY', '2'))
+GMAIL_ATTACHMENT_READ_BYTES = 1024 * 1024
+ATTACHMENT_PIPELINES = ('none', 'pdf-preprocessor', 'legal')
+PDF_PREPROCESSOR_FUNCTION = os.environ.get('PDF_PREPROCESSOR_FUNCTION', 'pdf-preprocessor')
+LEGAL_ACTION_FUNCTION = os.environ.get('LEGAL_ACTION_FUNCTION', 'legal-action-handler')
+# Scheduled Knowledge Base syncs fan out to one async invocation of this function per user
+GMAIL_ACTION_FUNCTION = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'gmail-action-handler')
+
 # DynamoDB table for platform connections
-platform_table = dynamodb.Table(PLATFORM_CONNECTIONS_TABLE)
+platform_table = LazyObject(lambda: dynamodb.Table(PLATFORM_CONNECTIONS_TABLE))
+
+# Warm-container caches - these survive between invocations of the same Lambda container.
+# The OAuth client secret rarely changes, so it is re-read at most every GMAIL_SECRET_TTL_SECONDS.
+# Built Gmail services are kept per user until their access token expires.
+GMAIL_SECRET_TTL_SECONDS = int(os.environ.get('GMAIL_SECRET_TTL_SECONDS', '300'))
+_client_config_cache = {'value': None, 'expires_at': 0.0}
+_gmail_service_cache = {}  # userId -> {'service', 'credentials', 'refresh_token'}
+# Label counts are kept per user until the mailbox historyId moves (any change to the mailbox moves it)
+_label_stats_cache = {}  # userId -> {'history_id', 'labels': {labelId: counts}}
+# Next search pages fetched in the background: (userId, cursor) -> Future of a search page
+_search_prefetch = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Parsed messages (headers, plain-text body, attachment manifest) for repeated reads and searches.
+# Message content never changes in Gmail; labels and deletions do, and those are picked up from
+# history().list at most every GMAIL_MESSAGE_CACHE_CHECK_SECONDS per user, so reads in between cost
+# no Gmail quota. A shared tier (S3 bucket or DynamoDB table) is used when one is configured.
+GMAIL_MESSAGE_CACHE_BYTES = int(os.environ.get('GMAIL_MESSAGE_CACHE_BYTES', str(32 * 1024 * 1024)))
+GMAIL_MESSAGE_CACHE_TTL_SECONDS = int(os.environ.get('GMAIL_MESSAGE_CACHE_TTL_SECONDS', str(24 * 60 * 60)))
+GMAIL_MESSAGE_CACHE_CHECK_SECONDS = int(os.environ.get('GMAIL_MESSAGE_CACHE_CHECK_SECONDS', '30'))
+GMAIL_MESSAGE_CACHE_BUCKET = os.environ.get('GMAIL_MESSAGE_CACHE_BUCKET')
+GMAIL_MESSAGE_CACHE_TABLE = os.environ.get('GMAIL_MESSAGE_CACHE_TABLE')
+
+if GMAIL_MESSAGE_CACHE_BUCKET:
+    _message_cache_tier = S3CacheTier(GMAIL_MESSAGE_CACHE_BUCKET, 'gmail-message-cache/', s3_client)
+elif GMAIL_MESSAGE_CACHE_TABLE:
+    _message_cache_tier = DynamoDBCacheTier(GMAIL_MESSAGE_CACHE_TABLE, dynamodb)
+else:
+    _message_cache_tier = None
+message_cache = TieredCache('gmail-messages', maxsize=100_000, persistent=_message_cache_tier,
+                            max_bytes=GMAIL_MESSAGE_CACHE_BYTES)
+# userId -> {'history_id': checked up to, 'checked_at', 'floor': where this container's checks began}
+_message_cache_sync = {}
 
 def get_gmail_credentials():
+    """Get Gmail OAuth client config, cached for GMAIL_SECRET_TTL_SECONDS"""
+    global _client_config_prefetch
+    with _cache_lock:
+        if _client_config_cache['value'] and time.time() < _client_config_cache['expires_at']:
+            return _client_config_cache['value']
+        prefetched, _client_config_prefetch = _client_config_prefetch, None
+    
+    client_config = None
+    if prefetched is not None:
+        try:
+            client_config = prefetched.result()
+        except Exception:
+            pass  # already logged; fetch again below so the error surfaces on this request
+    if client_config is None:
+        client_config = fetch_gmail_credentials()
+    
+    with _cache_lock:
+        _client_config_cache['value'] = client_config
+        _client_config_cache['expires_at'] = time.time() + GMAIL_SECRET_TTL_SECONDS
+    
+    return client_config
+
+def fetch_gmail_credentials():
     """Get Gmail OAuth credentials from AWS Secrets Manager"""
     try:
         logger.info(f"[DEBUG] Getting secret: {GMAIL_SECRETS_NAME}")
@@ -71,6 +179,10 @@ def get_gmail_credentials():
         logger.error(f"[DEBUG] Traceback: {traceback.format_exc()}")
         raise
 
+# Every route needs the OAuth client secret, so start reading it during INIT;
+# it overlaps the Google library imports on the first request
+_client_config_prefetch = prefetch(fetch_gmail_credentials)
+
 def parse_scopes(scopes_data: Union[str, List[str]]) -> List[str]:
     """Parse scopes whether they're stored as string or list"""
     default_scopes = [
@@ -109,42 +221,92 @@ def parse_scopes(scopes_data: Union[str, List[str]]) -> List[str]:
     logger.warning(f"Could not parse scopes: {scopes_data}, using defaults")
     return default_scopes
 
-def get_user_gmail_service(user_id: str):
-    """Get Gmail service for a specific user"""
+def parse_token_expiry(expiry_value) -> Union[datetime, None]:
+    """Parse the stored tokenExpiry (naive UTC ISO string, as written by gmail-auth-handler)"""
+    if not expiry_value:
+        return None
     try:
-        debug_logger.debug("Starting Gmail service setup", {'user_id': user_id})
+        expiry = datetime.fromisoformat(str(expiry_value).replace('Z', ''))
+        # google-auth compares expiry against naive UTC
+        return expiry.replace(tzinfo=None)
+    except ValueError:
+        logger.warning(f"Could not parse tokenExpiry: {expiry_value}")
+        return None
+
+def get_cached_gmail_service(user_id: str, connection: Dict = None):
+    """Return the cached (service, credentials) for a user if the token is still valid"""
+    with _cache_lock:
+        cached = _gmail_service_cache.get(user_id)
+        if not cached:
+            return None
         
-        # Get user's credentials from DynamoDB
-        table = dynamodb.Table(PLATFORM_CONNECTIONS_TABLE)
-        debug_logger.debug("Querying DynamoDB", {'table': PLATFORM_CONNECTIONS_TABLE, 'user_id': user_id})
+        credentials = cached['credentials']
+        # Evict on expiry, or when the stored connection was replaced (user reconnected)
+        if credentials.expired or (connection and connection.get('refreshToken') != cached['refresh_token']):
+            _gmail_service_cache.pop(user_id, None)
+            return None
         
-        response = table.get_item(
-            Key={
-                'userId': user_id,
-                'provider': 'gmail'
-            }
-        )
+        return cached['service'], credentials
+
+def evict_gmail_service(user_id: str):
+    """Drop a user's cached Gmail service (e.g. after their credentials were revoked)"""
+    with _cache_lock:
+        _gmail_service_cache.pop(user_id, None)
+        _label_stats_cache.pop(user_id, None)
+        _message_cache_sync.pop(user_id, None)
+
+def get_user_gmail_client(user_id: str, connection: Dict = None):
+    """Get Gmail service for a specific user, with the OAuth credentials it was built with
+    
+    Returns (service, credentials) - the credentials are needed for requests made
+    outside the client library (batch and streamed downloads).
+    If the caller already loaded the PlatformConnections item (lambda_handler does
+    in check_gmail_authentication), pass it as `connection` to skip a second get_item.
+    """
+    try:
+        cached = get_cached_gmail_service(user_id, connection)
+        if cached:
+            debug_logger.debug("Using cached Gmail service", {'user_id': user_id})
+            return cached
+        
+        debug_logger.debug("Starting Gmail service setup", {'user_id': user_id})
         
-        debug_logger.debug("DynamoDB raw response", {'response_keys': list(response.keys())})
+        table = dynamodb.Table(PLATFORM_CONNECTIONS_TABLE)
         
-        if 'Item' not in response:
-            debug_logger.error("No Gmail credentials found", {'user_id': user_id, 'response': response})
-            raise Exception(f"No Gmail credentials found for user {user_id}")
+        if connection:
+            raw_item = connection
+        else:
+            # Get user's credentials from DynamoDB
+            debug_logger.debug("Querying DynamoDB", {'table': PLATFORM_CONNECTIONS_TABLE, 'user_id': user_id})
+            
+            response = table.get_item(
+                Key={
+                    'userId': user_id,
+                    'provider': 'gmail'
+                }
+            )
+            
+            debug_logger.debug("DynamoDB raw response", {'response_keys': list(response.keys())})
+            
+            if 'Item' not in response:
+                debug_logger.error("No Gmail credentials found", {'user_id': user_id, 'response': response})
+                raise Exception(f"No Gmail credentials found for user {user_id}")
+            
+            raw_item = response['Item']
         
-        debug_logger.debug("Raw DynamoDB item", {'raw_item': str(response['Item'])})
+        debug_logger.debug("Raw DynamoDB item", lambda: {'raw_item': str(raw_item)})
         
         # If the DynamoDB client was the low-level client we would need to deserialize.
         # However boto3.resource already returns native Python types, so just use the item as-is.
         # Only fall back to explicit deserialization if values are still in AttributeValue dict form.
-        raw_item = response['Item']
         if all(isinstance(v, dict) and len(v) == 1 for v in raw_item.values()):
+            from boto3.dynamodb.types import TypeDeserializer
             deserializer = TypeDeserializer()
             item = {k: deserializer.deserialize(v) for k, v in raw_item.items()}
         else:
             item = raw_item
         
         debug_logger.debug("Converted DynamoDB item", {'converted_item': item})
-        logger.info(f"DynamoDB item for user {user_id}: {json.dumps(item, default=str)}")
         
         # Parse scopes
         scopes = parse_scopes(item.get('scopes', ''))
@@ -153,6 +315,10 @@ def get_user_gmail_service(user_id: str):
         # Get OAuth2 credentials
         client_config = get_gmail_credentials()
         
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+        
         # Create credentials from stored tokens
         credentials = Credentials(
             token=item.get('accessToken'),
@@ -160,7 +326,8 @@ def get_user_gmail_service(user_id: str):
             token_uri=client_config['token_uri'],
             client_id=client_config['client_id'],
             client_secret=client_config['client_secret'],
-            scopes=scopes
+            scopes=scopes,
+            expiry=parse_token_expiry(item.get('tokenExpiry'))
         )
         
         # Check if token needs refresh
@@ -173,9 +340,10 @@ def get_user_gmail_service(user_id: str):
                 # Update the new access token in DynamoDB
                 table.update_item(
                     Key={'userId': user_id, 'provider': 'gmail'},
-                    UpdateExpression='SET accessToken = :token, updatedAt = :updated',
+                    UpdateExpression='SET accessToken = :token, tokenExpiry = :expiry, updatedAt = :updated',
                     ExpressionAttributeValues={
                         ':token': credentials.token,
+                        ':expiry': credentials.expiry.isoformat() if credentials.expiry else None,
                         ':updated': datetime.utcnow().isoformat()
                     }
                 )
@@ -186,6 +354,7 @@ def get_user_gmail_service(user_id: str):
                 # Check for invalid_grant error
                 if 'invalid_grant' in str(refresh_error):
                     logger.error("Refresh token is invalid or revoked. User needs to re-authenticate.")
+                    evict_gmail_service(user_id)
                     
                     # Delete the invalid credentials from DynamoDB
                     try:
@@ -202,8 +371,19 @@ def get_user_gmail_service(user_id: str):
                     # Re-raise other errors
                     raise refresh_error
         
-        # Build and return Gmail service
-        return build('gmail', 'v1', credentials=credentials)
+        # Build Gmail service from the discovery document bundled with googleapiclient
+        # (no runtime fetch of the discovery document) and cache it for warm invocations
+        service = build('gmail', 'v1', credentials=credentials, static_discovery=True, cache_discovery=False,
+                        client_options={'api_endpoint': GMAIL_API_ENDPOINT} if GMAIL_API_ENDPOINT else None)
+        
+        with _cache_lock:
+            _gmail_service_cache[user_id] = {
+                'service': service,
+                'credentials': credentials,
+                'refresh_token': item.get('refreshToken')
+            }
+        
+        return service, credentials
         
     except Exception as e:
         logger.error(f"Error getting Gmail service: {str(e)}")
@@ -214,6 +394,11 @@ def get_user_gmail_service(user_id: str):
         
         raise
 
+def get_user_gmail_service(user_id: str, connection: Dict = None):
+    """Get Gmail service for a specific user (see get_user_gmail_client)"""
+    return get_user_gmail_client(user_id, connection)[0]
+
+@flush_logs(debug_logger)
 def lambda_handler(event, context):
     """
     Gmail action handler for Bedrock agent
@@ -222,6 +407,10 @@ def lambda_handler(event, context):
         # Log the incoming event
         debug_logger.debug("Received event", {"event": event})
         
+        # Scheduled (EventBridge) or direct invocation of the Knowledge Base sync, not a Bedrock action
+        if event.get('source') == 'aws.events' or event.get('action') == 'sync-knowledge-base':
+            return sync_knowledge_base(event)
+        
         # Extract the API path from the event
         api_path = event.get('apiPath', '')
         debug_logger.debug("API path", {"api_path": api_path})
@@ -248,6 +437,7 @@ def lambda_handler(event, context):
         # If not authenticated, return auth required response
         if not gmail_connection:
             debug_logger.error("Gmail not authenticated", {"user_id": user_id, "session_id": session_id})
+            evict_gmail_service(user_id)
             return {
                 "messageVersion": "1.0",
                 "response": {
@@ -279,13 +469,29 @@ def lambda_handler(event, context):
             request_body = event['requestBody']['content']['application/json']
             debug_logger.debug("Request body", {"request_body": request_body})
         
+        # Read/draft/send parse the whole Bedrock requestBody ({'content': {'application/json': ...}})
+        full_request_body = event.get('requestBody') or {}
+        
+        # Query/path parameters (GET routes)
+        parameters = {p.get('name'): p.get('value') for p in event.get('parameters') or []}
+        
         # Route the request based on the API path
         if api_path == '/check-emails':
-            return handle_get_email_stats(user_id)  # Use real Gmail stats instead of mock
+            return handle_get_email_stats(user_id, gmail_connection, parameters.get('labels'), api_path)
         elif api_path == '/search-emails':
-            return handle_search_emails(user_id, request_body)  # Use REAL Gmail search
+            return handle_search_emails(user_id, request_body, gmail_connection)  # Use REAL Gmail search
         elif api_path == '/send-email':
-            return handle_send_email(user_id, request_body)  # Use REAL Gmail send
+            return handle_send_email(user_id, full_request_body, gmail_connection)  # Use REAL Gmail send
+        elif api_path == '/read-email':
+            return handle_read_email(user_id, full_request_body, gmail_connection)
+        elif api_path == '/draft-email':
+            return handle_draft_email(user_id, full_request_body, gmail_connection)
+        elif api_path == '/list-labels':
+            return handle_list_labels(user_id, gmail_connection)
+        elif api_path == '/get-email-stats':
+            return handle_get_email_stats(user_id, gmail_connection, parameters.get('labels'), api_path)
+        elif api_path == '/export-attachment':
+            return handle_export_attachment(user_id, full_request_body, gmail_connection)
         else:
             debug_logger.error("Unknown API path", {"api_path": api_path})
             return {
@@ -671,23 +877,23 @@ def send_email(request_body, session_id, user_id, gmail_connection):
             }
         }
 
-def handle_search_emails(user_id: str, request_body: Dict) -> Dict:
+def handle_search_emails(user_id: str, request_body: Dict, connection: Dict = None) -> Dict:
     """Search emails based on query"""
     try:
-        service = get_user_gmail_service(user_id)
+        service, credentials = get_user_gmail_client(user_id, connection)
         # Parse request
         json_content = {}
         
-        logger.info(f"[DEBUG] Raw request_body: {json.dumps(request_body)}")
+        debug_logger.debug("Raw request_body", lambda: {'request_body': request_body})
         
         # Check if properties are directly in request_body (Bedrock sends it this way)
         if 'properties' in request_body and isinstance(request_body['properties'], list):
             try:
                 props_list = request_body['properties']
-                logger.info(f"[DEBUG] Found properties list in request_body: {json.dumps(props_list)}")
+                debug_logger.debug("Found properties list in request_body", lambda: {'props_list': props_list})
                 # convert list of {name,value} into dict
                 json_content = {p['name']: p.get('value') for p in props_list if isinstance(p, dict) and 'name' in p}
-                logger.info(f"[DEBUG] Converted properties to dict: {json.dumps(json_content)}")
+                debug_logger.debug("Converted properties to dict", lambda: {'json_content': json_content})
             except Exception as ex:
                 logger.warning(f"Failed to parse properties list: {str(ex)}")
         
@@ -695,79 +901,89 @@ def handle_search_emails(user_id: str, request_body: Dict) -> Dict:
         if not json_content:
             # Fallback to check nested content structure
             content = request_body.get('content', {})
-            logger.info(f"[DEBUG] Content type: {type(content)}, Content: {json.dumps(content) if isinstance(content, dict) else str(content)}")
+            debug_logger.debug("Request content", lambda: {'content_type': type(content).__name__, 'content': content})
             
             if isinstance(content, dict):
                 app_json = content.get('application/json', {})
-                logger.info(f"[DEBUG] app_json: {json.dumps(app_json)}")
+                debug_logger.debug("app_json", lambda: {'app_json': app_json})
                 
                 # Check if properties in app_json
                 if 'properties' in app_json and isinstance(app_json['properties'], list):
                     try:
                         props_list = app_json['properties']
-                        logger.info(f"[DEBUG] Found properties list in app_json: {json.dumps(props_list)}")
+                        debug_logger.debug("Found properties list in app_json", lambda: {'props_list': props_list})
                         # convert list of {name,value} into dict
                         json_content = {p['name']: p.get('value') for p in props_list if isinstance(p, dict) and 'name' in p}
-                        logger.info(f"[DEBUG] Converted properties to dict: {json.dumps(json_content)}")
+                        debug_logger.debug("Converted properties to dict", lambda: {'json_content': json_content})
                     except Exception as ex:
                         logger.warning(f"Failed to parse properties list: {str(ex)}")
                 else:
                     # Fallback to direct JSON content
                     json_content = app_json
-                    logger.info(f"[DEBUG] Using direct json_content: {json.dumps(json_content)}")
+                    debug_logger.debug("Using direct json_content", lambda: {'json_content': json_content})
         
         # json_content now has our parsed data
         query = (json_content.get('query') or '').strip()
-        max_results = int(json_content.get('maxResults', 10))
+        try:
+            max_results = max(1, min(int(json_content.get('maxResults', 10)), GMAIL_SEARCH_MAX_PAGE_SIZE))
+        except (ValueError, TypeError):
+            return create_response(400, {'error': 'maxResults must be an integer'}, '/search-emails', 'POST')
+        cursor = json_content.get('cursor') or None
         
-        logger.info(f"[DEBUG] Final parsed query: '{query}', max_results: {max_results}")
-
-        if not query:
+        logger.info(f"[DEBUG] Final parsed query: '{query}', max_results: {max_results}, cursor: {cursor}")
+        
+        if cursor:
+            try:
+                position = decode_search_cursor(cursor)
+            except ValueError:
+                return create_response(400, {'error': 'Invalid cursor'}, '/search-emails', 'POST')
+        elif query:
+            position = {'q': query, 'pageToken': None, 'offset': 0, 'size': max_results}
+        else:
             logger.error("[DEBUG] Query is empty after parsing!")
             return create_response(400, {'error': 'Query is required'}, '/search-emails', 'POST')
         
-        logger.info(f"Searching emails with query: {query}")
+        logger.info(f"Searching emails with query: {position['q']}")
         
-        # Search emails
-        results = service.users().messages().list(
-            userId='me',
-            q=query,
-            maxResults=max_results
-        ).execute()
+        page = take_search_prefetch(user_id, cursor) if cursor else None
+        if page is None:
+            page = fetch_search_page(user_id, service, position['q'], position['pageToken'], position['size'])
         
-        messages = results.get('messages', [])
+        # Add results until the response would exceed the byte budget (always at least one). The body
+        # is sent as a JSON string inside the Bedrock envelope, so sizes are of the escaped JSON.
         email_data = []
-        
-        # Fetch details for each message
-        for msg in messages:
-            try:
-                message = service.users().messages().get(
-                    userId='me',
-                    id=msg['id'],
-                    format='metadata'
-                ).execute()
-                
-                # Extract email data
-                headers = message['payload'].get('headers', [])
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                from_email = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
-                date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
-                
-                email_data.append({
-                    'id': msg['id'],
-                    'subject': subject,
-                    'from': from_email,
-                    'date': date,
-                    'snippet': message.get('snippet', '')
-                })
-                
-            except Exception as e:
-                logger.error(f"Error fetching message {msg['id']}: {str(e)}")
-        
-        return create_response(200, {
+        size = 512 + len(json.dumps(json.dumps({'emails': [], 'totalResults': 0, 'nextCursor': 'x' * 200,
+                                                'resultSizeEstimate': 0})))
+        remaining = [msg_id for msg_id in page['ids'][position['offset']:] if msg_id in page['emails']]
+        for msg_id in remaining:
+            email = page['emails'][msg_id]
+            email_size = len(json.dumps(json.dumps(email))) + 2
+            if email_data and size + email_size > GMAIL_SEARCH_RESPONSE_BYTES:
+                break
+            email_data.append(email)
+            size += email_size
+        
+        # Continue inside this Gmail page if the budget cut it short, otherwise from the next one
+        next_position, next_page = None, None
+        if len(email_data) < len(remaining):
+            next_position = {**position, 'offset': page['ids'].index(email_data[-1]['id']) + 1}
+            next_page = page
+        elif page.get('nextPageToken'):
+            next_position = {**position, 'pageToken': page['nextPageToken'], 'offset': 0}
+        
+        response_body = {
             'emails': email_data,
-            'totalResults': len(email_data)
-        }, '/search-emails', 'POST')
+            'totalResults': len(email_data),
+            'resultSizeEstimate': page.get('resultSizeEstimate', 0)
+        }
+        if next_position:
+            next_cursor = encode_search_cursor(next_position)
+            response_body['nextCursor'] = next_cursor
+            # Fetching the next Gmail page ahead costs quota, so only do it once the agent is walking pages
+            if next_page is not None or cursor:
+                start_search_prefetch(user_id, service, credentials, next_cursor, next_position, next_page)
+        
+        return create_response(200, response_body, '/search-emails', 'POST')
         
     except Exception as e:
         logger.error(f"Error searching emails: {str(e)}")
@@ -782,34 +998,284 @@ def handle_search_emails(user_id: str, request_body: Dict) -> Dict:
         
         return create_response(500, {'error': str(e)}, '/search-emails', 'POST')
 
-def handle_read_email(user_id: str, request_body: Dict) -> Dict:
+def encode_search_cursor(position: Dict) -> str:
+    """Opaque continuation cursor: the query, Gmail page token, offset into that page and page size"""
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+def decode_search_cursor(cursor: str) -> Dict:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(position, dict) or not position.get('q'):
+            raise ValueError(cursor)
+        return {'q': position['q'], 'pageToken': position.get('pageToken'),
+                'offset': max(0, int(position.get('offset', 0))),
+                'size': max(1, min(int(position.get('size', 10)), GMAIL_SEARCH_MAX_PAGE_SIZE))}
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid search cursor: {str(e)}")
+
+def fetch_search_page(user_id: str, service, query: str, page_token: Optional[str], size: int,
+                      http=None) -> Dict:
+    """One messages().list page and the id/subject/from/date/snippet of each result.
+    
+    Headers come from the message cache where possible, the rest from one
+    metadata batch. Pass `http` when calling off the request thread.
+    """
+    results = service.users().messages().list(
+        userId='me',
+        q=query,
+        maxResults=size,
+        pageToken=page_token
+    ).execute(http=http)
+    ids = [msg['id'] for msg in results.get('messages', [])]
+    
+    emails = {}
+    missing = []
+    for msg_id in ids:
+        cached = message_cache.peek(message_cache_key(user_id, msg_id))
+        if cached is not None:
+            emails[msg_id] = {key: cached[key] for key in ('id', 'subject', 'from', 'date', 'snippet')}
+        else:
+            missing.append(msg_id)
+    
+    for msg_id, message in fetch_message_metadata(service, missing, http=http).items():
+        headers = message.get('payload', {}).get('headers', [])
+        emails[msg_id] = {
+            'id': msg_id,
+            'subject': next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject'),
+            'from': next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown'),
+            'date': next((h['value'] for h in headers if h['name'] == 'Date'), ''),
+            'snippet': message.get('snippet', '')
+        }
+    
+    return {
+        'ids': ids,
+        'emails': emails,
+        'nextPageToken': results.get('nextPageToken'),
+        'resultSizeEstimate': results.get('resultSizeEstimate', 0)
+    }
+
+def start_search_prefetch(user_id: str, service, credentials, cursor: str, position: Dict,
+                          page: Optional[Dict] = None):
+    """Have the page for `cursor` ready for the next call while the agent works on this one.
+    
+    A cursor inside the current Gmail page reuses that `page`; otherwise the
+    next page is fetched on a background thread over its own connection
+    (httplib2 is not thread-safe). Lambda may freeze the container before it
+    finishes; the fetch then completes, or fails and is redone, on the next
+    invocation.
+    """
+    if page is not None:
+        future = Future()
+        future.set_result(page)
+    else:
+        try:
+            http = gmail_http(credentials)
+        except Exception as e:
+            logger.warning(f"[PREFETCH] Not prefetching search page: {str(e)}")
+            return
+        future = prefetch(fetch_search_page, user_id, service, position['q'], position['pageToken'],
+                          position['size'], http=http)
+    with _cache_lock:
+        _search_prefetch[(user_id, cursor)] = future
+        while len(_search_prefetch) > GMAIL_SEARCH_PREFETCH_MAX:
+            _search_prefetch.popitem(last=False)
+
+def take_search_prefetch(user_id: str, cursor: str) -> Optional[Dict]:
+    """The prefetched page for `cursor`, or None if there is none or it failed"""
+    with _cache_lock:
+        future = _search_prefetch.pop((user_id, cursor), None)
+    if future is None:
+        return None
+    try:
+        return future.result()
+    except Exception:
+        return None  # already logged by prefetch(); fetch it on this request instead
+
+def gmail_api_url(path: str) -> str:
+    """Gmail REST URL for `path` (e.g. 'gmail/v1/users/me/profile'), honouring GMAIL_API_ENDPOINT"""
+    return (GMAIL_API_ENDPOINT or 'https://gmail.googleapis.com').rstrip('/') + '/' + path
+
+def gmail_http(credentials):
+    """A new authorized HTTP connection with a user's Gmail credentials (see get_user_gmail_client)"""
+    import google_auth_httplib2
+    import httplib2
+    
+    return google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=30))
+
+def fetch_message_metadata(service, message_ids: List[str], http=None) -> Dict[str, Dict]:
+    """Fetch Subject/From/Date metadata for many messages via the Gmail batch endpoint"""
+    return batch_get_messages(service, message_ids, http=http, format='metadata', metadataHeaders=METADATA_HEADERS,
+                              fields='id,snippet,payload/headers')
+
+def batch_get_messages(service, message_ids: List[str], http=None, **get_kwargs) -> Dict[str, Dict]:
+    """messages().get(**get_kwargs) for many messages via the Gmail batch endpoint.
+    
+    Sub-requests are sent in batches of at most GMAIL_BATCH_MAX_CONCURRENCY.
+    Failures are per message: a failed message is logged and left out of the
+    result so one bad message (or one bad batch) never fails the whole call.
+    """
+    from googleapiclient.http import BatchHttpRequest
+    
+    results = {}
+    
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            logger.error(f"Error fetching message {request_id}: {str(exception)}")
+            return
+        results[request_id] = response
+    
+    # Batch request ids must be unique
+    unique_ids = list(dict.fromkeys(message_ids))
+    
+    for start in range(0, len(unique_ids), GMAIL_BATCH_MAX_CONCURRENCY):
+        chunk = unique_ids[start:start + GMAIL_BATCH_MAX_CONCURRENCY]
+        batch = BatchHttpRequest(callback=on_response, batch_uri=GMAIL_BATCH_URI)
+        
+        for message_id in chunk:
+            batch.add(
+                service.users().messages().get(userId='me', id=message_id, **get_kwargs),
+                request_id=message_id
+            )
+        
+        try:
+            batch.execute(http=http)
+        except Exception as e:
+            logger.error(f"Error executing Gmail batch of {len(chunk)} messages: {str(e)}")
+    
+    return results
+
+def message_cache_key(user_id: str, message_id: str) -> str:
+    return f"gmail/{user_id}/{message_id}"
+
+def parse_message(message: Dict) -> Dict:
+    """Cacheable view of a messages().get(format='full') response"""
+    payload = message.get('payload', {})
+    headers = {h['name']: h['value'] for h in payload.get('headers', [])}
+    return {
+        'id': message['id'],
+        'threadId': message.get('threadId'),
+        'subject': headers.get('Subject', 'No Subject'),
+        'from': headers.get('From', 'Unknown'),
+        'to': headers.get('To', 'Unknown'),
+        'date': headers.get('Date', ''),
+        'snippet': message.get('snippet', ''),
+        'body': extract_email_body(payload),
+        'attachments': extract_attachments(payload),
+        'labels': message.get('labelIds', [])
+    }
+
+def get_cached_message(user_id: str, service, message_id: str) -> Dict:
+    """Parsed message from the message cache, fetched with format='full' on a miss.
+    
+    Entries record the history watermark they were fetched under. An entry from
+    the shared tier that predates the point this container's history checks
+    start from is checked against history since its own watermark, then
+    re-stored under the current one.
+    """
+    refresh_message_cache(user_id, service)
+    key = message_cache_key(user_id, message_id)
+    
+    def fetch():
+        with _cache_lock:
+            synced = _message_cache_sync[user_id]['history_id']
+        message = service.users().messages().get(userId='me', id=message_id, format='full').execute()
+        return {**parse_message(message), 'syncedHistoryId': synced}
+    
+    entry = message_cache.get_or_fetch(key, GMAIL_MESSAGE_CACHE_TTL_SECONDS, fetch)
+    with _cache_lock:
+        state = dict(_message_cache_sync[user_id])
+    if int(entry['syncedHistoryId']) >= int(state['floor']):
+        return entry
+    
+    changed, _ = list_changed_message_ids(service, str(entry['syncedHistoryId']))
+    message_cache.invalidate_many(message_cache_key(user_id, changed_id) for changed_id in changed or [])
+    if changed is None or message_id in changed:
+        message_cache.invalidate(key)
+        return message_cache.get_or_fetch(key, GMAIL_MESSAGE_CACHE_TTL_SECONDS, fetch)
+    entry = {**entry, 'syncedHistoryId': state['history_id']}
+    message_cache.put(key, entry, GMAIL_MESSAGE_CACHE_TTL_SECONDS)
+    return entry
+
+def refresh_message_cache(user_id: str, service, force: bool = False):
+    """Invalidate a user's cached messages changed since the last check (at most every CHECK_SECONDS)"""
+    with _cache_lock:
+        state = _message_cache_sync.get(user_id)
+        if state and not force and time.time() - state['checked_at'] < GMAIL_MESSAGE_CACHE_CHECK_SECONDS:
+            return
+    
+    changed, history_id = (None, None)
+    if state:
+        changed, history_id = list_changed_message_ids(service, str(state['history_id']))
+    if changed is None:
+        # First use in this container, or the watermark expired: checks start over from the
+        # mailbox's current historyId, and older entries are validated when they are read
+        history_id = service.users().getProfile(userId='me', fields='historyId').execute()['historyId']
+        if state:
+            # Only this user's entries; other users' watermarks are unaffected
+            message_cache.lru.delete_prefix(message_cache_key(user_id, ''))
+    
+    message_cache.invalidate_many(message_cache_key(user_id, message_id) for message_id in changed or [])
+    
+    with _cache_lock:
+        floor = state['floor'] if changed is not None else history_id
+        _message_cache_sync[user_id] = {'history_id': history_id, 'checked_at': time.time(), 'floor': floor}
+    if changed:
+        debug_logger.debug("Message cache invalidated", {'user_id': user_id, 'messages': len(changed)})
+
+def list_changed_message_ids(service, start_history_id: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Ids of messages relabelled or deleted since start_history_id, and the mailbox historyId.
+    
+    Returns (None, None) if start_history_id has expired (HTTP 404).
+    """
+    from googleapiclient.errors import HttpError
+    
+    changed = set()
+    page_token = None
+    while True:
+        try:
+            response = service.users().history().list(
+                userId='me', startHistoryId=start_history_id, pageToken=page_token, maxResults=500,
+                historyTypes=['labelAdded', 'labelRemoved', 'messageDeleted']
+            ).execute()
+        except HttpError as e:
+            if e.resp.status == 404:
+                return None, None
+            raise
+        for record in response.get('history', []):
+            for change in ('labelsAdded', 'labelsRemoved', 'messagesDeleted'):
+                changed.update(c['message']['id'] for c in record.get(change, []) if 'message' in c)
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return sorted(changed), response.get('historyId', start_history_id)
+
+def handle_read_email(user_id: str, request_body: Dict, connection: Dict = None) -> Dict:
     """Read a specific email"""
     try:
-        service = get_user_gmail_service(user_id)
+        service = get_user_gmail_service(user_id, connection)
         content = request_body.get('content', {})
         json_content = {}
         
-        logger.info(f"[DEBUG] Raw request_body: {json.dumps(request_body)}")
-        logger.info(f"[DEBUG] Content type: {type(content)}, Content: {json.dumps(content) if isinstance(content, dict) else str(content)}")
+        debug_logger.debug("Raw request_body", lambda: {'request_body': request_body})
+        debug_logger.debug("Request content", lambda: {'content_type': type(content).__name__, 'content': content})
         
         if isinstance(content, dict):
             app_json = content.get('application/json', {})
-            logger.info(f"[DEBUG] app_json: {json.dumps(app_json)}")
+            debug_logger.debug("app_json", lambda: {'app_json': app_json})
             
             # Bedrock Agent sends parameters as list under "properties"
             if 'properties' in app_json and isinstance(app_json['properties'], list):
                 try:
                     props_list = app_json['properties']
-                    logger.info(f"[DEBUG] Found properties list: {json.dumps(props_list)}")
+                    debug_logger.debug("Found properties list", lambda: {'props_list': props_list})
                     # convert list of {name,value} into dict
                     json_content = {p['name']: p.get('value') for p in props_list if isinstance(p, dict) and 'name' in p}
-                    logger.info(f"[DEBUG] Converted properties to dict: {json.dumps(json_content)}")
+                    debug_logger.debug("Converted properties to dict", lambda: {'json_content': json_content})
                 except Exception as ex:
                     logger.warning(f"Failed to parse properties list: {str(ex)}")
             else:
                 # Fallback to direct JSON content
                 json_content = app_json
-                logger.info(f"[DEBUG] Using direct json_content: {json.dumps(json_content)}")
+                debug_logger.debug("Using direct json_content", lambda: {'json_content': json_content})
         
         email_id = json_content.get('emailId', '')
         logger.info(f"[DEBUG] Final parsed emailId: '{email_id}'")
@@ -820,38 +1286,31 @@ def handle_read_email(user_id: str, request_body: Dict) -> Dict:
         
         logger.info(f"Reading email with ID: {email_id}")
         
-        message = service.users().messages().get(userId='me', id=email_id, format='full').execute()
-        headers = message['payload'].get('headers', [])
-        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-        from_email = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
-        to_email = next((h['value'] for h in headers if h['name'] == 'To'), 'Unknown')
-        date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
-        body = extract_email_body(message['payload'])
-        attachments = extract_attachments(message['payload'])
+        message = get_cached_message(user_id, service, email_id)
         
         return create_response(200, {
             'id': email_id,
-            'subject': subject,
-            'from': from_email,
-            'to': to_email,
-            'date': date,
-            'body': body,
-            'attachments': attachments,
-            'labels': message.get('labelIds', [])
+            'subject': message['subject'],
+            'from': message['from'],
+            'to': message['to'],
+            'date': message['date'],
+            'body': message['body'],
+            'attachments': message['attachments'],
+            'labels': message['labels']
         }, '/read-email', 'POST')
         
     except Exception as e:
         logger.error(f"Error reading email: {str(e)}")
         return create_response(500, {'error': str(e)}, '/read-email', 'POST')
 
-def handle_draft_email(user_id: str, request_body: Dict) -> Dict:
+def handle_draft_email(user_id: str, request_body: Dict, connection: Dict = None) -> Dict:
     """Create an email draft"""
     try:
-        service = get_user_gmail_service(user_id)
+        service = get_user_gmail_service(user_id, connection)
         content = request_body.get('content', {})
         json_content = {}
         
-        logger.info(f"[DEBUG] Raw request_body: {json.dumps(request_body)}")
+        debug_logger.debug("Raw request_body", lambda: {'request_body': request_body})
         
         if isinstance(content, dict):
             app_json = content.get('application/json', {})
@@ -861,7 +1320,7 @@ def handle_draft_email(user_id: str, request_body: Dict) -> Dict:
                 try:
                     props_list = app_json['properties']
                     json_content = {p['name']: p.get('value') for p in props_list if isinstance(p, dict) and 'name' in p}
-                    logger.info(f"[DEBUG] Converted properties to dict: {json.dumps(json_content)}")
+                    debug_logger.debug("Converted properties to dict", lambda: {'json_content': json_content})
                 except Exception as ex:
                     logger.warning(f"Failed to parse properties list: {str(ex)}")
             else:
@@ -877,6 +1336,9 @@ def handle_draft_email(user_id: str, request_body: Dict) -> Dict:
         if not to_email or not subject:
             return create_response(400, {'error': 'To and Subject are required'}, '/draft-email', 'POST')
         
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        
         message = MIMEMultipart()
         message['to'] = to_email
         message['subject'] = subject
@@ -900,14 +1362,14 @@ def handle_draft_email(user_id: str, request_body: Dict) -> Dict:
         logger.error(f"Error creating draft: {str(e)}")
         return create_response(500, {'error': str(e)}, '/draft-email', 'POST')
 
-def handle_send_email(user_id: str, request_body: Dict) -> Dict:
+def handle_send_email(user_id: str, request_body: Dict, connection: Dict = None) -> Dict:
     """Send an email (from draft or new)"""
     try:
-        service = get_user_gmail_service(user_id)
+        service = get_user_gmail_service(user_id, connection)
         content = request_body.get('content', {})
         json_content = {}
         
-        logger.info(f"[DEBUG] Raw request_body: {json.dumps(request_body)}")
+        debug_logger.debug("Raw request_body", lambda: {'request_body': request_body})
         
         if isinstance(content, dict):
             app_json = content.get('application/json', {})
@@ -917,7 +1379,7 @@ def handle_send_email(user_id: str, request_body: Dict) -> Dict:
                 try:
                     props_list = app_json['properties']
                     json_content = {p['name']: p.get('value') for p in props_list if isinstance(p, dict) and 'name' in p}
-                    logger.info(f"[DEBUG] Converted properties to dict: {json.dumps(json_content)}")
+                    debug_logger.debug("Converted properties to dict", lambda: {'json_content': json_content})
                 except Exception as ex:
                     logger.warning(f"Failed to parse properties list: {str(ex)}")
             else:
@@ -940,6 +1402,8 @@ def handle_send_email(user_id: str, request_body: Dict) -> Dict:
             if not to_email or not subject:
                 return create_response(400, {'error': 'To and Subject are required'}, '/send-email', 'POST')
             
+            from email.mime.text import MIMEText
+            
             message = MIMEText(body)
             message['to'] = to_email
             message['subject'] = subject
@@ -956,10 +1420,241 @@ def handle_send_email(user_id: str, request_body: Dict) -> Dict:
         logger.error(f"Error sending email: {str(e)}")
         return create_response(500, {'error': str(e)}, '/send-email', 'POST')
 
-def handle_list_labels(user_id: str) -> Dict:
+def handle_export_attachment(user_id: str, request_body: Dict, connection: Dict = None) -> Dict:
+    """Stream an email attachment into S3 and optionally hand it to a document pipeline"""
+    try:
+        service, credentials = get_user_gmail_client(user_id, connection)
+        app_json = request_body.get('content', {}).get('application/json', {})
+        if isinstance(app_json.get('properties'), list):
+            # Bedrock Agent sends parameters as list under "properties"
+            json_content = {p['name']: p.get('value') for p in app_json['properties']
+                            if isinstance(p, dict) and 'name' in p}
+        else:
+            json_content = app_json
+        
+        email_id = json_content.get('emailId', '')
+        pipeline = json_content.get('pipeline') or 'none'
+        if not email_id:
+            return create_response(400, {'error': 'Email ID is required'}, '/export-attachment', 'POST')
+        if pipeline not in ATTACHMENT_PIPELINES:
+            return create_response(400, {'error': f"pipeline must be one of {', '.join(ATTACHMENT_PIPELINES)}"},
+                                   '/export-attachment', 'POST')
+        
+        attachments = get_cached_message(user_id, service, email_id)['attachments']
+        if any('partId' not in a for a in attachments):
+            # Cached before part ids were recorded
+            message_cache.invalidate(message_cache_key(user_id, email_id))
+            attachments = get_cached_message(user_id, service, email_id)['attachments']
+        attachment = select_attachment(attachments, json_content.get('attachmentId'), json_content.get('filename'))
+        if attachment is None:
+            named = json_content.get('attachmentId') or json_content.get('filename')
+            return create_response(400 if len(attachments) > 1 and not named else 404, {
+                'error': 'Attachment not found' if named or not attachments
+                else 'The email has several attachments; name one by attachmentId or filename',
+                'attachments': [{'filename': a['filename'], 'attachmentId': a['attachmentId']} for a in attachments]
+            }, '/export-attachment', 'POST')
+        
+        key = attachment_s3_key(user_id, email_id, attachment)
+        size, exported = export_attachment(user_id, service, credentials, email_id, attachment,
+                                           GMAIL_ATTACHMENT_BUCKET, key)
+        logger.info(f"Attachment {attachment['filename']} of {email_id} in s3://{GMAIL_ATTACHMENT_BUCKET}/{key} "
+                    f"({size} bytes, {'exported' if exported else 'already exported'})")
+        
+        result = {
+            'emailId': email_id,
+            'filename': attachment['filename'],
+            'mimeType': attachment['mimeType'],
+            'size': size,
+            'bucket': GMAIL_ATTACHMENT_BUCKET,
+            'key': key,
+            'pipeline': pipeline
+        }
+        if pipeline == 'pdf-preprocessor':
+            result['documentId'] = start_pdf_preprocessing(
+                GMAIL_ATTACHMENT_BUCKET, key, f"gmail-{email_id}-{attachment['partId'] or 'attachment'}",
+                json_content.get('bankType') or 'unknown')
+        elif pipeline == 'legal':
+            result['analysis'] = analyze_contract_attachment(user_id, key, json_content.get('context') or '')
+        
+        return create_response(200, result, '/export-attachment', 'POST')
+        
+    except Exception as e:
+        logger.error(f"Error exporting attachment: {str(e)}")
+        return create_response(500, {'error': str(e)}, '/export-attachment', 'POST')
+
+def select_attachment(attachments: List[Dict], attachment_id: str = None, filename: str = None) -> Optional[Dict]:
+    """The requested attachment; with neither id nor filename, the message's only attachment"""
+    for attachment in attachments:
+        if attachment_id and attachment_id in (attachment['attachmentId'], attachment['partId']):
+            return attachment
+        if filename and not attachment_id and attachment['filename'] == filename:
+            return attachment
+    if not attachment_id and not filename and len(attachments) == 1:
+        return attachments[0]
+    return None
+
+def attachment_s3_key(user_id: str, email_id: str, attachment: Dict) -> str:
+    filename = re.sub(r'[^\w.\-]+', '_', attachment['filename']).strip('._') or 'attachment'
+    return f"email-attachments/{user_id}/{email_id}/{attachment['partId'] or '0'}-{filename}"
+
+def export_attachment(user_id: str, service, credentials, email_id: str, attachment: Dict, bucket: str,
+                      key: str) -> Tuple[int, bool]:
+    """Copy an attachment into s3://bucket/key. Returns (size, False if it was already there).
+    
+    Message content never changes in Gmail, so an object of the attachment's
+    size under the same key is reused rather than downloaded again.
+    """
+    try:
+        existing = s3_client.head_object(Bucket=bucket, Key=key)['ContentLength']
+    except Exception as e:
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') not in ('NoSuchKey', 'NotFound', '404'):
+            raise
+        existing = None
+    if existing is not None and existing == attachment['size']:
+        return existing, False
+    
+    content_type = attachment['mimeType'] or 'application/octet-stream'
+    if attachment['attachmentId']:
+        chunks = stream_attachment(credentials, email_id, attachment['attachmentId'])
+    else:
+        # Small attachments can come inline in the message part itself
+        message = service.users().messages().get(userId='me', id=email_id, format='full').execute()
+        part = find_message_part(message.get('payload', {}), attachment['partId'])
+        if part is None:
+            raise ValueError(f"Attachment part {attachment['partId']} not found in message {email_id}")
+        chunks = [base64.urlsafe_b64decode(part['body'].get('data', ''))]
+    return upload_stream_to_s3(chunks, bucket, key, content_type), True
+
+def find_message_part(payload: Dict, part_id: str) -> Optional[Dict]:
+    if payload.get('partId') == part_id:
+        return payload
+    for part in payload.get('parts', []):
+        found = find_message_part(part, part_id)
+        if found is not None:
+            return found
+    return None
+
+def stream_attachment(credentials, email_id: str, attachment_id: str) -> Iterator[bytes]:
+    """Decoded bytes of messages().attachments().get, as they arrive.
+    
+    The client library reads a whole response before parsing it (and the
+    base64 text is a third larger than the file), so the request is made
+    over a plain authorized session and the `data` field decoded in chunks.
+    """
+    from google.auth.transport.requests import AuthorizedSession
+    
+    url = gmail_api_url(f"gmail/v1/users/me/messages/{email_id}/attachments/{attachment_id}")
+    with AuthorizedSession(credentials) as session:
+        response = session.get(url, params={'fields': 'data'}, stream=True, timeout=30)
+        with response:
+            response.raise_for_status()
+            yield from iter_base64_field(response.iter_content(GMAIL_ATTACHMENT_READ_BYTES), 'data')
+
+def iter_base64_field(chunks: Iterable[bytes], field: str) -> Iterator[bytes]:
+    """Decode the base64url string `field` of a JSON object streamed in `chunks`.
+    
+    Decodes in multiples of 4 characters as the chunks arrive, so only one
+    chunk of the encoded text is held at a time.
+    """
+    start = re.compile(rb'"' + re.escape(field.encode()) + rb'"\s*:\s*"')
+    head, carry, in_value = b'', b'', False
+    for chunk in chunks:
+        if not in_value:
+            head += chunk
+            match = start.search(head)
+            if match is None:
+                if len(head) > 64 * 1024:
+                    raise ValueError(f"No '{field}' field at the start of the response")
+                continue
+            chunk, head, in_value = head[match.end():], b'', True
+        end = chunk.find(b'"')
+        encoded = carry + (chunk if end < 0 else chunk[:end])
+        whole = len(encoded) - len(encoded) % 4
+        if whole:
+            yield base64.urlsafe_b64decode(encoded[:whole])
+        carry = encoded[whole:]
+        if end >= 0:
+            if carry:
+                yield base64.urlsafe_b64decode(carry + b'=' * (-len(carry) % 4))
+            return
+    raise ValueError(f"Response ended inside the '{field}' field" if in_value else f"No '{field}' field in the response")
+
+def upload_stream_to_s3(chunks: Iterable[bytes], bucket: str, key: str, content_type: str) -> int:
+    """Write a byte stream to S3 and return its size.
+    
+    A stream that fits in one part is a single put_object. Larger ones are a
+    multipart upload with up to GMAIL_ATTACHMENT_UPLOAD_CONCURRENCY parts in
+    flight while the next part fills; the upload is aborted if anything fails.
+    """
+    buffer = bytearray()
+    size, upload_id, parts, in_flight = 0, None, [], []
+    
+    def upload_part(part_number: int, body: bytes) -> Dict:
+        response = s3_client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number,
+                                         Body=body)
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+    
+    try:
+        with ThreadPoolExecutor(max_workers=GMAIL_ATTACHMENT_UPLOAD_CONCURRENCY) as executor:
+            def submit(body: bytes):
+                if len(in_flight) >= GMAIL_ATTACHMENT_UPLOAD_CONCURRENCY:
+                    parts.append(in_flight.pop(0).result())
+                in_flight.append(executor.submit(upload_part, len(parts) + len(in_flight) + 1, body))
+            
+            for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= GMAIL_ATTACHMENT_PART_BYTES:
+                    if upload_id is None:
+                        upload_id = s3_client.create_multipart_upload(
+                            Bucket=bucket, Key=key, ContentType=content_type)['UploadId']
+                    submit(bytes(buffer[:GMAIL_ATTACHMENT_PART_BYTES]))
+                    del buffer[:GMAIL_ATTACHMENT_PART_BYTES]
+            
+            if upload_id is None:
+                s3_client.put_object(Bucket=bucket, Key=key, Body=bytes(buffer), ContentType=content_type)
+                return size
+            if buffer:
+                submit(bytes(buffer))
+            parts.extend(future.result() for future in in_flight)
+        
+        s3_client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                            MultipartUpload={'Parts': parts})
+        return size
+    except Exception:
+        if upload_id is not None:
+            try:
+                s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            except Exception as e:
+                logger.warning(f"Could not abort multipart upload of s3://{bucket}/{key}: {str(e)}")
+        raise
+
+def start_pdf_preprocessing(bucket: str, key: str, document_id: str, bank_type: str) -> str:
+    """Queue the PDF for pdf-preprocessor (asynchronous invoke); returns its documentId"""
+    lambda_client.invoke(FunctionName=PDF_PREPROCESSOR_FUNCTION, InvocationType='Event', Payload=json.dumps({
+        'bucket': bucket, 'key': key, 'documentId': document_id, 'bankType': bank_type}))
+    return document_id
+
+def analyze_contract_attachment(user_id: str, key: str, context: str) -> Dict:
+    """Contract analysis from legal-action-handler, which reads the user's export from GMAIL_ATTACHMENT_BUCKET"""
+    response = lambda_client.invoke(FunctionName=LEGAL_ACTION_FUNCTION, Payload=json.dumps({
+        'actionGroup': 'GmailActions', 'apiPath': '/analyze-contract', 'httpMethod': 'POST',
+        'sessionAttributes': {'userId': user_id},
+        'requestBody': {'content': {'application/json': {'body': json.dumps({
+            'contractS3Key': key, 'context': context})}}}
+    }))
+    result = json.loads(response['Payload'].read())
+    if response.get('FunctionError'):
+        raise RuntimeError(f"{LEGAL_ACTION_FUNCTION} failed: {result.get('errorMessage', result)}")
+    analysis = json.loads(result['response']['responseBody']['application/json']['body'])
+    if result['response'].get('httpStatusCode') != 200:
+        raise RuntimeError(f"{LEGAL_ACTION_FUNCTION} failed: {'; '.join(analysis.get('risks', []))}")
+    return analysis
+
+def handle_list_labels(user_id: str, connection: Dict = None) -> Dict:
     """List Gmail labels"""
     try:
-        service = get_user_gmail_service(user_id)
+        service = get_user_gmail_service(user_id, connection)
         results = service.users().labels().list(userId='me').execute()
         labels = results.get('labels', [])
         
@@ -971,21 +1666,103 @@ def handle_list_labels(user_id: str) -> Dict:
         logger.error(f"Error listing labels: {str(e)}")
         return create_response(500, {'error': str(e)}, '/list-labels', 'GET')
 
-def handle_get_email_stats(user_id: str) -> Dict:
-    """Get email statistics"""
+def parse_label_ids(labels: Union[str, List[str], None]) -> List[str]:
+    """Label ids from a comma-separated string or list; system labels are matched case-insensitively"""
+    if not labels:
+        return list(DEFAULT_STATS_LABELS)
+    if isinstance(labels, str):
+        labels = labels.split(',')
+    label_ids = []
+    for label in labels:
+        label = str(label).strip()
+        if label.upper() in GMAIL_SYSTEM_LABELS:
+            label = label.upper()
+        if label and label not in label_ids:
+            label_ids.append(label)
+    return label_ids or list(DEFAULT_STATS_LABELS)
+
+def fetch_label_counts(service, label_ids: List[str], include_profile: bool = False) -> Tuple[Dict[str, Dict], Optional[str]]:
+    """labels().get for every label (and optionally getProfile) in one batch round trip.
+    
+    Returns ({labelId: counts}, historyId or None). A label that fails is logged
+    and left out; if every sub-request fails the first error is raised.
+    """
+    from googleapiclient.http import BatchHttpRequest
+    
+    counts = {}
+    profile = {}
+    errors = []
+    
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            logger.error(f"Error fetching Gmail {request_id}: {str(exception)}")
+            errors.append(exception)
+        elif request_id == 'profile':
+            profile.update(response)
+        else:
+            counts[response.get('id', request_id[len('label:'):])] = {
+                key: response.get(key, 0) for key in ('messagesTotal', 'messagesUnread', 'threadsTotal', 'threadsUnread')
+            }
+    
+    batch = BatchHttpRequest(callback=on_response, batch_uri=GMAIL_BATCH_URI)
+    if include_profile:
+        batch.add(service.users().getProfile(userId='me', fields='historyId'), request_id='profile')
+    for label_id in label_ids:
+        batch.add(service.users().labels().get(userId='me', id=label_id), request_id=f"label:{label_id}")
+    batch.execute()
+    
+    if errors and not counts and not profile:
+        raise errors[0]
+    return counts, profile.get('historyId')
+
+def get_label_stats(user_id: str, service, label_ids: List[str]) -> Tuple[Dict[str, Dict], Optional[str]]:
+    """Counts for label_ids, served from the per-user cache while the mailbox historyId is unchanged.
+    
+    With a cached entry this costs one getProfile call (plus one batch for any
+    label not cached at that historyId); without one, a single batch fetches the
+    counts and the historyId together.
+    """
+    with _cache_lock:
+        cached = _label_stats_cache.get(user_id)
+    
+    history_id = None
+    known = {}
+    if cached:
+        history_id = service.users().getProfile(userId='me', fields='historyId').execute().get('historyId')
+        if history_id == cached['history_id']:
+            known = cached['labels']
+    
+    missing = [label_id for label_id in label_ids if label_id not in known]
+    if missing:
+        fetched, profile_history_id = fetch_label_counts(service, missing, include_profile=history_id is None)
+        history_id = history_id or profile_history_id
+        known = {**known, **fetched}
+        if history_id:
+            with _cache_lock:
+                _label_stats_cache[user_id] = {'history_id': history_id, 'labels': known}
+    
+    debug_logger.debug("Label stats", {'user_id': user_id, 'fetched': missing, 'history_id': history_id})
+    return {label_id: known[label_id] for label_id in label_ids if label_id in known}, history_id
+
+def handle_get_email_stats(user_id: str, connection: Dict = None, labels: Union[str, List[str]] = None,
+                           api_path: str = '/get-email-stats') -> Dict:
+    """Get email statistics
+    
+    Counts come from labels().get (exact, unlike messages().list's resultSizeEstimate)
+    for the requested labels, by default INBOX, SENT and UNREAD. `stats` keeps the
+    lower-cased label -> messagesTotal summary; `labels` has the full counts.
+    """
     try:
-        service = get_user_gmail_service(user_id)
-        inbox = service.users().messages().list(userId='me', labelIds=['INBOX']).execute()
-        sent = service.users().messages().list(userId='me', labelIds=['SENT']).execute()
-        unread = service.users().messages().list(userId='me', labelIds=['UNREAD']).execute()
+        service = get_user_gmail_service(user_id, connection)
+        label_ids = parse_label_ids(labels)
+        counts, history_id = get_label_stats(user_id, service, label_ids)
         
         return create_response(200, {
-            'stats': {
-                'inbox': inbox.get('resultSizeEstimate', 0),
-                'sent': sent.get('resultSizeEstimate', 0),
-                'unread': unread.get('resultSizeEstimate', 0)
-            }
-        }, '/get-email-stats', 'GET')
+            'stats': {label_id.lower(): counts[label_id]['messagesTotal'] for label_id in counts},
+            'labels': counts,
+            'missingLabels': [label_id for label_id in label_ids if label_id not in counts],
+            'historyId': history_id
+        }, api_path, 'GET')
         
     except Exception as e:
         logger.error(f"Error getting email stats: {str(e)}")
@@ -996,9 +1773,9 @@ def handle_get_email_stats(user_id: str) -> Dict:
                 'error': 'Gmail authentication required',
                 'code': 'GMAIL_AUTH_REQUIRED',
                 'message': 'Please reconnect your Gmail account'
-            }, '/get-email-stats', 'GET')
+            }, api_path, 'GET')
         
-        return create_response(500, {'error': str(e)}, '/get-email-stats', 'GET')
+        return create_response(500, {'error': str(e)}, api_path, 'GET')
 
 def extract_email_body(payload: Dict) -> str:
     """Extract body from email payload"""
@@ -1030,7 +1807,9 @@ def extract_attachments(payload: Dict) -> List[Dict]:
                 attachments.append({
                     'filename': filename,
                     'mimeType': part.get('mimeType', ''),
-                    'size': part['body'].get('size', 0)
+                    'size': part['body'].get('size', 0),
+                    'partId': part.get('partId', ''),
+                    'attachmentId': part['body'].get('attachmentId')  # None when the data is inline
                 })
             if 'parts' in part:
                 process_parts(part['parts'])
@@ -1040,19 +1819,23 @@ def extract_attachments(payload: Dict) -> List[Dict]:
     
     return attachments
 
+def knowledge_base_document(user_id: str, email_id: str, email_data: Dict) -> Dict:
+    """The Knowledge Base record for one email"""
+    return {
+        'userId': user_id,
+        'emailId': email_id,
+        'subject': email_data['subject'],
+        'from': email_data['from'],
+        'date': email_data['date'],
+        'body': email_data['body'],
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
 def store_email_in_knowledge_base(user_id: str, email_id: str, email_data: Dict):
     """Store email in S3 for Knowledge Base"""
     try:
         # Create document for Knowledge Base
-        document = {
-            'userId': user_id,
-            'emailId': email_id,
-            'subject': email_data['subject'],
-            'from': email_data['from'],
-            'date': email_data['date'],
-            'body': email_data['body'],
-            'timestamp': datetime.utcnow().isoformat()
-        }
+        document = knowledge_base_document(user_id, email_id, email_data)
         
         # Store in S3
         key = f"emails/{user_id}/{email_id}.json"
@@ -1068,6 +1851,243 @@ def store_email_in_knowledge_base(user_id: str, email_id: str, email_data: Dict)
     except Exception as e:
         logger.error(f"Error storing email in Knowledge Base: {str(e)}")
 
+def sync_knowledge_base(event: Dict) -> Dict:
+    """Sync new Gmail messages into the email Knowledge Base.
+    
+    Syncs event['userId'] if given. Otherwise (the scheduled run) queues one
+    async invocation of this function per Gmail connection, so each user's
+    sync gets its own Lambda timeout and one slow mailbox can't starve the rest.
+    """
+    user_id = event.get('userId') or (event.get('detail') or {}).get('userId')
+    if not user_id:
+        connections = list_gmail_connections()
+        for connection in connections:
+            lambda_client.invoke(FunctionName=GMAIL_ACTION_FUNCTION, InvocationType='Event', Payload=json.dumps({
+                'action': 'sync-knowledge-base', 'userId': connection['userId']
+            }))
+        logger.info(f"[KB_SYNC] Queued syncs for {len(connections)} users")
+        return {
+            'statusCode': 202,
+            'body': json.dumps({'users': len(connections), 'queued': [c['userId'] for c in connections]})
+        }
+    
+    connection = check_gmail_authentication(user_id)
+    results = []
+    if connection:
+        try:
+            results.append(sync_user_knowledge_base(user_id, connection))
+        except Exception as e:
+            logger.error(f"[KB_SYNC] Sync failed for {user_id}: {str(e)}")
+            results.append({'userId': user_id, 'error': str(e)})
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'users': len(results), 'results': results})
+    }
+
+def list_gmail_connections() -> List[Dict]:
+    """Every Gmail item in PlatformConnections"""
+    connections = []
+    scan_kwargs = {'FilterExpression': 'provider = :provider', 'ExpressionAttributeValues': {':provider': 'gmail'}}
+    while True:
+        response = platform_table.scan(**scan_kwargs)
+        connections.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return connections
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def sync_user_knowledge_base(user_id: str, connection: Dict) -> Dict:
+    """Pull one user's mailbox changes since their stored kbHistoryId into NDJSON shards.
+    
+    The new historyId is saved only after the shards are written, so a failed
+    run is retried from the same point (some emails may then be written twice).
+    Messages that couldn't be fetched are kept in kbRetryIds and fetched again
+    on the next runs, up to GMAIL_KB_MAX_FETCH_ATTEMPTS times, so moving the
+    watermark past them doesn't lose them.
+    """
+    service = get_user_gmail_service(user_id, connection)
+    
+    message_ids, history_id = None, None
+    if connection.get('kbHistoryId'):
+        message_ids, history_id = list_history_message_ids(service, str(connection['kbHistoryId']))
+    if message_ids is None:
+        # First sync, or Gmail no longer keeps history that far back
+        message_ids, history_id = list_recent_message_ids(service)
+    
+    attempts = {message_id: int(count) for message_id, count in (connection.get('kbRetryIds') or {}).items()}
+    message_ids = list(attempts) + [message_id for message_id in message_ids if message_id not in attempts]
+    
+    messages = batch_get_messages(service, message_ids, format='full') if message_ids else {}
+    documents = []
+    retry_ids = {}
+    for message_id in message_ids:
+        message = messages.get(message_id)
+        if message is None:
+            if attempts.get(message_id, 0) + 1 < GMAIL_KB_MAX_FETCH_ATTEMPTS:
+                retry_ids[message_id] = attempts.get(message_id, 0) + 1
+            else:
+                logger.warning(f"[KB_SYNC] {user_id}: giving up on message {message_id}")
+        elif not GMAIL_KB_SKIP_LABELS & set(message.get('labelIds', [])):
+            documents.append(email_document(user_id, message))
+    shard_keys = write_knowledge_base_shards(user_id, history_id, documents)
+    
+    pending = int(connection.get('kbPendingShards', 0)) + len(shard_keys)
+    last_ingest = float(connection.get('kbLastIngestAt', 0))
+    ingestion_job_id = None
+    if pending and (pending >= GMAIL_KB_INGEST_SHARD_THRESHOLD or
+                    time.time() - last_ingest >= GMAIL_KB_INGEST_MAX_DELAY_SECONDS):
+        ingestion_job_id = start_knowledge_base_ingestion()
+        if ingestion_job_id:
+            pending, last_ingest = 0, time.time()
+    
+    platform_table.update_item(
+        Key={'userId': user_id, 'provider': 'gmail'},
+        UpdateExpression='SET kbHistoryId = :history, kbRetryIds = :retry, kbPendingShards = :pending, '
+                         'kbLastIngestAt = :ingest, kbSyncedAt = :synced',
+        ExpressionAttributeValues={
+            ':history': str(history_id),
+            ':retry': retry_ids,
+            ':pending': pending,
+            ':ingest': int(last_ingest),
+            ':synced': datetime.utcnow().isoformat()
+        }
+    )
+    
+    logger.info(f"[KB_SYNC] {user_id}: {len(documents)} emails in {len(shard_keys)} shards, historyId {history_id}")
+    return {
+        'userId': user_id,
+        'emails': len(documents),
+        'shards': shard_keys,
+        'historyId': str(history_id),
+        'retryIds': list(retry_ids),
+        'pendingShards': pending,
+        'ingestionJobId': ingestion_job_id
+    }
+
+def list_history_message_ids(service, start_history_id: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Ids of messages added since start_history_id (oldest first), and the historyId to resume from.
+    
+    Stops after GMAIL_KB_MAX_MESSAGES_PER_SYNC messages, at a history record
+    boundary, so the next run resumes from the last record taken. Returns
+    (None, None) if start_history_id has expired (HTTP 404): resync from scratch.
+    """
+    from googleapiclient.errors import HttpError
+    
+    message_ids = []
+    seen = set()
+    last_record_id = start_history_id
+    page_token = None
+    while True:
+        try:
+            response = service.users().history().list(
+                userId='me', startHistoryId=start_history_id, historyTypes=['messageAdded'],
+                pageToken=page_token, maxResults=500
+            ).execute()
+        except HttpError as e:
+            if e.resp.status == 404:
+                logger.warning(f"[KB_SYNC] historyId {start_history_id} expired, doing a full sync")
+                return None, None
+            raise
+        
+        for record in response.get('history', []):
+            if len(message_ids) >= GMAIL_KB_MAX_MESSAGES_PER_SYNC:
+                return message_ids, last_record_id
+            for added in record.get('messagesAdded', []):
+                message = added.get('message', {})
+                if message.get('id') and message['id'] not in seen and \
+                        not GMAIL_KB_SKIP_LABELS & set(message.get('labelIds', [])):
+                    seen.add(message['id'])
+                    message_ids.append(message['id'])
+            last_record_id = record['id']
+        
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return message_ids, response.get('historyId', last_record_id)
+
+def list_recent_message_ids(service) -> Tuple[List[str], str]:
+    """Ids of the newest messages matching GMAIL_KB_INITIAL_QUERY (oldest first), and the mailbox historyId.
+    
+    The historyId is read before listing, so nothing that arrives while the
+    list is paged through is missed by the next incremental sync.
+    """
+    history_id = service.users().getProfile(userId='me', fields='historyId').execute()['historyId']
+    message_ids = []
+    page_token = None
+    while len(message_ids) < GMAIL_KB_MAX_MESSAGES_PER_SYNC:
+        response = service.users().messages().list(
+            userId='me', q=GMAIL_KB_INITIAL_QUERY, pageToken=page_token,
+            maxResults=min(500, GMAIL_KB_MAX_MESSAGES_PER_SYNC - len(message_ids))
+        ).execute()
+        message_ids.extend(m['id'] for m in response.get('messages', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    return message_ids[::-1], history_id
+
+def email_document(user_id: str, message: Dict) -> Dict:
+    """Knowledge Base record for a messages().get(format='full') response"""
+    parsed = parse_message(message)
+    document = knowledge_base_document(user_id, message['id'], {**parsed, 'body': parsed['body'][:GMAIL_KB_MAX_BODY_CHARS]})
+    document.update({
+        'to': parsed['to'],
+        'threadId': parsed['threadId'],
+        'labels': parsed['labels'],
+        'attachments': [a['filename'] for a in parsed['attachments']]
+    })
+    return document
+
+def write_knowledge_base_shards(user_id: str, history_id: str, documents: List[Dict]) -> List[str]:
+    """Write documents to S3 as NDJSON shards of at most GMAIL_KB_SHARD_MAX_DOCS / _MAX_BYTES each.
+    
+    Shards use a .txt suffix (one JSON email per line) so the Knowledge Base's
+    S3 data source parses them as plain text.
+    """
+    shard_keys = []
+    lines, size = [], 0
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    
+    def flush():
+        key = f"emails/{user_id}/shards/{stamp}-{history_id}-{len(shard_keys):04d}.ndjson.txt"
+        s3_client.put_object(
+            Bucket=KNOWLEDGE_BASE_BUCKET,
+            Key=key,
+            Body='\n'.join(lines).encode('utf-8') + b'\n',
+            ContentType='application/x-ndjson'
+        )
+        shard_keys.append(key)
+    
+    for document in documents:
+        line = json.dumps(document, ensure_ascii=False)
+        line_size = len(line.encode('utf-8')) + 1
+        if lines and (len(lines) >= GMAIL_KB_SHARD_MAX_DOCS or size + line_size > GMAIL_KB_SHARD_MAX_BYTES):
+            flush()
+            lines, size = [], 0
+        lines.append(line)
+        size += line_size
+    if lines:
+        flush()
+    
+    return shard_keys
+
+def start_knowledge_base_ingestion() -> Optional[str]:
+    """Start an ingestion job on the email data source; the job id, or None if it couldn't start"""
+    if not (EMAIL_KNOWLEDGE_BASE_ID and EMAIL_KB_DATA_SOURCE_ID):
+        logger.warning("[KB_SYNC] EMAIL_KNOWLEDGE_BASE_ID / EMAIL_KB_DATA_SOURCE_ID not set, skipping ingestion")
+        return None
+    try:
+        response = bedrock_agent.start_ingestion_job(
+            knowledgeBaseId=EMAIL_KNOWLEDGE_BASE_ID,
+            dataSourceId=EMAIL_KB_DATA_SOURCE_ID,
+            description='Gmail incremental sync'
+        )
+        job_id = response['ingestionJob']['ingestionJobId']
+        logger.info(f"[KB_SYNC] Started ingestion job {job_id}")
+        return job_id
+    except Exception as e:
+        # ConflictException while another job is running: the shards stay pending for the next sync
+        logger.error(f"[KB_SYNC] Could not start ingestion job: {str(e)}")
+        return None
+
 def create_response(status_code: int, body: Dict, api_path: str, http_method: str = 'POST') -> Dict:
     """Create response for Bedrock Agent that mirrors the incoming request path & method"""
     response = {
@@ -1085,7 +2105,7 @@ def create_response(status_code: int, body: Dict, api_path: str, http_method: st
         }
     }
     
-    debug_logger.debug("Creating Gmail response", {
+    debug_logger.debug("Creating Gmail response", lambda: {
         'status_code': status_code,
         'api_path': api_path,
         'http_method': http_method,
@@ -1,19 +1,16 @@
 import json
 import os
-import boto3
 import logging
 from urllib.parse import urlencode
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+from lazy_init import lazy_client, lazy_resource
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# AWS Services
-dynamodb = boto3.resource('dynamodb')
-secrets_manager = boto3.client('secretsmanager')
+# AWS Services - created on first use; the Google OAuth libraries are imported
+# by the routes that need them, so a status check never loads the OAuth flow
+dynamodb = lazy_resource('dynamodb')
+secrets_manager = lazy_client('secretsmanager')
 
 # Environment variables
 PLATFORM_CONNECTIONS_TABLE = os.environ.get('PLATFORM_CONNECTIONS_TABLE', 'PlatformConnections-staging')
@@ -92,6 +89,8 @@ def lambda_handler(event, context):
 def handle_auth_initiate(user_id):
     """Initiate Gmail OAuth flow"""
     try:
+        from google_auth_oauthlib.flow import Flow
+        
         # Get Gmail credentials
         creds_data = get_gmail_credentials()
         
@@ -140,6 +139,9 @@ def handle_auth_initiate(user_id):
 def handle_auth_callback(query_params):
     """Handle OAuth callback from Google"""
     try:
+        from google_auth_oauthlib.flow import Flow
+        from googleapiclient.discovery import build
+        
         code = query_params.get('code')
         state = query_params.get('state')
         error = query_params.get('error')
@@ -245,6 +247,9 @@ def handle_auth_status(user_id):
         
         item = response['Item']
         
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
+        
         # Check if token is still valid
         credentials = Credentials(
             token=item.get('accessToken'),
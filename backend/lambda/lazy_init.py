@@ -0,0 +1,90 @@
+"""
+Deferred initialization shared by the Lambda handlers.
+
+Building a boto3 client or resource loads and parses its service model
+(40-90 ms each, on top of ~100 ms to import boto3 itself), so handlers
+that create every client at import pay for all of them on each cold
+start, even on routes that use none. Clients are instead created on
+first use and kept for the life of the container:
+
+    s3_client = lazy_client('s3')
+    platform_table = LazyObject(lambda: dynamodb.Table('PlatformConnections-staging'))
+
+    s3_client.put_object(...)   # client built here, once
+
+Slow I/O needed by most requests (a Secrets Manager read) can be started
+during INIT with prefetch(), so it overlaps the rest of the import and the
+first invocation; callers wait on the returned future only when they need it.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+logger = logging.getLogger()
+
+# boto3's default session is not thread-safe while clients are being created,
+# and prefetch threads or write-behind threads may resolve clients concurrently
+_init_lock = threading.RLock()
+_UNSET = object()
+
+
+class LazyObject:
+    """Proxy that builds the wrapped object on first attribute access"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._value = _UNSET
+
+    def resolve(self) -> Any:
+        """The wrapped object, building it if needed"""
+        if self._value is _UNSET:
+            with _init_lock:
+                if self._value is _UNSET:
+                    self._value = self._factory()
+        return self._value
+
+    @property
+    def initialized(self) -> bool:
+        return self._value is not _UNSET
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+def lazy_client(service: str, **kwargs) -> LazyObject:
+    """boto3.client(service, **kwargs), created on first use"""
+    def create():
+        import boto3
+        return boto3.client(service, **kwargs)
+    return LazyObject(create)
+
+
+def lazy_resource(service: str, **kwargs) -> LazyObject:
+    """boto3.resource(service, **kwargs), created on first use"""
+    def create():
+        import boto3
+        return boto3.resource(service, **kwargs)
+    return LazyObject(create)
+
+
+def prefetch(fn: Callable, *args, **kwargs) -> Future:
+    """Run fn(*args, **kwargs) on a background thread and return its future.
+
+    The thread is a daemon so a slow or unreachable service never holds up
+    interpreter exit; exceptions are kept on the future for the caller.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            logger.warning(f"[PREFETCH] {getattr(fn, '__name__', fn)} failed: {str(e)}")
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"prefetch-{getattr(fn, '__name__', 'init')}", daemon=True).start()
+    return future
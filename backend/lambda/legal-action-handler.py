@@ -5,6 +5,13 @@ Analyzes music industry contracts and provides detailed assessments.
 import json
 import os
 import re
+from lazy_init import lazy_client
+
+# Contracts exported from Gmail (gmail-action-handler /export-attachment) arrive as S3 keys.
+# They are only ever read from the export bucket, under the calling user's prefix.
+s3_client = lazy_client('s3')
+GMAIL_ATTACHMENT_BUCKET = os.environ.get('GMAIL_ATTACHMENT_BUCKET',
+                                         os.environ.get('PATCHLINE_S3_BUCKET', 'patchline-files-us-east-1'))
 
 def lambda_handler(event, context):
     """Handle contract analysis requests from Bedrock Agent"""
@@ -21,6 +28,7 @@ def lambda_handler(event, context):
         http_method = event.get('httpMethod', '')
         parameters = event.get('parameters', [])
         request_body = event.get('requestBody', {})
+        user_id = (event.get('sessionAttributes') or {}).get('userId')
         
         # Extract contract text and context
         contract_text = ""
@@ -37,6 +45,8 @@ def lambda_handler(event, context):
                     body = body_str
                 contract_text = body.get('contractText', '')
                 user_context = body.get('context', '')
+                if not contract_text and body.get('contractS3Key'):
+                    contract_text = load_contract_text(user_id, body['contractS3Key'])
         
         # Fallback to parameters
         if not contract_text:
@@ -81,7 +91,7 @@ def lambda_handler(event, context):
                 "actionGroup": action_group,
                 "apiPath": api_path,
                 "httpMethod": http_method,
-                "httpStatusCode": 500,
+                "httpStatusCode": 403 if isinstance(e, PermissionError) else 500,
                 "responseBody": {
                     "application/json": {
                         "body": json.dumps(error_response)
@@ -90,6 +100,26 @@ def lambda_handler(event, context):
             }
         }
 
+def load_contract_text(user_id, key):
+    """Text of one of the user's exported contract documents in S3 (PDF or plain text)"""
+    prefix = f"email-attachments/{user_id}/"
+    if not user_id or not key.startswith(prefix):
+        raise PermissionError(f"contractS3Key must be under {prefix}")
+    print(f"[DEBUG] Loading contract from s3://{GMAIL_ATTACHMENT_BUCKET}/{key}")
+    obj = s3_client.get_object(Bucket=GMAIL_ATTACHMENT_BUCKET, Key=key)
+    data = obj['Body'].read()
+    
+    if key.lower().endswith('.pdf') or obj.get('ContentType') == 'application/pdf':
+        try:
+            import fitz  # PyMuPDF, as in pdf-preprocessor
+        except ImportError:
+            raise RuntimeError("PDF contracts need PyMuPDF in this function's package "
+                               "(see manage-lambda-functions.py); send the text as contractText")
+        with fitz.open(stream=data, filetype='pdf') as doc:
+            return "\n".join(page.get_text() for page in doc)
+    
+    return data.decode('utf-8', errors='ignore')
+
 def analyze_contract(contract_text, context=""):
     """Analyze a music industry contract for key terms and risks"""
     
@@ -3,12 +3,17 @@ import boto3
 import json
 import os
 import tempfile
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 s3 = boto3.client('s3')
 textract = boto3.client('textract')
 
+# Page uploads + Textract submissions run in parallel; 1 restores the serial behaviour
+PDF_UPLOAD_CONCURRENCY = int(os.environ.get('PDF_UPLOAD_CONCURRENCY', '8'))
+
 def lambda_handler(event, context):
     """
     Preprocess PDF documents by splitting into pages and analyzing each
@@ -66,40 +71,44 @@ def process_pdf(pdf_path: str, bucket: str, document_id: str, bank_type: str) ->
         'skipped_pages': []
     }
     
-    for page_num in range(total_pages):
-        print(f"\nProcessing page {page_num + 1} of {total_pages}")
-        
-        page = doc[page_num]
-        text = page.get_text()
-        
-        # Check if page likely contains transactions
-        if should_process_page(text, bank_type):
+    # PyMuPDF is not thread-safe, so text extraction and page splitting stay on
+    # this thread; only the S3 upload and Textract submission go to the pool.
+    # The semaphore caps how many rendered pages wait in memory for a worker.
+    in_flight = threading.BoundedSemaphore(PDF_UPLOAD_CONCURRENCY * 2)
+    submitted = []
+    
+    with ThreadPoolExecutor(max_workers=PDF_UPLOAD_CONCURRENCY) as executor:
+        for page_num in range(total_pages):
+            page = doc[page_num]
+            text = page.get_text()
+            
+            # Check if page likely contains transactions
+            if not should_process_page(text, bank_type):
+                print(f"Page {page_num + 1} skipped - no transactions detected")
+                results['skipped_pages'].append(page_num + 1)
+                continue
+            
             print(f"Page {page_num + 1} appears to contain transactions")
             
-            # Extract page as separate PDF
+            # Extract page as separate PDF, in memory
             page_doc = fitz.open()
             page_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
-            
-            # Save to S3
-            page_key = f"preprocessed/{document_id}/page_{page_num + 1}.pdf"
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_page:
-                page_doc.save(tmp_page.name)
-                s3.upload_file(tmp_page.name, bucket, page_key)
-                os.unlink(tmp_page.name)
-            
+            page_bytes = page_doc.tobytes()
             page_doc.close()
             
-            # Start Textract job for this page
-            start_textract_job(bucket, page_key, document_id, page_num + 1)
-            
-            results['transaction_pages'].append({
-                'page_num': page_num + 1,
-                's3_key': page_key
-            })
-            results['processed_pages'] += 1
-        else:
-            print(f"Page {page_num + 1} skipped - no transactions detected")
-            results['skipped_pages'].append(page_num + 1)
+            page_key = f"preprocessed/{document_id}/page_{page_num + 1}.pdf"
+            in_flight.acquire()
+            future = executor.submit(upload_page, bucket, page_key, page_bytes, document_id, page_num + 1)
+            future.add_done_callback(lambda _: in_flight.release())
+            submitted.append((page_num + 1, page_key, future))
+    
+    for page_num, page_key, future in submitted:
+        results['transaction_pages'].append({
+            'page_num': page_num,
+            's3_key': page_key,
+            'job_id': future.result()
+        })
+        results['processed_pages'] += 1
     
     doc.close()
     
@@ -117,55 +126,140 @@ def process_pdf(pdf_path: str, bucket: str, document_id: str, bank_type: str) ->
     
     return results
 
-def should_process_page(text: str, bank_type: str) -> bool:
-    """
-    Determine if a page likely contains transaction data
+class PageClassifier:
     """
-    text_lower = text.lower()
+    Transaction-page indicators for one bank type, compiled into one regex.
     
-    # Skip pages that are mostly empty
-    if len(text.strip()) < 100:
-        return False
+    The regex branches on an indicator's first character and looks ahead
+    for the rest, consuming one character per match. One finditer over the
+    lowered page therefore stops at every position where any indicator
+    starts, overlapping ones included ('$1,234.56' holds an amount one
+    character in, 'posted transactions' holds 'transaction'), and the
+    engine skips other characters without leaving C. When two indicators
+    start at the same position only the first alternative reports, so a
+    keyword that another keyword starts with is credited through `implies`.
+    Hit counts match re.findall run per indicator.
     
-    # Skip pages with only headers/footers
-    if 'page' in text_lower and 'of' in text_lower and len(text.strip()) < 200:
-        return False
+    A page qualifies once indicators worth min_indicators are present; an
+    indicator listed twice (e.g. 'purchase' for chase-sapphire) counts twice.
+    """
     
-    # Look for transaction indicators
-    transaction_indicators = [
-        # Date patterns
-        r'\d{1,2}/\d{1,2}',  # MM/DD
-        r'\d{1,2}-\d{1,2}',  # MM-DD
-        
-        # Amount patterns
-        r'\$[\d,]+\.\d{2}',  # $X,XXX.XX
-        r'[\d,]+\.\d{2}',    # X,XXX.XX
-        
-        # Transaction keywords
+    # name -> (characters a match can start with, pattern after that character)
+    PATTERNS = {
+        'dollar_amount': ('$', r'[\d,]+\.\d{2}'),        # $X,XXX.XX
+        'amount': ('0123456789,', r'[\d,]*\.\d{2}'),      # X,XXX.XX
+        'mm_dd_slash': ('0123456789', r'\d?/\d{1,2}'),   # MM/DD
+        'mm_dd_dash': ('0123456789', r'\d?-\d{1,2}'),    # MM-DD
+    }
+    KEYWORDS = [
         'transaction', 'purchase', 'payment', 'deposit', 'withdrawal',
         'debit', 'credit', 'balance', 'amount'
     ]
+    BANK_KEYWORDS = {
+        'chase-sapphire': ['purchase', 'payment', 'cash advance'],
+        'bilt': ['transaction summary', 'reference number'],
+        'bofa': ['posted transactions', 'pending transactions'],
+    }
     
-    # Bank-specific patterns
-    if bank_type == 'chase-sapphire':
-        transaction_indicators.extend(['purchase', 'payment', 'cash advance'])
-    elif bank_type == 'bilt':
-        transaction_indicators.extend(['transaction summary', 'reference number'])
-    elif bank_type == 'bofa':
-        transaction_indicators.extend(['posted transactions', 'pending transactions'])
-    
-    # Count indicators found
-    indicator_count = 0
-    for indicator in transaction_indicators:
-        if isinstance(indicator, str):
-            if indicator in text_lower:
-                indicator_count += 1
-        else:  # regex pattern
-            if re.search(indicator, text):
-                indicator_count += 1
-    
-    # Need at least 3 indicators to consider it a transaction page
-    return indicator_count >= 3
+    def __init__(self, bank_type: str, min_indicators: int = 3):
+        self.bank_type = bank_type
+        self.min_indicators = min_indicators
+        
+        self.weights: Dict[str, int] = dict.fromkeys(self.PATTERNS, 1)
+        self.keywords: Dict[str, str] = {}
+        for keyword in self.KEYWORDS + self.BANK_KEYWORDS.get(bank_type, []):
+            name = 'kw_' + re.sub(r'\W', '_', keyword)
+            self.weights[name] = self.weights.get(name, 0) + 1
+            self.keywords[name] = keyword
+        
+        # Keywords that start another keyword, credited when the longer one matches
+        self.implies: Dict[str, List[str]] = {
+            name: [other for other, word in self.keywords.items() if other != name and keyword.startswith(word)]
+            for name, keyword in self.keywords.items()
+        }
+        
+        # Longest keywords first, so the alternative that reports at a position implies the rest
+        by_first_char: Dict[str, List[Tuple[str, str]]] = {}
+        for name, (first_chars, rest) in self.PATTERNS.items():
+            for char in first_chars:
+                by_first_char.setdefault(char, []).append((name, rest))
+        for name, keyword in sorted(self.keywords.items(), key=lambda item: -len(item[1])):
+            by_first_char.setdefault(keyword[0], []).append((name, re.escape(keyword[1:])))
+        
+        # Group numbers can't repeat, so each (first character, indicator) gets its own group
+        self.group_names: List[Optional[str]] = [None]
+        branches = []
+        for char, alternatives in by_first_char.items():
+            lookaheads = []
+            for name, rest in alternatives:
+                self.group_names.append(name)
+                lookaheads.append(f"(?=({rest}))")
+            branches.append(re.escape(char) + '(?:' + '|'.join(lookaheads) + ')')
+        self.pattern = re.compile('|'.join(branches))
+    
+    def _hits(self, text_lower: str):
+        """(indicator, end) for every non-overlapping match of each indicator, in page order"""
+        ends = dict.fromkeys(self.weights, 0)
+        for match in self.pattern.finditer(text_lower):
+            start, name = match.start(), self.group_names[match.lastindex]
+            for indicator in (name, *self.implies.get(name, ())):
+                if start >= ends[indicator]:
+                    end = match.end(match.lastindex) if indicator == name else start + len(self.keywords[indicator])
+                    ends[indicator] = end
+                    yield indicator, end
+    
+    def scan(self, text: str) -> Dict[str, int]:
+        """Hit count per indicator, in one pass over the page"""
+        counts = dict.fromkeys(self.weights, 0)
+        for indicator, _ in self._hits(text.lower()):
+            counts[indicator] += 1
+        return counts
+    
+    def is_transaction_page(self, text: str) -> bool:
+        stripped = text.strip()
+        text_lower = text.lower()
+        
+        # Skip pages that are mostly empty
+        if len(stripped) < 100:
+            return False
+        
+        # Skip pages with only headers/footers
+        if 'page' in text_lower and 'of' in text_lower and len(stripped) < 200:
+            return False
+        
+        needed = self.min_indicators
+        found = set()
+        for indicator, _ in self._hits(text_lower):
+            if indicator not in found:
+                found.add(indicator)
+                needed -= self.weights[indicator]
+                if needed <= 0:
+                    return True
+        return False
+
+# Compiled once per container; other bank types are added on first use
+PAGE_CLASSIFIERS: Dict[str, PageClassifier] = {
+    bank_type: PageClassifier(bank_type) for bank_type in ['unknown', *PageClassifier.BANK_KEYWORDS]
+}
+
+def get_page_classifier(bank_type: str) -> PageClassifier:
+    classifier = PAGE_CLASSIFIERS.get(bank_type)
+    if classifier is None:
+        classifier = PAGE_CLASSIFIERS.setdefault(bank_type, PageClassifier(bank_type))
+    return classifier
+
+def should_process_page(text: str, bank_type: str) -> bool:
+    """
+    Determine if a page likely contains transaction data (at least 3 indicators)
+    """
+    return get_page_classifier(bank_type).is_transaction_page(text)
+
+def upload_page(bucket: str, key: str, page_bytes: bytes, document_id: str, page_num: int) -> str:
+    """
+    Upload a single-page PDF and start its Textract job (runs on a worker thread)
+    """
+    s3.put_object(Bucket=bucket, Key=key, Body=page_bytes, ContentType='application/pdf')
+    return start_textract_job(bucket, key, document_id, page_num)
 
 def start_textract_job(bucket: str, key: str, document_id: str, page_num: int):
     """
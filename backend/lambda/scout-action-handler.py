@@ -7,12 +7,16 @@ Lambda function for artist discovery and analytics operations
 import json
 import os
 import logging
-import boto3
-import requests
+import threading
 import urllib.parse
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
-from debug_logger import get_logger
+from debug_logger import get_logger, flush_logs
+from tiered_cache import TieredCache, DynamoDBCacheTier, make_cache_key
+from soundcharts_client import get_soundcharts_client, SoundchartsClient, ARTIST_STATS_PATH
+from write_behind import WriteBehindWriter, flush_writes
+from lazy_init import lazy_client, lazy_resource, prefetch
 import uuid
 
 # Configure logging
@@ -22,12 +26,15 @@ logger.setLevel(logging.INFO)
 # Smart debugging - zero overhead in prod
 debug_logger = get_logger('scout-agent')
 
+# AWS clients are created on first use (see lazy_init), not during INIT
+AWS_REGION = os.environ.get('PATCHLINE_AWS_REGION', 'us-east-1')
+secrets_client = lazy_client('secretsmanager', region_name=AWS_REGION)
+
 # Environment variables - Get from Secrets Manager
 def get_soundcharts_credentials():
     """Get Soundcharts credentials from AWS Secrets Manager"""
     try:
         secret_id = os.environ.get('SOUNDCHARTS_SECRET_ID', 'patchline/soundcharts-api')
-        secrets_client = boto3.client('secretsmanager', region_name=os.environ.get('PATCHLINE_AWS_REGION', 'us-east-1'))
         
         response = secrets_client.get_secret_value(SecretId=secret_id)
         secret_data = json.loads(response['SecretString'])
@@ -37,33 +44,76 @@ def get_soundcharts_credentials():
         debug_logger.error("Failed to get Soundcharts credentials from Secrets Manager", {'error': str(e)})
         return None, None
 
-# Try to get credentials from Secrets Manager first, fallback to env vars
-SOUNDCHARTS_ID, SOUNDCHARTS_TOKEN = get_soundcharts_credentials()
-if not SOUNDCHARTS_ID or not SOUNDCHARTS_TOKEN:
-    # Fallback to environment variables (for local development)
-    SOUNDCHARTS_ID = os.environ.get('SOUNDCHARTS_ID')
-    SOUNDCHARTS_TOKEN = os.environ.get('SOUNDCHARTS_TOKEN')
-    debug_logger.debug("Using environment variables for Soundcharts", {
-        'has_id': bool(SOUNDCHARTS_ID),
-        'has_token': bool(SOUNDCHARTS_TOKEN)
-    })
-else:
-    debug_logger.debug("Using Secrets Manager for Soundcharts", {
-        'has_id': bool(SOUNDCHARTS_ID),
-        'has_token': bool(SOUNDCHARTS_TOKEN)
-    })
+# The secret is read on a background thread during INIT; only routes that call
+# Soundcharts wait for it (soundcharts_credentials), the rest never do
+SOUNDCHARTS_ID = SOUNDCHARTS_TOKEN = None
+_soundcharts_credentials_future = prefetch(get_soundcharts_credentials)
+_soundcharts_credentials_lock = threading.Lock()
+
+def soundcharts_credentials() -> Tuple[Optional[str], Optional[str]]:
+    """Soundcharts (id, token): Secrets Manager first, environment variables as fallback"""
+    global SOUNDCHARTS_ID, SOUNDCHARTS_TOKEN
+    if SOUNDCHARTS_ID and SOUNDCHARTS_TOKEN:
+        return SOUNDCHARTS_ID, SOUNDCHARTS_TOKEN
+    with _soundcharts_credentials_lock:
+        if not (SOUNDCHARTS_ID and SOUNDCHARTS_TOKEN):
+            SOUNDCHARTS_ID, SOUNDCHARTS_TOKEN = _soundcharts_credentials_future.result()
+            source = 'secrets_manager'
+            if not SOUNDCHARTS_ID or not SOUNDCHARTS_TOKEN:
+                # Fallback to environment variables (for local development)
+                SOUNDCHARTS_ID = os.environ.get('SOUNDCHARTS_ID')
+                SOUNDCHARTS_TOKEN = os.environ.get('SOUNDCHARTS_TOKEN')
+                source = 'environment'
+            debug_logger.debug("Resolved Soundcharts credentials", {
+                'source': source,
+                'has_id': bool(SOUNDCHARTS_ID),
+                'has_token': bool(SOUNDCHARTS_TOKEN)
+            })
+        return SOUNDCHARTS_ID, SOUNDCHARTS_TOKEN
+
+def soundcharts_available() -> bool:
+    return all(soundcharts_credentials())
 
 SOUNDCHARTS_API_BASE = 'https://customer.api.soundcharts.com'  # Correct Soundcharts API URL
+# Pace requests to the plan's quota (rate + burst <= requests allowed per second);
+# a 429 still pauses the client per Retry-After
+SOUNDCHARTS_RATE_PER_SECOND = float(os.environ.get('SOUNDCHARTS_RATE_PER_SECOND', '8'))
+SOUNDCHARTS_BURST = float(os.environ.get('SOUNDCHARTS_BURST', '2'))
+SOUNDCHARTS_CONCURRENCY = int(os.environ.get('SOUNDCHARTS_CONCURRENCY', '10'))
 
 # DynamoDB client for interaction tracking
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('PATCHLINE_AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb', region_name=AWS_REGION)
 INTERACTIONS_TABLE = os.environ.get('USER_INTERACTIONS_TABLE', 'UserInteractions-staging')
+# Interactions are buffered and batch-written off the request path (flushed before the handler returns)
+interaction_writer = WriteBehindWriter(
+    INTERACTIONS_TABLE, dynamodb, key_attrs=('userId', 'timestamp'),
+    max_delay=float(os.environ.get('INTERACTION_FLUSH_SECONDS', '0.05'))
+)
+MAX_METADATA_FIELDS = 10
+MAX_METADATA_VALUE_CHARS = 200
+
+# Soundcharts responses cached in-process and in DynamoDB (shared across containers)
+SOUNDCHARTS_CACHE_TABLE = os.environ.get('SOUNDCHARTS_CACHE_TABLE', 'SoundchartsCache-staging')
+SOUNDCHARTS_CACHE_SIZE = int(os.environ.get('SOUNDCHARTS_CACHE_SIZE', '2048'))
+# Seconds per endpoint: name -> uuid hardly ever changes, stats move daily
+SOUNDCHARTS_CACHE_TTLS = {
+    'artist/search': int(os.environ.get('SOUNDCHARTS_SEARCH_TTL_SECONDS', str(7 * 24 * 3600))),
+    'artist/current/stats': int(os.environ.get('SOUNDCHARTS_STATS_TTL_SECONDS', '3600')),
+    'top/artists': int(os.environ.get('SOUNDCHARTS_TOP_TTL_SECONDS', str(6 * 3600)))
+}
+soundcharts_cache = TieredCache('soundcharts', SOUNDCHARTS_CACHE_SIZE, DynamoDBCacheTier(SOUNDCHARTS_CACHE_TABLE, dynamodb))
+
+def interaction_metadata(request_body: Dict) -> Dict[str, str]:
+    """Request parameters as bounded strings, instead of the raw Bedrock request body"""
+    body = parse_request_body(request_body) if request_body else {}
+    return {
+        str(name)[:64]: str(value)[:MAX_METADATA_VALUE_CHARS]
+        for name, value in list(body.items())[:MAX_METADATA_FIELDS]
+    }
 
 def track_interaction(user_id: str, action: str, metadata: Dict = None):
-    """Track user interactions in DynamoDB"""
+    """Track user interactions in DynamoDB (queued for the write-behind writer)"""
     try:
-        table = dynamodb.Table(INTERACTIONS_TABLE)
-        
         interaction = {
             'interactionId': str(uuid.uuid4()),
             'userId': user_id,
@@ -74,7 +124,7 @@ def track_interaction(user_id: str, action: str, metadata: Dict = None):
             'ttl': int((datetime.now().timestamp()) + (90 * 24 * 60 * 60))  # 90 days TTL
         }
         
-        table.put_item(Item=interaction)
+        interaction_writer.put(interaction)
         debug_logger.debug("Tracked user interaction", {
             'userId': user_id,
             'action': interaction['action']
@@ -280,16 +330,18 @@ MOCK_ARTIST_ANALYSIS = {
     }
 }
 
+@flush_writes(interaction_writer)
+@flush_logs(debug_logger)
 def lambda_handler(event, context):
     """Main Lambda handler for Scout Agent actions"""
     try:
         # Enhanced debug logging with our new system
-        debug_logger.debug("=== SCOUT LAMBDA HANDLER START ===", {
+        debug_logger.debug("=== SCOUT LAMBDA HANDLER START ===", lambda: {
             'event_keys': list(event.keys()),
             'context': str(context)
         })
         
-        logger.info(f"[SCOUT] Event: {json.dumps(event)}")
+        debug_logger.info("[SCOUT] Event", lambda: {'event': event})
         
         # Extract action details
         action_group = event.get('actionGroup', '')
@@ -311,11 +363,11 @@ def lambda_handler(event, context):
             return create_response(400, {'error': 'User ID not found'}, api_path, http_method)
         
         # Track the API interaction
-        track_interaction(user_id, api_path, request_body)
+        track_interaction(user_id, api_path, interaction_metadata(request_body))
         
         logger.info(f"[SCOUT] Action: {api_path} | Method: {http_method} | User: {user_id}")
         
-        debug_logger.debug("Starting route matching", {
+        debug_logger.debug("Starting route matching", lambda: {
             'api_path_check': f"'{api_path}' == '/search/artist'",
             'method_check': f"'{http_method}' == 'GET'",
             'combined_check': api_path == '/search/artist' and http_method == 'GET'
@@ -407,7 +459,7 @@ def create_response(status_code: int, body: Dict, api_path: str, http_method: st
         }
     }
     
-    debug_logger.debug("Creating Scout response", {
+    debug_logger.debug("Creating Scout response", lambda: {
         'status_code': status_code,
         'api_path': api_path,
         'http_method': http_method,
@@ -434,7 +486,7 @@ def handle_search_artist(user_id: str, parameters: List[Dict]) -> Dict:
         
         debug_logger.debug("Extracted artist name", {
             'artist_name': artist_name,
-            'soundcharts_credentials_available': bool(SOUNDCHARTS_ID and SOUNDCHARTS_TOKEN)
+            'soundcharts_credentials_available': soundcharts_available()
         })
         
         if not artist_name:
@@ -442,7 +494,7 @@ def handle_search_artist(user_id: str, parameters: List[Dict]) -> Dict:
             return create_response(400, {'error': 'Artist name is required'}, '/search/artist', 'GET')
         
         # Try real Soundcharts API first
-        if SOUNDCHARTS_ID and SOUNDCHARTS_TOKEN:
+        if soundcharts_available():
             try:
                 debug_logger.debug("Calling Soundcharts API for artist search", {
                     'artist_name': artist_name,
@@ -484,7 +536,7 @@ def handle_search_artist(user_id: str, parameters: List[Dict]) -> Dict:
         else:
             debug_logger.error("Artist not found anywhere", {
                 'searched_artist': artist_name,
-                'checked_soundcharts': bool(SOUNDCHARTS_ID and SOUNDCHARTS_TOKEN),
+                'checked_soundcharts': soundcharts_available(),
                 'checked_mock': True
             })
             return create_response(404, {'error': f'Artist "{artist_name}" not found'}, '/search/artist', 'GET')
@@ -510,7 +562,7 @@ def handle_search_artists(user_id: str, request_body: Dict) -> Dict:
             debug_logger.debug("Search-artists called with query, using simple search", {'query': query})
             
             # Try real Soundcharts API first
-            if SOUNDCHARTS_ID and SOUNDCHARTS_TOKEN:
+            if soundcharts_available():
                 try:
                     artist_data = search_artist_soundcharts(query)
                     if artist_data:
@@ -545,7 +597,7 @@ def handle_search_artists(user_id: str, request_body: Dict) -> Dict:
             return create_response(400, {'error': 'Genre is required'}, '/search-artists', 'POST')
             
         # Try to use real Soundcharts API if credentials are available
-        if SOUNDCHARTS_ID and SOUNDCHARTS_TOKEN:
+        if soundcharts_available():
             try:
                 artists = discover_artists_soundcharts(genre, region, min_followers, max_followers, limit)
                 return create_response(200, {'artists': artists, 'source': 'soundcharts'}, '/search-artists', 'POST')
@@ -613,10 +665,26 @@ def handle_get_artist_stats(user_id: str, request_body: Dict) -> Dict:
         body = parse_request_body(request_body)
         artist_id = body.get('artist_id', '')
         platform = body.get('platform', 'spotify')
+        artist_ids = body.get('artist_ids', [])
+        if isinstance(artist_ids, str):
+            artist_ids = [a.strip() for a in artist_ids.split(',') if a.strip()]
         
-        if not artist_id:
+        if not artist_id and not artist_ids:
             return create_response(400, {'error': 'Artist ID is required'}, '/get-artist-stats', 'POST')
         
+        # Live stats for Soundcharts UUIDs, fetched concurrently when several are asked for
+        uuids = [a for a in (artist_ids or [artist_id]) if not a.startswith('mock-')]
+        if uuids and soundcharts_available():
+            stats = fetch_artist_stats(uuids)
+            artists = [{'artist_id': uuid, 'platform': platform, 'stats': stats[uuid], 'source': 'soundcharts'} for uuid in uuids]
+            if not artist_ids:
+                return create_response(200, {**artists[0], 'last_updated': datetime.utcnow().isoformat() + 'Z'},
+                                       '/get-artist-stats', 'POST')
+            return create_response(200, {
+                'artists': artists,
+                'last_updated': datetime.utcnow().isoformat() + 'Z'
+            }, '/get-artist-stats', 'POST')
+        
         # Mock stats data
         return create_response(200, {
             'artist_id': artist_id,
@@ -686,22 +754,32 @@ def handle_compare_artists(user_id: str, request_body: Dict) -> Dict:
         
         # Extract parameters
         artist_names = body.get('artist_names', [])
+        if isinstance(artist_names, str):
+            artist_names = [name.strip() for name in artist_names.split(',') if name.strip()]
         metrics = body.get('metrics', ['followers', 'monthly_listeners'])
+        if isinstance(metrics, str):
+            metrics = [metric.strip() for metric in metrics.split(',') if metric.strip()]
         
         # Validate parameters
         if not artist_names or len(artist_names) < 2:
             return create_response(400, {'error': 'At least two artist names are required'}, '/compare-artists', 'POST')
-            
-        # In production, this would call a real API or database
-        # For now, use mock data
-        comparison = {}
-        found_artists = []
         
+        # Look every artist up at once; each lookup is search -> stats
+        live = {}
+        if soundcharts_available():
+            live = search_artists_soundcharts(artist_names)
+        
+        comparison = {}
         for name in artist_names:
-            if name in MOCK_ARTIST_ANALYSIS:
-                found_artists.append(name)
+            if live.get(name):
+                comparison[name] = {'source': 'soundcharts', 'id': live[name]['id']}
+                for metric in metrics:
+                    value = artist_metric(live[name]['stats'], metric)
+                    if value is not None:
+                        comparison[name][metric] = {'count': value}
+            elif name in MOCK_ARTIST_ANALYSIS:
                 artist_data = MOCK_ARTIST_ANALYSIS[name]
-                comparison[name] = {}
+                comparison[name] = {'source': 'mock'}
                 
                 for metric in metrics:
                     if metric == 'followers':
@@ -713,12 +791,14 @@ def handle_compare_artists(user_id: str, request_body: Dict) -> Dict:
         
         if not comparison:
             return create_response(404, {'error': 'No artists found'}, '/compare-artists', 'POST')
-            
-        # Generate simple recommendation
-        recommendation = f"Based on growth rates, {found_artists[0]} shows the strongest momentum in the {metrics[0]} metric."
+        
+        # Generate simple recommendation from the first requested metric
+        leader = max(comparison, key=lambda name: comparison[name].get(metrics[0], {}).get('count', 0))
+        recommendation = f"{leader} leads on {metrics[0]} among the {len(comparison)} artists compared."
         
         return create_response(200, {
             'comparison': comparison,
+            'not_found': [name for name in artist_names if name not in comparison],
             'recommendation': recommendation
         }, '/compare-artists', 'POST')
         
@@ -772,47 +852,70 @@ def parse_request_body(request_body: Dict) -> Dict:
         })
         return {}
 
+def soundcharts_get(endpoint: str, path: str, params: Dict = None) -> Dict:
+    """GET a Soundcharts API path through the response cache.
+    
+    `endpoint` picks the TTL from SOUNDCHARTS_CACHE_TTLS. Errors propagate
+    and are not cached.
+    """
+    def fetch():
+        data = soundcharts_client().get(path, params)
+        debug_logger.debug("Soundcharts API response", lambda: {
+            'path': path,
+            'data_keys': list(data.keys()) if isinstance(data, dict) else 'not_dict'
+        })
+        return data
+    
+    return soundcharts_cache.get_or_fetch(make_cache_key(path, params), SOUNDCHARTS_CACHE_TTLS[endpoint], fetch)
+
+def soundcharts_client() -> SoundchartsClient:
+    """Pooled, rate-limited Soundcharts client, reused across warm invocations"""
+    return get_soundcharts_client(
+        *soundcharts_credentials(), SOUNDCHARTS_API_BASE,
+        requests_per_second=SOUNDCHARTS_RATE_PER_SECOND,
+        burst=SOUNDCHARTS_BURST,
+        pool_size=SOUNDCHARTS_CONCURRENCY
+    )
+
+def fetch_artist_stats(uuids: List[str]) -> Dict[str, Dict]:
+    """Current stats for many artists (cached), fetched concurrently.
+    
+    Returns uuid -> stats object; artists whose lookup failed map to {}.
+    """
+    results = soundcharts_client().fetch_many(
+        uuids, ARTIST_STATS_PATH, fetch=lambda path: soundcharts_get('artist/current/stats', path)
+    )
+    stats = {}
+    for artist_uuid, result in results.items():
+        if isinstance(result, Exception):
+            debug_logger.error("Failed to get artist stats", {'uuid': artist_uuid, 'error': str(result)})
+            stats[artist_uuid] = {}
+        else:
+            stats[artist_uuid] = result.get('object', {})
+    return stats
+
+def normalize_artist_query(artist_name: str) -> str:
+    """Case- and whitespace-insensitive search term, so 'Glaive ' and 'glaive' share a cache entry"""
+    return ' '.join(artist_name.split()).casefold()
+
 def search_artist_soundcharts(artist_name: str) -> Dict:
     """Search for a single artist using Soundcharts API"""
     try:
-        headers = {
-            'x-app-id': SOUNDCHARTS_ID,
-            'x-api-key': SOUNDCHARTS_TOKEN,
-            'Content-Type': 'application/json'
-        }
-        
         # Use correct endpoint format: /api/v2/artist/search/{query}
-        encoded_name = urllib.parse.quote(artist_name)
-        url = f'{SOUNDCHARTS_API_BASE}/api/v2/artist/search/{encoded_name}'
+        encoded_name = urllib.parse.quote(normalize_artist_query(artist_name))
         
         debug_logger.debug("Making Soundcharts API search request", {
-            'url': url,
             'artist_name': artist_name,
-            'encoded_name': encoded_name,
-            'headers_keys': list(headers.keys())
+            'encoded_name': encoded_name
         })
         
         params = {
             'limit': 1  # Just get the top result
         }
         
-        response = requests.get(
-            url,
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-        
-        debug_logger.debug("Soundcharts API response", {
-            'status_code': response.status_code,
-            'response_size': len(response.text),
-            'headers': dict(response.headers)
-        })
-        
-        response.raise_for_status()
-        data = response.json()
+        data = soundcharts_get('artist/search', f'/api/v2/artist/search/{encoded_name}', params)
         
-        debug_logger.debug("Soundcharts API response data", {
+        debug_logger.debug("Soundcharts API response data", lambda: {
             'data_keys': list(data.keys()) if isinstance(data, dict) else 'not_dict',
             'data_preview': str(data)[:500]
         })
@@ -828,17 +931,11 @@ def search_artist_soundcharts(artist_name: str) -> Dict:
             if artist_uuid:
                 try:
                     # Get detailed stats
-                    stats_response = requests.get(
-                        f'{SOUNDCHARTS_API_BASE}/api/v2/artist/{artist_uuid}/current/stats',
-                        headers=headers,
-                        timeout=30
-                    )
-                    if stats_response.status_code == 200:
-                        artist_details = stats_response.json()
-                        debug_logger.debug("Got artist details from Soundcharts", {
-                            'uuid': artist_uuid,
-                            'details_keys': list(artist_details.keys()) if isinstance(artist_details, dict) else 'not_dict'
-                        })
+                    artist_details = soundcharts_get('artist/current/stats', ARTIST_STATS_PATH.format(uuid=artist_uuid))
+                    debug_logger.debug("Got artist details from Soundcharts", {
+                        'uuid': artist_uuid,
+                        'details_keys': list(artist_details.keys()) if isinstance(artist_details, dict) else 'not_dict'
+                    })
                 except Exception as details_error:
                     debug_logger.error("Failed to get artist details", {'error': str(details_error)})
             
@@ -855,10 +952,12 @@ def search_artist_soundcharts(artist_name: str) -> Dict:
                 'raw_data': artist  # Include raw data for debugging
             }
             
-            debug_logger.debug("Transformed Soundcharts data", {'result': result})
+            debug_logger.debug("Transformed Soundcharts data", lambda: {'result': result})
+            debug_logger.info("Soundcharts cache", soundcharts_cache.stats)
             return result
         
         debug_logger.debug("No artists found in Soundcharts response")
+        debug_logger.info("Soundcharts cache", soundcharts_cache.stats)
         return None
         
     except Exception as e:
@@ -869,15 +968,42 @@ def search_artist_soundcharts(artist_name: str) -> Dict:
         logger.error(f"[SCOUT] Soundcharts API error: {str(e)}")
         raise
 
+def search_artists_soundcharts(artist_names: List[str]) -> Dict[str, Optional[Dict]]:
+    """search_artist_soundcharts for several names concurrently.
+    
+    Each worker resolves one name and fetches its stats, so N artists take
+    about as long as the slowest single lookup. Returns name -> result
+    (None when the artist wasn't found or the lookup failed).
+    """
+    names = list(dict.fromkeys(artist_names))
+    
+    def lookup(name):
+        try:
+            return search_artist_soundcharts(name)
+        except Exception as e:
+            logger.warning(f"[SCOUT] Soundcharts lookup failed for {name}: {str(e)}")
+            return None
+    
+    if not names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(SOUNDCHARTS_CONCURRENCY, len(names))) as pool:
+        return dict(zip(names, pool.map(lookup, names)))
+
+# Soundcharts stats section holding each comparison metric
+STATS_SECTIONS = {'followers': 'audience', 'monthly_listeners': 'streaming', 'playlist_reach': 'playlist'}
+
+def artist_metric(stats: Dict, metric: str, platform: str = 'spotify') -> Optional[int]:
+    """Metric value from a /current/stats object, or None if it isn't reported"""
+    section = stats.get(STATS_SECTIONS.get(metric, metric))
+    if isinstance(section, list):
+        for entry in section:
+            if entry.get('platform') == platform:
+                return entry.get('value')
+    return stats.get(platform, {}).get(metric)
+
 def discover_artists_soundcharts(genre: str, region: str, min_followers: int, max_followers: int, limit: int) -> List[Dict]:
     """Discover artists using Soundcharts API"""
     try:
-        headers = {
-            'x-app-id': SOUNDCHARTS_ID,
-            'x-api-key': SOUNDCHARTS_TOKEN,
-            'Content-Type': 'application/json'
-        }
-        
         debug_logger.debug("Making Soundcharts discover request", {
             'genre': genre,
             'region': region,
@@ -893,15 +1019,7 @@ def discover_artists_soundcharts(genre: str, region: str, min_followers: int, ma
         if region:
             params['country'] = region
             
-        response = requests.get(
-            f'{SOUNDCHARTS_API_BASE}/api/v2/top/artists',
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-        
-        response.raise_for_status()
-        data = response.json()
+        data = soundcharts_get('top/artists', '/api/v2/top/artists', params)
         
         # Transform Soundcharts data to our format
         artists = []
@@ -928,6 +1046,7 @@ def discover_artists_soundcharts(genre: str, region: str, min_followers: int, ma
             'count': len(artists),
             'artists': [a['name'] for a in artists]
         })
+        debug_logger.info("Soundcharts cache", soundcharts_cache.stats)
         
         return artists[:limit]
         
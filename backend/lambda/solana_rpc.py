@@ -0,0 +1,200 @@
+"""
+Solana JSON-RPC client shared by the Lambda handlers.
+
+One SolanaRPCClient per RPC URL is kept for the life of the container
+(get_rpc_client), so warm invocations reuse its keep-alive connections
+instead of opening a new TLS connection per call.
+
+    client = get_rpc_client(HELIUS_RPC_URL)
+    lamports = client.get_balance(address)
+    balances = client.get_balances([address1, address2, ...])   # getMultipleAccounts
+    results = client.batch([('getSlot', []), ('getBlockHeight', [])])
+
+Transport failures, 429 and 5xx responses are retried with exponential
+backoff and full jitter; a Retry-After is always waited out in full, or the
+request fails at once if it asks for more than max_retry_after seconds.
+JSON-RPC errors are raised as SolanaRPCError.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger()
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# Seconds per RPC method; heavier reads get more time
+DEFAULT_TIMEOUT = 10.0
+METHOD_TIMEOUTS = {
+    'getBalance': 5.0,
+    'getEpochInfo': 5.0,
+    'getSlot': 5.0,
+    'getBlockHeight': 5.0,
+    'getMultipleAccounts': 8.0,
+    'getRecentPrioritizationFees': 5.0,
+    'getRecentPerformanceSamples': 5.0,
+    'getSignaturesForAddress': 10.0,
+    'getTransaction': 15.0,
+}
+
+MAX_BATCH_SIZE = 100  # requests per JSON-RPC batch
+MULTIPLE_ACCOUNTS_LIMIT = 100  # addresses per getMultipleAccounts call
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class SolanaRPCError(Exception):
+    """JSON-RPC error object returned by the node, or a request that failed after retries"""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class SolanaRPCClient:
+    """Pooled JSON-RPC client for a single Solana RPC endpoint"""
+
+    def __init__(self, url: str, pool_size: int = 10, max_retries: int = 3,
+                 backoff_base: float = 0.2, backoff_max: float = 2.0, max_retry_after: float = 5.0,
+                 method_timeouts: Optional[Dict[str, float]] = None):
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.method_timeouts = {**METHOD_TIMEOUTS, **(method_timeouts or {})}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+        self._next_id = 0
+        self._id_lock = threading.Lock()
+
+    def _request_id(self) -> int:
+        with self._id_lock:
+            self._next_id += 1
+            return self._next_id
+
+    def timeout_for(self, method: str) -> float:
+        return self.method_timeouts.get(method, DEFAULT_TIMEOUT)
+
+    def _post(self, payload: Any, timeout: float) -> Any:
+        """POST a JSON-RPC payload, retrying transport errors, 429 and 5xx with jittered backoff"""
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(self.url, json=payload, timeout=timeout)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get('Retry-After')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+                retry_after = None
+
+            if attempt >= self.max_retries:
+                raise SolanaRPCError(f"Solana RPC request failed after {attempt + 1} attempts: {error}")
+
+            # Full jitter: spread retries from many containers instead of synchronising them
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            if retry_after and retry_after.isdigit():
+                # The provider said when to come back: never sooner, and don't wait past our budget
+                if float(retry_after) > self.max_retry_after:
+                    raise SolanaRPCError(f"Solana RPC request failed: {error}, retry after {retry_after}s "
+                                         f"exceeds {self.max_retry_after:g}s")
+                delay = max(delay, float(retry_after))
+            attempt += 1
+            logger.warning(f"[SOLANA_RPC] {error}, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def call(self, method: str, params: Optional[list] = None, timeout: Optional[float] = None) -> Any:
+        """Single JSON-RPC call; returns `result` or raises SolanaRPCError"""
+        payload = {'jsonrpc': '2.0', 'id': self._request_id(), 'method': method, 'params': params or []}
+        data = self._post(payload, timeout or self.timeout_for(method))
+        if 'error' in data:
+            error = data['error']
+            raise SolanaRPCError(error.get('message', 'RPC error'), error.get('code'), error.get('data'))
+        return data.get('result')
+
+    def batch(self, calls: Sequence[Tuple[str, list]], timeout: Optional[float] = None) -> List[Any]:
+        """Send several calls as JSON-RPC batches (MAX_BATCH_SIZE per HTTP request).
+
+        Returns one entry per call, in order: the call's result, or a
+        SolanaRPCError instance for calls the node rejected.
+        """
+        results: List[Any] = []
+        for offset in range(0, len(calls), MAX_BATCH_SIZE):
+            chunk = calls[offset:offset + MAX_BATCH_SIZE]
+            payload = [
+                {'jsonrpc': '2.0', 'id': self._request_id(), 'method': method, 'params': params or []}
+                for method, params in chunk
+            ]
+            chunk_timeout = timeout or max(self.timeout_for(method) for method, _ in chunk)
+            data = self._post(payload, chunk_timeout)
+            if isinstance(data, dict):  # the whole batch was rejected
+                error = data.get('error', {})
+                raise SolanaRPCError(error.get('message', 'RPC batch error'), error.get('code'), error.get('data'))
+
+            by_id = {item.get('id'): item for item in data}
+            for request in payload:
+                item = by_id.get(request['id'], {'error': {'message': 'Missing response in batch'}})
+                if 'error' in item:
+                    error = item['error']
+                    results.append(SolanaRPCError(error.get('message', 'RPC error'), error.get('code'), error.get('data')))
+                else:
+                    results.append(item.get('result'))
+        return results
+
+    def get_balance(self, address: str) -> int:
+        """Balance in lamports"""
+        return self.call('getBalance', [address])['value']
+
+    def get_multiple_accounts(self, addresses: Sequence[str], encoding: str = 'base64',
+                              data_slice: Optional[Dict[str, int]] = None) -> List[Optional[Dict]]:
+        """Account infos in address order (None for accounts that don't exist), batched 100 per call"""
+        config: Dict[str, Any] = {'encoding': encoding}
+        if data_slice is not None:
+            config['dataSlice'] = data_slice
+
+        chunks = [list(addresses[i:i + MULTIPLE_ACCOUNTS_LIMIT]) for i in range(0, len(addresses), MULTIPLE_ACCOUNTS_LIMIT)]
+        if len(chunks) == 1:
+            return self.call('getMultipleAccounts', [chunks[0], config])['value']
+
+        accounts: List[Optional[Dict]] = []
+        for result in self.batch([('getMultipleAccounts', [chunk, config]) for chunk in chunks]):
+            if isinstance(result, SolanaRPCError):
+                raise result
+            accounts.extend(result['value'])
+        return accounts
+
+    def get_balances(self, addresses: Sequence[str]) -> Dict[str, int]:
+        """Lamports per address via getMultipleAccounts, without downloading account data"""
+        unique = list(dict.fromkeys(addresses))
+        if not unique:
+            return {}
+        accounts = self.get_multiple_accounts(unique, data_slice={'offset': 0, 'length': 0})
+        return {address: (account or {}).get('lamports', 0) for address, account in zip(unique, accounts)}
+
+
+# Clients cached across warm invocations, one per RPC URL
+_clients: Dict[str, SolanaRPCClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_rpc_client(url: str) -> SolanaRPCClient:
+    """Shared client for `url`, created on first use"""
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = SolanaRPCClient(url)
+        return client
@@ -0,0 +1,186 @@
+"""
+Soundcharts API client shared by the Lambda handlers.
+
+One SoundchartsClient per credential set is kept for the life of the
+container (get_soundcharts_client), so warm invocations reuse its
+keep-alive connections and share one rate limiter:
+
+    client = get_soundcharts_client(app_id, api_key)
+    data = client.get('/api/v2/artist/search/glaive', {'limit': 1})
+    stats = client.fetch_many(uuids)   # uuid -> /current/stats response (or SoundchartsError)
+
+Requests are paced by a token bucket matched to the plan's quota (keep
+requests_per_second + burst within the per-second quota). A 429
+pauses the bucket for every thread until Retry-After has passed, and the
+request is retried no sooner; a Retry-After longer than max_retry_after
+fails the request at once rather than outwaiting the Lambda timeout. 5xx
+and transport errors are retried with jittered backoff.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger()
+
+SOUNDCHARTS_API_BASE = 'https://customer.api.soundcharts.com'
+DEFAULT_TIMEOUT = 10.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+ARTIST_STATS_PATH = '/api/v2/artist/{uuid}/current/stats'
+
+
+class SoundchartsError(Exception):
+    """Soundcharts request that failed (non-retryable status, or retries exhausted)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds` (the server told us to back off)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class SoundchartsClient:
+    """Pooled, rate-limited client for the Soundcharts REST API"""
+
+    def __init__(self, app_id: str, api_key: str, base_url: str = SOUNDCHARTS_API_BASE,
+                 requests_per_second: float = 8.0, burst: float = 2.0, pool_size: int = 10,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 max_retry_after: float = 10.0, timeout: float = DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.bucket = TokenBucket(requests_per_second, burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'x-app-id': app_id,
+            'x-api-key': api_key,
+            'Content-Type': 'application/json'
+        })
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict:
+        """GET `path` and return the decoded JSON body"""
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            retry_after = None
+            try:
+                response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+                if response.status_code < 400:
+                    return response.json()
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    raise SoundchartsError(f"Soundcharts {path} returned HTTP {response.status_code}", response.status_code)
+                error = f"HTTP {response.status_code}"
+                status_code = response.status_code
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status_code == 429 and retry_after is not None:
+                    self.bucket.pause(retry_after)
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    raise SoundchartsError(f"Soundcharts {path} returned {error}, retry after {retry_after:.0f}s "
+                                           f"exceeds {self.max_retry_after:g}s", status_code)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+                status_code = None
+
+            if attempt >= self.max_retries:
+                raise SoundchartsError(f"Soundcharts {path} failed after {attempt + 1} attempts: {error}", status_code)
+
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            attempt += 1
+            logger.warning(f"[SOUNDCHARTS] {error} on {path}, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def fetch_many(self, uuids: Sequence[str], path: str = ARTIST_STATS_PATH, max_workers: Optional[int] = None,
+                   fetch: Optional[Callable[[str], Dict]] = None) -> Dict[str, Any]:
+        """GET `path` (formatted with each uuid) for many artists with bounded concurrency.
+
+        Returns uuid -> response, or the SoundchartsError for that uuid (transport
+        and JSON decoding errors included), so one failure never fails the batch.
+        `fetch` replaces self.get for each formatted path (e.g. a cached getter).
+        """
+        unique = list(dict.fromkeys(uuids))
+        fetch = fetch or self.get
+
+        def fetch_one(uuid):
+            try:
+                return fetch(path.format(uuid=uuid))
+            except SoundchartsError as e:
+                return e
+            except (requests.RequestException, ValueError) as e:  # JSONDecodeError is a ValueError
+                return SoundchartsError(f"Soundcharts {path.format(uuid=uuid)} failed: {e}")
+
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.pool_size, len(unique))) as pool:
+            return dict(zip(unique, pool.map(fetch_one, unique)))
+
+
+# Clients cached across warm invocations, one per credential set
+_clients: Dict[tuple, SoundchartsClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_soundcharts_client(app_id: str, api_key: str, base_url: str = SOUNDCHARTS_API_BASE, **kwargs) -> SoundchartsClient:
+    """Shared client for these credentials, created on first use"""
+    with _clients_lock:
+        key = (app_id, api_key, base_url)
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = SoundchartsClient(app_id, api_key, base_url, **kwargs)
+        return client
@@ -0,0 +1,331 @@
+"""
+Two-tier response cache shared by the Lambda handlers.
+
+Tier 1 is an in-process LRU that lives as long as the warm container,
+bounded by entry count and optionally by (JSON-encoded) bytes. Tier 2 is a
+DynamoDB table or S3 prefix shared by every container, so a cold start
+still finds what other containers already fetched:
+
+    cache = TieredCache('soundcharts', persistent=DynamoDBCacheTier('SoundchartsCache-staging'))
+    data = cache.get_or_fetch(make_cache_key('artist/search', {'q': name}), ttl=86400, fetch=lambda: ...)
+
+Concurrent get_or_fetch calls for the same key share one fetch. Failed
+fetches are never cached; invalidate() drops a key from both tiers, and
+invalidate_many() many keys, with batched deletes in the persistent tier.
+Counters for hits, misses and shared fetches are available from stats().
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from lazy_init import lazy_client, lazy_resource
+
+logger = logging.getLogger()
+
+MAX_KEY_LENGTH = 512  # longer keys are hashed
+MAX_PERSISTED_BYTES = 350_000  # DynamoDB items are capped at 400 KB
+
+
+def make_cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key for an endpoint and its params (order-independent)"""
+    key = endpoint
+    if params:
+        key += '?' + '&'.join(f"{name}={params[name]}" for name in sorted(params))
+    if len(key) > MAX_KEY_LENGTH:
+        key = f"{endpoint}#{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+    return key
+
+
+def json_size(value: Any) -> int:
+    """Approximate in-memory cost of a cached value: its JSON-encoded length"""
+    return len(json.dumps(value, default=str))
+
+
+class LRUCache:
+    """Thread-safe LRU of key -> (value, expires_at), bounded by count and optionally by bytes"""
+
+    def __init__(self, maxsize: int = 1024, max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = json_size):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._items: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                self._remove(key)
+                return None
+            self._items.move_to_end(key)
+            return entry
+
+    def put(self, key: str, value: Any, expires_at: float):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # would evict everything else
+        with self._lock:
+            self._remove(key)
+            self._items[key] = (value, expires_at)
+            self._sizes[key] = size
+            self.bytes += size
+            while len(self._items) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._remove(next(iter(self._items)))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every key starting with `prefix`; returns how many were dropped"""
+        with self._lock:
+            keys = [key for key in self._items if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def _remove(self, key: str):
+        if self._items.pop(key, None) is not None:
+            self.bytes -= self._sizes.pop(key, 0)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DynamoDBCacheTier:
+    """Shared tier: one item per key holding the JSON payload and its expiry.
+
+    Table key is `cacheKey` (S); `ttl` lets DynamoDB TTL delete expired items.
+    Any DynamoDB error is logged and treated as a miss, so a missing or
+    throttled table only costs the latency of the failed call.
+    """
+
+    def __init__(self, table_name: str, resource=None):
+        self.table_name = table_name
+        self.resource = resource if resource is not None else lazy_resource('dynamodb')
+
+    def _table(self):
+        return self.resource.Table(self.table_name)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            item = self._table().get_item(Key={'cacheKey': key}).get('Item')
+        except Exception as e:
+            logger.warning(f"[CACHE] {self.table_name} read failed: {str(e)}")
+            return None
+        if not item or float(item['expiresAt']) <= time.time():
+            return None
+        return json.loads(item['payload']), float(item['expiresAt'])
+
+    def put(self, key: str, value: Any, expires_at: float):
+        payload = json.dumps(value)
+        if len(payload) > MAX_PERSISTED_BYTES:
+            return
+        try:
+            self._table().put_item(Item={
+                'cacheKey': key,
+                'payload': payload,
+                'expiresAt': int(expires_at),
+                'ttl': int(expires_at)
+            })
+        except Exception as e:
+            logger.warning(f"[CACHE] {self.table_name} write failed: {str(e)}")
+
+    def delete(self, key: str):
+        try:
+            self._table().delete_item(Key={'cacheKey': key})
+        except Exception as e:
+            logger.warning(f"[CACHE] {self.table_name} delete failed: {str(e)}")
+
+    def delete_many(self, keys: Iterable[str]):
+        """delete() for many keys, 25 per BatchWriteItem call; unprocessed deletes are retried"""
+        keys = list(dict.fromkeys(keys))
+        for start in range(0, len(keys), 25):
+            request = {self.table_name: [{'DeleteRequest': {'Key': {'cacheKey': key}}}
+                                         for key in keys[start:start + 25]]}
+            try:
+                for attempt in range(3):
+                    request = self.resource.batch_write_item(RequestItems=request).get('UnprocessedItems') or {}
+                    if not request:
+                        break
+                    time.sleep(0.05 * 2 ** attempt)
+            except Exception as e:
+                logger.warning(f"[CACHE] {self.table_name} delete failed: {str(e)}")
+                continue
+            for unprocessed in request.get(self.table_name, []):
+                self.delete(unprocessed['DeleteRequest']['Key']['cacheKey'])
+
+
+class S3CacheTier:
+    """Shared tier: one JSON object per key under `prefix`, holding the payload and its expiry.
+
+    For values too large for DynamoDB items. Pair the prefix with an S3
+    lifecycle rule to delete expired objects. Errors are logged and treated
+    as a miss, except a missing object, which is just a miss.
+    """
+
+    def __init__(self, bucket: str, prefix: str = 'cache/', client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client if client is not None else lazy_client('s3')
+
+    def _key(self, key: str) -> str:
+        return self.prefix + hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json'
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body'].read()
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') not in ('NoSuchKey', '404'):
+                logger.warning(f"[CACHE] s3://{self.bucket}/{self.prefix} read failed: {str(e)}")
+            return None
+        item = json.loads(body)
+        if float(item['expiresAt']) <= time.time():
+            return None
+        return item['payload'], float(item['expiresAt'])
+
+    def put(self, key: str, value: Any, expires_at: float):
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=self._key(key), ContentType='application/json',
+                                   Body=json.dumps({'payload': value, 'expiresAt': int(expires_at)}))
+        except Exception as e:
+            logger.warning(f"[CACHE] s3://{self.bucket}/{self.prefix} write failed: {str(e)}")
+
+    def delete(self, key: str):
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as e:
+            logger.warning(f"[CACHE] s3://{self.bucket}/{self.prefix} delete failed: {str(e)}")
+
+    def delete_many(self, keys: Iterable[str]):
+        """delete() for many keys, 1000 per DeleteObjects call"""
+        objects = [{'Key': self._key(key)} for key in dict.fromkeys(keys)]
+        for start in range(0, len(objects), 1000):
+            try:
+                response = self.client.delete_objects(Bucket=self.bucket, Delete={
+                    'Objects': objects[start:start + 1000], 'Quiet': True})
+            except Exception as e:
+                logger.warning(f"[CACHE] s3://{self.bucket}/{self.prefix} delete failed: {str(e)}")
+                continue
+            for error in response.get('Errors', []):
+                logger.warning(f"[CACHE] s3://{self.bucket}/{error.get('Key')} delete failed: {error.get('Message')}")
+
+
+class _Flight:
+    """A fetch in progress that other callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TieredCache:
+    """LRU in front of an optional persistent tier, with single-flight fetches"""
+
+    def __init__(self, name: str, maxsize: int = 1024,
+                 persistent: Optional[Union[DynamoDBCacheTier, S3CacheTier]] = None, max_bytes: Optional[int] = None):
+        self.name = name
+        self.lru = LRUCache(maxsize, max_bytes)
+        self.persistent = persistent
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {'lru_hits': 0, 'persistent_hits': 0, 'misses': 0, 'shared': 0, 'errors': 0}
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['lru_hits'] + stats['persistent_hits'] + stats['misses'] + stats['shared']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 3) if lookups else 0.0
+        stats['lru_size'] = len(self.lru)
+        stats['lru_bytes'] = self.lru.bytes
+        return stats
+
+    def peek(self, key: str) -> Any:
+        """The in-process value for `key`, or None; never fetches or reads the persistent tier"""
+        entry = self.lru.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, value: Any, ttl: float):
+        """Store `value` in both tiers, replacing what is there"""
+        expires_at = time.time() + ttl
+        self.lru.put(key, value, expires_at)
+        if self.persistent:
+            self.persistent.put(key, value, expires_at)
+
+    def invalidate(self, key: str):
+        """Drop `key` from both tiers"""
+        self.lru.delete(key)
+        if self.persistent:
+            self.persistent.delete(key)
+
+    def invalidate_many(self, keys: Iterable[str]):
+        """Drop `keys` from both tiers, batching the persistent deletes"""
+        keys = list(keys)
+        for key in keys:
+            self.lru.delete(key)
+        if self.persistent and keys:
+            self.persistent.delete_many(keys)
+
+    def get_or_fetch(self, key: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """Cached value for `key`, calling fetch() (once across threads) on a miss"""
+        entry = self.lru.get(key)
+        if entry is not None:
+            self._count('lru_hits')
+            return entry[0]
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self._count('shared')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            entry = self.persistent.get(key) if self.persistent else None
+            if entry is not None:
+                self._count('persistent_hits')
+                flight.value = entry[0]
+                self.lru.put(key, entry[0], entry[1])
+            else:
+                self._count('misses')
+                flight.value = fetch()
+                expires_at = time.time() + ttl
+                self.lru.put(key, flight.value, expires_at)
+                if self.persistent:
+                    self.persistent.put(key, flight.value, expires_at)
+            return flight.value
+        except BaseException as e:
+            self._count('errors')
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
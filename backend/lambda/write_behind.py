@@ -0,0 +1,150 @@
+"""
+Write-behind DynamoDB writer shared by the Lambda handlers.
+
+Handlers record items (interactions, transaction logs) without waiting on
+DynamoDB. A background thread sends them with BatchWriteItem once
+`max_batch` items are buffered or the oldest has waited `max_delay`
+seconds, so the write overlaps the rest of the request. Whatever is left
+is flushed before the handler returns:
+
+    tracker = WriteBehindWriter('UserInteractions-staging', dynamodb, key_attrs=('userId', 'timestamp'))
+
+    @flush_writes(tracker)
+    @flush_logs(debug_logger)
+    def lambda_handler(event, context):
+        tracker.put({...})
+
+Lambda freezes the container after the handler returns, so the final
+flush must happen inside the invocation. Write failures are logged and
+counted, never raised to the request.
+"""
+
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger()
+
+BATCH_WRITE_LIMIT = 25  # items per BatchWriteItem request
+
+
+class WriteBehindWriter:
+    """Buffers items for one table and writes them in batches off the request path"""
+
+    def __init__(self, table_name: str, resource, key_attrs: Sequence[str] = (), max_batch: int = BATCH_WRITE_LIMIT,
+                 max_delay: float = 0.05, max_retries: int = 5, base_delay: float = 0.05, max_buffer: int = 1000):
+        self.table_name = table_name
+        self.resource = resource
+        self.key_attrs = tuple(key_attrs)
+        self.max_batch = min(max_batch, BATCH_WRITE_LIMIT)
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_buffer = max_buffer
+
+        self._buffer: List[Dict] = []
+        self._oldest = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'queued': 0, 'written': 0, 'failed': 0, 'dropped': 0, 'batches': 0}
+
+    def put(self, item: Dict):
+        """Queue an item; returns immediately"""
+        with self._cond:
+            if len(self._buffer) >= self.max_buffer:
+                self.stats['dropped'] += 1
+                return
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(item)
+            self.stats['queued'] += 1
+            self._cond.notify_all()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.table_name}", daemon=True)
+                self._thread.start()
+
+    def _take_batch(self) -> List[Dict]:
+        batch, self._buffer = self._buffer[:self.max_batch], self._buffer[self.max_batch:]
+        self._oldest = time.monotonic() if self._buffer else 0.0
+        self._in_flight += 1
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer:
+                    self._cond.wait()
+                while self._buffer and len(self._buffer) < self.max_batch:
+                    remaining = self.max_delay - (time.monotonic() - self._oldest)
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._buffer:
+                    continue  # a flush() took the items
+                batch = self._take_batch()
+            self._write(batch)
+
+    def flush(self, timeout: float = 10.0):
+        """Write everything buffered now and wait for batches already in flight"""
+        while True:
+            with self._cond:
+                if not self._buffer:
+                    break
+                batch = self._take_batch()
+            self._write(batch)
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+
+    def _dedupe(self, batch: List[Dict]) -> List[Dict]:
+        """BatchWriteItem rejects duplicate keys in one request; the last write wins"""
+        if not self.key_attrs:
+            return batch
+        return list({tuple(item.get(a) for a in self.key_attrs): item for item in batch}.values())
+
+    def _write(self, batch: List[Dict]):
+        items = self._dedupe(batch)
+        requests = [{'PutRequest': {'Item': item}} for item in items]
+        written = 0
+        try:
+            attempt = 0
+            while requests:
+                response = self.resource.batch_write_item(RequestItems={self.table_name: requests})
+                unprocessed = response.get('UnprocessedItems', {}).get(self.table_name, [])
+                written += len(requests) - len(unprocessed)
+                requests = unprocessed
+                if requests:
+                    if attempt >= self.max_retries:
+                        break
+                    time.sleep(random.uniform(0, self.base_delay * 2 ** attempt))
+                    attempt += 1
+        except Exception as e:
+            logger.error(f"[WRITE_BEHIND] {self.table_name} batch write failed: {str(e)}")
+        finally:
+            with self._cond:
+                self.stats['batches'] += 1
+                self.stats['written'] += written
+                self.stats['failed'] += len(items) - written
+                self._in_flight -= 1
+                self._cond.notify_all()
+        if len(items) > written:
+            logger.error(f"[WRITE_BEHIND] {len(items) - written} items not written to {self.table_name}")
+
+
+def flush_writes(writer: WriteBehindWriter):
+    """Decorator for lambda_handler that flushes the writer before the invocation ends"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            try:
+                return handler(event, context)
+            finally:
+                writer.flush()
+        return wrapper
+    return decorator
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Benchmark Lambda cold starts: handler import time (INIT) and first-invocation latency.
+Each measurement runs in a fresh `python -X importtime` process; the heaviest
+imports are listed per handler, split into those paid during INIT and those a
+route pays on its first call. --baseline runs the same scenarios against the
+handlers at another git revision.
+
+AWS calls are answered in-process after --aws-latency-ms (botocore's HTTP layer is
+patched when the handler first imports it). Solana RPC, the SOL price feed and
+Soundcharts are local fakes answering after --api-latency-ms; Gmail API calls fail
+fast (no network), so that route's first call measures setup only.
+
+Run: python backend/scripts/benchmark-cold-start.py [--runs 3] [--aws-latency-ms 30] [--baseline HEAD~1]
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+from fake_services import FakePriceServer, FakeSolanaRPCServer, FakeSoundchartsServer
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+LAMBDA_DIR = REPO_ROOT / 'backend' / 'lambda'
+
+IMPORT_MARK = '--- handler import ---'
+INVOKE_MARK = '--- first invocation ---'
+
+
+def bedrock_event(api_path, method, parameters=None, properties=None):
+    event = {'actionGroup': 'Benchmark', 'apiPath': api_path, 'httpMethod': method,
+             'sessionAttributes': {'userId': 'bench-user'}, 'parameters': parameters or []}
+    if properties:
+        event['requestBody'] = {'content': {'application/json': {'properties': properties}}}
+    return event
+
+
+# (handler file, route label, first event)
+SCENARIOS = [
+    ('gmail-action-handler.py', '/check-emails', bedrock_event('/check-emails', 'POST')),
+    ('gmail-auth-handler.py', '/auth/gmail/status', {
+        'path': '/auth/gmail/status', 'httpMethod': 'GET', 'headers': {'Authorization': 'Bearer bench-token'}}),
+    ('scout-action-handler.py', '/track-artist', bedrock_event(
+        '/track-artist', 'POST', properties=[{'name': 'artist_id', 'value': 'artist-123'}])),
+    ('scout-action-handler.py', '/search/artist', bedrock_event(
+        '/search/artist', 'GET', parameters=[{'name': 'artistName', 'value': 'Glaive'}])),
+    ('blockchain-action-handler.py', '/calculate-transaction-fees', bedrock_event(
+        '/calculate-transaction-fees', 'POST', properties=[{'name': 'transaction_type', 'value': 'transfer'}])),
+    ('blockchain-action-handler.py', '/get-network-status', bedrock_event('/get-network-status', 'GET')),
+]
+
+CHILD = r'''
+import importlib.abc, importlib.util, json, os, sys, time
+
+lambda_dir, handler_file, event, latency = sys.argv[1], sys.argv[2], json.loads(sys.argv[3]), float(sys.argv[4])
+
+SECRETS = {
+    'patchline/gmail-oauth': {'web': {'client_id': 'bench-client', 'client_secret': 'bench-secret',
+                                      'token_uri': 'https://oauth2.googleapis.com/token'}},
+    'patchline/soundcharts-api': {'id': 'bench-app', 'token': 'bench-key'},
+}
+CONNECTION = {'userId': {'S': 'bench-user'}, 'provider': {'S': 'gmail'}, 'accessToken': {'S': 'bench-token'},
+              'refreshToken': {'S': 'bench-refresh'}, 'tokenExpiry': {'S': '2099-01-01T00:00:00'},
+              'gmailUserEmail': {'S': 'bench@example.com'}}
+
+
+def fake_aws(target, body):
+    if target.endswith('GetSecretValue'):
+        return {'Name': body['SecretId'], 'SecretString': json.dumps(SECRETS.get(body['SecretId'], {}))}
+    if target.endswith('GetItem'):
+        return {'Item': CONNECTION} if 'PlatformConnections' in body.get('TableName', '') else {}
+    if target.endswith('BatchWriteItem'):
+        return {'UnprocessedItems': {}}
+    if target.endswith('Query'):
+        return {'Items': [], 'Count': 0}
+    return {}
+
+
+def fake_send(self, request):
+    from botocore.awsrequest import AWSResponse
+    time.sleep(latency / 1000)
+    target = request.headers.get('X-Amz-Target', b'')
+    target = target.decode() if isinstance(target, bytes) else target
+    body = request.body or b'{}'
+    body = json.loads(body.decode() if isinstance(body, bytes) else body)
+    payload = json.dumps(fake_aws(target, body)).encode()
+
+    class Raw:
+        def stream(self, *args, **kwargs):
+            yield payload
+    return AWSResponse(request.url, 200, {'Content-Type': 'application/x-amz-json-1.0'}, Raw())
+
+
+class PatchBotocore(importlib.abc.MetaPathFinder):
+    """Swap botocore's HTTP send for fake_send when (and only if) something imports it"""
+
+    def find_spec(self, name, path, target=None):
+        if name != 'botocore.httpsession':
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(name)
+        exec_module = spec.loader.exec_module
+
+        def patched(module):
+            exec_module(module)
+            module.URLLib3Session.send = fake_send
+        spec.loader.exec_module = patched
+        return spec
+
+
+sys.meta_path.insert(0, PatchBotocore())
+sys.path.insert(0, lambda_dir)
+
+sys.stderr.write('IMPORT_MARK\n')
+sys.stderr.flush()
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('handler', os.path.join(lambda_dir, handler_file))
+handler = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(handler)
+import_ms = (time.perf_counter() - start) * 1000
+
+if hasattr(handler, 'SOUNDCHARTS_API_BASE'):
+    handler.SOUNDCHARTS_API_BASE = os.environ['BENCH_SOUNDCHARTS_URL']
+
+sys.stderr.write('INVOKE_MARK\n')
+sys.stderr.flush()
+start = time.perf_counter()
+response = handler.lambda_handler(event, None)
+invoke_ms = (time.perf_counter() - start) * 1000
+sys.stderr.flush()
+
+status = response.get('statusCode') or response.get('response', {}).get('httpStatusCode')
+print(json.dumps({'import_ms': import_ms, 'invoke_ms': invoke_ms, 'status': status}))
+'''.replace('IMPORT_MARK', IMPORT_MARK).replace('INVOKE_MARK', INVOKE_MARK)
+
+
+def child_env(rpc, price, soundcharts):
+    env = dict(os.environ)
+    env.update({
+        'AWS_DEFAULT_REGION': 'us-east-1', 'AWS_ACCESS_KEY_ID': 'bench', 'AWS_SECRET_ACCESS_KEY': 'bench',
+        'AWS_EC2_METADATA_DISABLED': 'true', 'AWS_MAX_ATTEMPTS': '1',
+        'RPC_URL': rpc.base_url, 'SOL_PRICE_URL': price.base_url,
+        'BENCH_SOUNDCHARTS_URL': soundcharts.base_url.rstrip('/'),
+    })
+    return env
+
+
+def parse_importtime(stderr):
+    """Top-level imports (module, cumulative ms) paid during INIT and during the first call"""
+    phases = {IMPORT_MARK: [], INVOKE_MARK: []}
+    current = None
+    for line in stderr.splitlines():
+        if line in phases:
+            current = phases[line]
+        elif current is not None and line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit() and name[1:2] != ' ':  # depth 0 only
+                current.append((name.strip(), int(cumulative) / 1000))
+    return phases[IMPORT_MARK], phases[INVOKE_MARK]
+
+
+def measure(lambda_dir, handler_file, event, runs, latency_ms, env):
+    results = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD, str(lambda_dir), handler_file,
+             json.dumps(event), str(latency_ms)],
+            capture_output=True, text=True, env=env, cwd=lambda_dir, timeout=120)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{handler_file} failed:\n{proc.stderr[-2000:]}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result['init_imports'], result['call_imports'] = parse_importtime(proc.stderr)
+        results.append(result)
+    return {
+        'import_ms': statistics.median(r['import_ms'] for r in results),
+        'invoke_ms': statistics.median(r['invoke_ms'] for r in results),
+        'status': results[-1]['status'],
+        'init_imports': results[-1]['init_imports'],
+        'call_imports': results[-1]['call_imports'],
+    }
+
+
+def export_lambda_dir(ref, dest):
+    """backend/lambda as of `ref`, extracted under dest"""
+    archive = subprocess.run(['git', 'archive', ref, 'backend/lambda'], cwd=REPO_ROOT,
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+    return Path(dest) / 'backend' / 'lambda'
+
+
+def top(imports, count):
+    heaviest = sorted(imports, key=lambda item: item[1], reverse=True)[:count]
+    return ', '.join(f"{name} {ms:.0f}" for name, ms in heaviest) or '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Lambda handler cold starts')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh processes per scenario (median reported)')
+    parser.add_argument('--aws-latency-ms', type=float, default=30.0, help='Simulated AWS API round trip')
+    parser.add_argument('--api-latency-ms', type=float, default=80.0, help='Simulated Solana/Soundcharts round trip')
+    parser.add_argument('--baseline', help='Git revision to compare against (e.g. HEAD~1)')
+    parser.add_argument('--top', type=int, default=4, help='Heaviest imports listed per handler')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeSolanaRPCServer(latency_ms=args.api_latency_ms) as rpc, \
+            FakePriceServer(latency_ms=args.api_latency_ms) as price, \
+            FakeSoundchartsServer(latency_ms=args.api_latency_ms, artists=['Glaive']) as soundcharts:
+        env = child_env(rpc, price, soundcharts)
+        trees = {'current': LAMBDA_DIR}
+        if args.baseline:
+            trees = {'baseline': export_lambda_dir(args.baseline, tmp), **trees}
+
+        results = {}
+        for label, lambda_dir in trees.items():
+            for handler_file, route, event in SCENARIOS:
+                results[label, handler_file, route] = measure(lambda_dir, handler_file, event, args.runs,
+                                                              args.aws_latency_ms, env)
+
+    print(f"Median of {args.runs} fresh processes, AWS round trip {args.aws_latency_ms:.0f} ms, "
+          f"upstream APIs {args.api_latency_ms:.0f} ms")
+    print(f"{'handler':<30} {'route':<28} {'tree':<9} {'INIT':>8} {'1st call':>9} {'total':>8} {'status':>7}")
+    for handler_file, route, _ in SCENARIOS:
+        for label in trees:
+            r = results[label, handler_file, route]
+            print(f"{handler_file:<30} {route:<28} {label:<9} {r['import_ms']:>6.0f}ms {r['invoke_ms']:>7.0f}ms "
+                  f"{r['import_ms'] + r['invoke_ms']:>6.0f}ms {r['status']!s:>7}")
+
+    print("\nHeaviest top-level imports (cumulative ms, from -X importtime)")
+    for handler_file, route, _ in SCENARIOS:
+        for label in trees:
+            r = results[label, handler_file, route]
+            print(f"{handler_file} {route} [{label}]\n"
+                  f"    INIT:      {top(r['init_imports'], args.top)}\n"
+                  f"    1st call:  {top(r['call_imports'], args.top)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark /compare-artists in scout-action-handler against a fake Soundcharts API.
+Compares looking artists up one after another (search -> stats per name) with the
+concurrent fan-out, each on an empty cache, and reports the slowest single lookup.
+
+Run: python backend/scripts/benchmark-compare-artists.py [--latency-ms 100] [--sizes 2 5 10]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from fake_services import FakeSoundchartsServer, load_lambda_module
+
+os.environ.setdefault('SOUNDCHARTS_RATE_PER_SECOND', '1000')  # the fake API has no quota
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent artist comparison')
+    parser.add_argument('--latency-ms', type=float, default=100.0, help='Simulated Soundcharts round trip')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2, 5, 10])
+    args = parser.parse_args()
+
+    names = [f"Artist {i}" for i in range(max(args.sizes))]
+    with FakeSoundchartsServer(latency_ms=args.latency_ms, artists=names) as api:
+        scout = load_lambda_module('scout-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+        scout.SOUNDCHARTS_API_BASE = api.base_url.rstrip('/')
+        scout.SOUNDCHARTS_ID, scout.SOUNDCHARTS_TOKEN = 'bench-app', 'bench-key'
+
+        def empty_cache():
+            scout.soundcharts_cache = scout.TieredCache('soundcharts', scout.SOUNDCHARTS_CACHE_SIZE)
+
+        print(f"API {args.latency_ms:.0f} ms per request, {scout.SOUNDCHARTS_CONCURRENCY} workers")
+        print(f"{'artists':>8} {'one by one':>11} {'concurrent':>11} {'slowest single':>15} {'API calls':>10}")
+        for size in args.sizes:
+            artist_names = names[:size]
+
+            empty_cache()
+            start = time.perf_counter()
+            serial = {}
+            slowest = 0.0
+            for name in artist_names:
+                lookup_start = time.perf_counter()
+                serial[name] = scout.search_artist_soundcharts(name)
+                slowest = max(slowest, time.perf_counter() - lookup_start)
+            serial_ms = (time.perf_counter() - start) * 1000
+
+            empty_cache()
+            api.request_count = 0
+            request_body = {'properties': [{'name': 'artist_names', 'value': ','.join(artist_names)},
+                                           {'name': 'metrics', 'value': 'followers,monthly_listeners'}]}
+            start = time.perf_counter()
+            response = scout.handle_compare_artists('bench-user', request_body)
+            concurrent_ms = (time.perf_counter() - start) * 1000
+
+            body = json.loads(response['response']['responseBody']['content'])
+            assert response['response']['httpStatusCode'] == 200, body
+            for name in artist_names:
+                stats = serial[name]['stats']['spotify']
+                assert body['comparison'][name]['followers']['count'] == stats['followers']
+                assert body['comparison'][name]['monthly_listeners']['count'] == stats['monthly_listeners']
+            assert body['recommendation'].startswith(artist_names[-1])
+
+            print(f"{size:>8} {serial_ms:>9.0f}ms {concurrent_ms:>9.0f}ms {slowest * 1000:>13.0f}ms {api.request_count:>10}")
+
+
+if __name__ == "__main__":
+    main()
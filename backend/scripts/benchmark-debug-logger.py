@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-invocation logging overhead in prod mode on a ~1 MB event.
+Compares eagerly built log payloads with deferred (lambda) payloads.
+
+Run: python backend/scripts/benchmark-debug-logger.py [--event-mb 1] [--iterations 50]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'lambda'))
+os.environ['DEBUG_MODE'] = 'prod'
+
+from debug_logger import get_logger  # noqa: E402
+
+
+def make_event(size_mb: float) -> dict:
+    """Bedrock action-group event padded to roughly size_mb of JSON"""
+    filler = 'x' * 1000
+    count = int(size_mb * 1024)
+    return {
+        'apiPath': '/search-emails',
+        'httpMethod': 'POST',
+        'sessionAttributes': {'userId': 'bench-user'},
+        'requestBody': {
+            'content': {
+                'application/json': {
+                    'properties': [{'name': f'field{i}', 'value': filler} for i in range(count)]
+                }
+            }
+        },
+    }
+
+
+def invocation_eager(std_logger, debug_logger, event, item, response_body):
+    """Logging calls as the handlers made them before: payloads built up front"""
+    std_logger.info(f"[SCOUT] Event: {json.dumps(event)}")
+    debug_logger.debug("Raw DynamoDB item", {'raw_item': str(item)})
+    response = {'response': {'responseBody': {'application/json': {'body': json.dumps(response_body)}}}}
+    debug_logger.debug("Creating response", {'body': response_body, 'full_response': response, 'preview': str(response)[:500]})
+
+
+def invocation_lazy(std_logger, debug_logger, event, item, response_body):
+    """Same calls with deferred payloads"""
+    debug_logger.info("[SCOUT] Event", lambda: {'event': event})
+    debug_logger.debug("Raw DynamoDB item", lambda: {'raw_item': str(item)})
+    response = {'response': {'responseBody': {'application/json': {'body': json.dumps(response_body)}}}}
+    debug_logger.debug("Creating response", lambda: {'body': response_body, 'full_response': response, 'preview': str(response)[:500]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prod-mode logging overhead')
+    parser.add_argument('--event-mb', type=float, default=1.0)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    std_logger = logging.getLogger('benchmark')
+    std_logger.setLevel(logging.INFO)
+    std_logger.propagate = False
+    std_logger.addHandler(logging.FileHandler(os.devnull))
+
+    debug_logger = get_logger('benchmark-agent')
+    event = make_event(args.event_mb)
+    item = {'userId': 'bench-user', 'provider': 'gmail', 'history': [{'id': i, 'note': 'y' * 200} for i in range(2000)]}
+    response_body = {'emails': [{'id': i, 'subject': 'Subject', 'snippet': 's' * 200} for i in range(50)]}
+
+    print(f"Event size: {len(json.dumps(event)) / 1024 / 1024:.2f} MB, logger: {type(debug_logger).__name__}")
+
+    for name, fn in (('eager', invocation_eager), ('lazy', invocation_lazy)):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            fn(std_logger, debug_logger, event, item, response_body)
+        per_call = (time.perf_counter() - start) / args.iterations
+        print(f"{name:>6}: {per_call * 1000:8.3f} ms per invocation")
+
+
+if __name__ == "__main__":
+    main()
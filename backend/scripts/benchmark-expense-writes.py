@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark saving extracted expenses against an in-process DynamoDB stand-in.
+Compares the previous put_item-per-expense loop with write_expenses (BatchWriteItem),
+then times the same write under throttling. UnprocessedItems retry and upsert
+behaviour are covered by backend/tests.
+
+Run: python backend/scripts/benchmark-expense-writes.py [--expenses 400] [--latency-ms 10]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from fake_services import FakeDynamoDBClient, FakeDynamoDBTable, load_lambda_module
+
+expense_processor = load_lambda_module('expense-processor.py')
+
+TABLE = 'TaxExpenses-bench'
+
+
+def make_expenses(count: int) -> list:
+    """Expenses as ChaseStatementParser emits them, including one duplicated row"""
+    parser = expense_processor.ChaseStatementParser('chase-checking', 'bench-user', 'bench-doc')
+    expenses = []
+    for i in range(count):
+        description = f"AMAZON MARKETPLACE ORDER {i}"
+        amount = f"{(i % 97) * 3.17 + 1:.2f}"
+        expenses.append({
+            'expenseId': parser.generate_expense_id('2024-07-01', amount, description),
+            'userId': 'bench-user',
+            'documentId': 'bench-doc',
+            'date': '2024-07-01',
+            'description': description,
+            'amount': amount,
+            'category': 'software',
+        })
+    expenses.append(dict(expenses[0]))
+    return expenses
+
+
+def save_sequential(client, expenses):
+    """Previous behaviour: one put_item round trip per expense"""
+    table = FakeDynamoDBTable(client, TABLE)
+    for expense in expenses:
+        table.put_item(Item=expense)
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched expense persistence')
+    parser.add_argument('--expenses', type=int, default=400)
+    parser.add_argument('--latency-ms', type=float, default=10.0, help='Simulated DynamoDB round trip')
+    parser.add_argument('--throttle-rate', type=float, default=0.3, help='Fraction of items returned unprocessed')
+    args = parser.parse_args()
+
+    expenses = make_expenses(args.expenses)
+    unique_ids = {e['expenseId'] for e in expenses}
+
+    sequential_client = FakeDynamoDBClient(latency_ms=args.latency_ms)
+    start = time.perf_counter()
+    save_sequential(sequential_client, expenses)
+    sequential = time.perf_counter() - start
+
+    batched_client = FakeDynamoDBClient(latency_ms=args.latency_ms)
+    start = time.perf_counter()
+    result = quiet(expense_processor.write_expenses, expenses, table_name=TABLE, client=batched_client)
+    batched = time.perf_counter() - start
+
+    print(f"{len(expenses)} expenses ({len(unique_ids)} unique), {args.latency_ms:.0f} ms per round trip")
+    print(f"{'mode':>12} {'time':>9} {'requests':>9} {'items/sec':>10}")
+    print(f"{'put_item':>12} {sequential * 1000:>7.0f}ms {sequential_client.call_count:>9} "
+          f"{len(expenses) / sequential:>10.0f}")
+    print(f"{'batch write':>12} {batched * 1000:>7.0f}ms {batched_client.call_count:>9} "
+          f"{result['itemsPerSecond']:>10.0f}   ({sequential / batched:.1f}x)")
+
+    throttled_client = FakeDynamoDBClient(latency_ms=args.latency_ms, throttle_rate=args.throttle_rate)
+    start = time.perf_counter()
+    result = quiet(expense_processor.write_expenses, expenses, table_name=TABLE, client=throttled_client)
+    throttled = time.perf_counter() - start
+    print(f"\nThrottled ({args.throttle_rate:.0%} unprocessed): saved {result['saved']} in {throttled * 1000:.0f}ms, "
+          f"{result['retries']} retries over {result['batches']} batches, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
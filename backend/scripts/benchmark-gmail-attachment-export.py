@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark /export-attachment in gmail-action-handler against a fake Gmail server
+and in-process AWS fakes. Compares the whole-body path (attachments().get through
+the client library, b64decode, put_object) with the streamed export on time and
+peak Python memory (tracemalloc, fakes excluded), checks the S3 copy byte for
+byte, then exercises the repeat export and the pdf-preprocessor / legal handoffs.
+
+Run: python backend/scripts/benchmark-gmail-attachment-export.py [--size-mb 40] [--latency-ms 30]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+import tracemalloc
+
+from fake_services import FakeAWS, FakeGmailServer, load_lambda_module
+
+USER = 'bench-user'
+BUCKET = 'bench-attachments'
+SECRETS = {'patchline/gmail-oauth': {'web': {'client_id': 'bench-client', 'client_secret': 'bench-secret',
+                                             'token_uri': 'https://oauth2.googleapis.com/token'}}}
+CONTRACT = (b"This exclusive agreement covers 12 shows over a term of 2 years, worldwide territory. "
+            b"The artist receives 15% royalties and a $25,000 advance.\n")
+
+
+def event(**values):
+    properties = [{'name': name, 'value': value} for name, value in values.items()]
+    return {'apiPath': '/export-attachment', 'httpMethod': 'POST', 'sessionAttributes': {'userId': USER},
+            'requestBody': {'content': {'application/json': {'properties': properties}}}}
+
+
+def body(response):
+    assert response['response']['httpStatusCode'] == 200, response
+    return json.loads(response['response']['responseBody']['application/json']['body'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streamed Gmail attachment export')
+    parser.add_argument('--size-mb', type=float, default=40.0, help='Attachment size')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Simulated Gmail round trip')
+    parser.add_argument('--aws-latency-ms', type=float, default=20.0, help='Simulated S3/Lambda round trip')
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size_mb * 1024 * 1024))
+    expected = (len(data), hashlib.sha256(data).hexdigest())
+
+    with FakeGmailServer(latency_ms=args.latency_ms, message_count=50) as server, \
+            FakeAWS(latency_ms=args.aws_latency_ms, secrets=SECRETS) as aws:
+        os.environ['GMAIL_API_ENDPOINT'] = server.base_url
+        os.environ['GMAIL_BATCH_URI'] = f"{server.base_url}batch/gmail/v1"
+        os.environ['GMAIL_ATTACHMENT_BUCKET'] = BUCKET
+        gmail = load_lambda_module('gmail-action-handler.py')
+        legal = load_lambda_module('legal-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+        aws.s3.keep_bodies = False
+        aws.lambda_.handlers[gmail.LEGAL_ACTION_FUNCTION] = legal.lambda_handler
+        aws.dynamodb.create_table(gmail.PLATFORM_CONNECTIONS_TABLE, key=('userId', 'provider'))
+        aws.dynamodb.put_item(gmail.PLATFORM_CONNECTIONS_TABLE, {
+            'userId': USER, 'provider': 'gmail', 'accessToken': 'bench-token', 'refreshToken': 'bench-refresh',
+            'tokenExpiry': '2099-01-01T00:00:00', 'gmailUserEmail': 'bench@example.com'})
+
+        email_id, attachment_id = server.add_attachment(data, filename='Q3 statement.pdf')
+        service = gmail.get_user_gmail_service(USER)
+        key = gmail.attachment_s3_key(USER, email_id, {'partId': '1', 'filename': 'Q3 statement.pdf'})
+
+        def whole_body():
+            """Previous approach: the whole base64 response, then the whole file, in memory"""
+            response = service.users().messages().attachments().get(
+                userId='me', messageId=email_id, id=attachment_id).execute()
+            aws.s3.put_object(Bucket=BUCKET, Key=key, Body=base64.urlsafe_b64decode(response['data']),
+                              ContentType='application/pdf')
+
+        def streamed():
+            body(gmail.lambda_handler(event(emailId=email_id), None))
+
+        def measure(name, fn, fresh=True):
+            results = []
+            for traced in (False, True):  # time without tracemalloc's overhead, memory with it
+                if fresh:
+                    aws.s3.delete_object(Bucket=BUCKET, Key=key)
+                server.request_count, aws.s3.call_count = 0, 0
+                if traced:
+                    tracemalloc.start()
+                start = time.perf_counter()
+                fn()
+                elapsed = (time.perf_counter() - start) * 1000
+                if traced:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                results.append(elapsed if not traced else peak)
+            assert aws.s3.digests[(BUCKET, key)] == expected, 'S3 copy differs from the attachment'
+            print(f"{name:<34} {results[0]:>7.0f}ms {results[1] / 2 ** 20:>8.1f}MB {server.request_count:>10} "
+                  f"{aws.s3.call_count:>8}")
+
+        streamed()  # warm the Gmail service, message cache and HTTP connections
+        print(f"{args.size_mb:.0f} MB attachment, Gmail {args.latency_ms:.0f} ms, AWS {args.aws_latency_ms:.0f} ms, "
+              f"{gmail.GMAIL_ATTACHMENT_PART_BYTES // 2 ** 20} MB parts")
+        print(f"{'mode':<34} {'time':>9} {'peak mem':>10} {'Gmail req':>10} {'S3 calls':>8}")
+        measure('get + b64decode + put_object', whole_body)
+        measure('streamed multipart export', streamed)
+        measure('export again (already in S3)', streamed, fresh=False)
+
+        # Small inline attachment: single put_object
+        inline_id, _ = server.add_attachment(b'%PDF-1.4 tiny', filename='tiny.pdf', inline=True)
+        inline = body(gmail.lambda_handler(event(emailId=inline_id), None))
+        assert aws.s3.digests[(BUCKET, inline['key'])][0] == len(b'%PDF-1.4 tiny')
+        print(f"\ninline attachment -> s3://{BUCKET}/{inline['key']} ({inline['size']} bytes)")
+
+        # Pipeline handoffs
+        queued = body(gmail.lambda_handler(event(emailId=email_id, pipeline='pdf-preprocessor', bankType='chase'),
+                                           None))
+        invocation = aws.lambda_.invocations[-1]
+        assert invocation['InvocationType'] == 'Event' and invocation['event']['key'] == key, invocation
+        print(f"pdf-preprocessor: queued {invocation['event']}")
+
+        aws.s3.keep_bodies = True
+        contract_id, _ = server.add_attachment(CONTRACT, filename='booking agreement.txt', mime_type='text/plain')
+        analysis = body(gmail.lambda_handler(event(emailId=contract_id, pipeline='legal'), None))['analysis']
+
+        def invocation_of_legal(email_id):
+            return next(i['event'] for i in reversed(aws.lambda_.invocations)
+                        if i['FunctionName'] == gmail.LEGAL_ACTION_FUNCTION and email_id in json.dumps(i['event']))
+        print(f"legal: {analysis['summary'].splitlines()[1:]}")
+        assert queued['documentId'] and 'Royalty Rate: 15%' in analysis['summary']
+
+        # The legal function only reads the calling user's exports
+        other = {**invocation_of_legal(contract_id), 'sessionAttributes': {'userId': 'someone-else'}}
+        status = legal.lambda_handler(other, None)['response']['httpStatusCode']
+        assert status == 403, status
+        print(f"legal: another user's export -> HTTP {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Gmail -> Knowledge Base sync in gmail-action-handler against a fake
+Gmail server and in-process AWS fakes. Compares the old per-email path
+(messages().get then store_email_in_knowledge_base for each email, one S3 object
+each) with sync_knowledge_base: an initial sync, an incremental sync after new
+mail arrives (history().list deltas only), and a sync with nothing new. Then a
+sync where one message fails to fetch (it must be picked up by the next run,
+not skipped), and a scheduled run, which must queue one invocation per user.
+
+Run: python backend/scripts/benchmark-gmail-kb-sync.py [--latency-ms 30] [--aws-latency-ms 10] [--initial 200]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from fake_services import FakeAWS, FakeGmailServer, load_lambda_module
+
+USER = 'bench-user'
+SECRETS = {'patchline/gmail-oauth': {'web': {'client_id': 'bench-client', 'client_secret': 'bench-secret',
+                                             'token_uri': 'https://oauth2.googleapis.com/token'}}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark incremental Gmail -> Knowledge Base sync')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Simulated Gmail round trip')
+    parser.add_argument('--aws-latency-ms', type=float, default=10.0, help='Simulated S3/DynamoDB round trip')
+    parser.add_argument('--initial', type=int, default=200, help='Emails pulled on the first sync')
+    parser.add_argument('--new', type=int, default=25, help='Emails delivered before the incremental sync')
+    args = parser.parse_args()
+
+    with FakeGmailServer(latency_ms=args.latency_ms, message_count=args.initial * 2) as server, \
+            FakeAWS(latency_ms=args.aws_latency_ms, secrets=SECRETS) as aws:
+        os.environ['GMAIL_API_ENDPOINT'] = server.base_url
+        os.environ['GMAIL_BATCH_URI'] = f"{server.base_url}batch/gmail/v1"
+        gmail = load_lambda_module('gmail-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+        gmail.GMAIL_KB_MAX_MESSAGES_PER_SYNC = args.initial
+        gmail.EMAIL_KNOWLEDGE_BASE_ID, gmail.EMAIL_KB_DATA_SOURCE_ID = 'bench-kb', 'bench-source'
+
+        aws.dynamodb.create_table(gmail.PLATFORM_CONNECTIONS_TABLE, key=('userId', 'provider'))
+        aws.dynamodb.put_item(gmail.PLATFORM_CONNECTIONS_TABLE, {
+            'userId': USER, 'provider': 'gmail', 'accessToken': 'bench-token', 'refreshToken': 'bench-refresh',
+            'tokenExpiry': '2099-01-01T00:00:00', 'gmailUserEmail': 'bench@example.com'})
+        service = gmail.get_user_gmail_service(USER)
+
+        def per_email():
+            """Previous path: one messages().get and one S3 object per email"""
+            listed = service.users().messages().list(userId='me', maxResults=args.initial).execute()
+            for ref in listed['messages']:
+                message = service.users().messages().get(userId='me', id=ref['id'], format='full').execute()
+                headers = {h['name']: h['value'] for h in message['payload']['headers']}
+                gmail.store_email_in_knowledge_base(USER, ref['id'], {
+                    'subject': headers.get('Subject'), 'from': headers.get('From'), 'date': headers.get('Date'),
+                    'body': gmail.extract_email_body(message['payload'])})
+            return {'emails': len(listed['messages'])}
+
+        def sync():
+            response = gmail.lambda_handler({'action': 'sync-knowledge-base', 'userId': USER}, None)
+            result = json.loads(response['body'])['results'][0]
+            assert 'error' not in result, result
+            return result
+
+        def deliver():
+            for _ in range(args.new):
+                server.add_message()
+
+        flaky = []
+
+        def deliver_one_failing():
+            deliver()
+            flaky.append(server.add_message())
+            server.fail_messages.add(flaky[-1])
+
+        def recover():
+            server.fail_messages.clear()
+
+        scenarios = [
+            ('per-email put_object', per_email, None),
+            ('sync: initial', sync, None),
+            (f"sync: {args.new} new emails", sync, deliver),
+            ('sync: nothing new', sync, None),
+            ('sync: 1 get fails', sync, deliver_one_failing),
+            ('sync: failed get retried', sync, recover),
+        ]
+
+        print(f"Gmail {args.latency_ms:.0f} ms, AWS {args.aws_latency_ms:.0f} ms, "
+              f"{args.initial} emails on the first sync, ingestion threshold {gmail.GMAIL_KB_INGEST_SHARD_THRESHOLD} "
+              f"shards")
+        print(f"{'mode':<24} {'time':>9} {'emails':>7} {'Gmail req':>10} {'S3 PUTs':>8} {'KB bytes':>9} {'ingest':>7}")
+        results = {}
+        for name, fn, before in scenarios:
+            if before:
+                before()
+            server.request_count, aws.s3.call_count = 0, 0
+            s3_before = sum(len(body) for body in aws.s3.objects.values())
+            jobs_before = len(aws.bedrock_agent.ingestion_jobs)
+            start = time.perf_counter()
+            result = fn()
+            results[name] = result
+            elapsed = (time.perf_counter() - start) * 1000
+            written = sum(len(body) for body in aws.s3.objects.values()) - s3_before
+            print(f"{name:<24} {elapsed:>7.0f}ms {result['emails']:>7} {server.request_count:>10} "
+                  f"{aws.s3.call_count:>8} {written:>9} {len(aws.bedrock_agent.ingestion_jobs) - jobs_before:>7}")
+
+        assert results['sync: 1 get fails']['retryIds'] == flaky, results['sync: 1 get fails']
+        assert results['sync: failed get retried']['emails'] == 1, 'the failed message was not retried'
+
+        # Scheduled run: one async invocation per user instead of syncing every mailbox in this one
+        aws.dynamodb.put_item(gmail.PLATFORM_CONNECTIONS_TABLE, {'userId': 'other-user', 'provider': 'gmail'})
+        response = gmail.lambda_handler({'source': 'aws.events', 'detail-type': 'Scheduled Event'}, None)
+        queued = [i['event']['userId'] for i in aws.lambda_.invocations if i['InvocationType'] == 'Event']
+        assert response['statusCode'] == 202 and sorted(queued) == ['bench-user', 'other-user'], queued
+        print(f"\nscheduled run queued {len(queued)} per-user syncs: {queued}")
+
+        item = aws.dynamodb.get_item(gmail.PLATFORM_CONNECTIONS_TABLE, {'userId': USER, 'provider': 'gmail'})['Item']
+        print(f"stored: kbHistoryId {item['kbHistoryId']} (mailbox {server.history_id}), "
+              f"kbPendingShards {item['kbPendingShards']}, kbRetryIds {dict(item['kbRetryIds'])}")
+
+
+if __name__ == "__main__":
+    main()
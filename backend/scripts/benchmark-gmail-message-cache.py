@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Gmail message cache in gmail-action-handler against a fake Gmail
+server. An agent turn is one /search-emails followed by /read-email on each
+result; turns are run without the cache (previous behaviour), with a cold
+cache, and warm. Then checks that history changes invalidate entries (with one
+batched S3 delete), that an expired watermark drops only that user's entries,
+that a second container reuses the shared S3 tier, and that the in-process tier
+stays under its byte budget.
+
+Run: python backend/scripts/benchmark-gmail-message-cache.py [--latency-ms 30] [--results 10]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from fake_services import FakeAWS, FakeGmailServer, load_lambda_module
+
+USER = 'bench-user'
+SECRETS = {'patchline/gmail-oauth': {'web': {'client_id': 'bench-client', 'client_secret': 'bench-secret',
+                                             'token_uri': 'https://oauth2.googleapis.com/token'}}}
+
+
+def event(path, **values):
+    properties = [{'name': name, 'value': value} for name, value in values.items()]
+    return {'apiPath': path, 'httpMethod': 'POST', 'sessionAttributes': {'userId': USER},
+            'requestBody': {'content': {'application/json': {'properties': properties}}}}
+
+
+def body(response):
+    return json.loads(response['response']['responseBody']['application/json']['body'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Gmail message cache')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Simulated Gmail round trip')
+    parser.add_argument('--results', type=int, default=10, help='Search results read per turn')
+    parser.add_argument('--cache-mb', type=float, default=0.05, help='In-process tier budget for the byte check')
+    args = parser.parse_args()
+
+    with FakeGmailServer(latency_ms=args.latency_ms) as server, FakeAWS(secrets=SECRETS) as aws:
+        os.environ['GMAIL_API_ENDPOINT'] = server.base_url
+        os.environ['GMAIL_BATCH_URI'] = f"{server.base_url}batch/gmail/v1"
+        os.environ['GMAIL_MESSAGE_CACHE_BUCKET'] = 'bench-message-cache'
+        gmail = load_lambda_module('gmail-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+        aws.dynamodb.create_table(gmail.PLATFORM_CONNECTIONS_TABLE, key=('userId', 'provider'))
+        aws.dynamodb.put_item(gmail.PLATFORM_CONNECTIONS_TABLE, {
+            'userId': USER, 'provider': 'gmail', 'accessToken': 'bench-token', 'refreshToken': 'bench-refresh',
+            'tokenExpiry': '2099-01-01T00:00:00', 'gmailUserEmail': 'bench@example.com'})
+        gmail.lambda_handler(event('/read-email', emailId='msg00001'), None)  # build the Gmail service
+
+        def turn():
+            found = body(gmail.lambda_handler(event('/search-emails', query='invoice', maxResults=args.results), None))
+            for email in found['emails']:
+                read = gmail.lambda_handler(event('/read-email', emailId=email['id']), None)
+                assert read['response']['httpStatusCode'] == 200
+            return len(found['emails'])
+
+        def measure(name, fn):
+            server.request_count, aws.s3.call_count = 0, 0
+            start = time.perf_counter()
+            fn()
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{name:<34} {elapsed:>7.0f}ms {server.request_count:>10} {aws.s3.call_count:>8}")
+
+        def new_container():
+            """Fresh in-process tier and history state; the shared S3 tier is kept"""
+            gmail.message_cache.lru.clear()
+            gmail._message_cache_sync.clear()
+
+        cached_get, cache = gmail.get_cached_message, gmail.message_cache
+        gmail.get_cached_message = lambda user_id, service, message_id: gmail.parse_message(
+            service.users().messages().get(userId='me', id=message_id, format='full').execute())
+        gmail.message_cache = gmail.TieredCache('disabled', maxsize=0)
+
+        print(f"Fake Gmail {args.latency_ms:.0f} ms/request; a turn is 1 search + {args.results} reads")
+        print(f"{'scenario':<34} {'time':>9} {'Gmail req':>10} {'S3 calls':>8}")
+        measure('turn, no cache (previous)', turn)
+        gmail.get_cached_message, gmail.message_cache = cached_get, cache
+        measure('turn, cold cache', turn)
+        measure('turn, warm cache', turn)
+        measure('repeat turn x5, warm cache', lambda: [turn() for _ in range(5)])
+        new_container()
+        measure('turn, new container (S3 tier)', turn)
+
+        # Invalidation: a label change and a deletion reach the cache through history().list
+        gmail.GMAIL_MESSAGE_CACHE_CHECK_SECONDS = 0
+        target, doomed = 'msg00003', 'msg00006'
+        for message_id in (target, doomed):
+            gmail.lambda_handler(event('/read-email', emailId=message_id), None)
+        server.modify_labels(target, remove=['UNREAD'], add=['STARRED'])
+        server.delete_message(doomed)
+        aws.s3.call_count = 0
+        gmail.refresh_message_cache(USER, gmail.get_user_gmail_service(USER), force=True)
+        assert aws.s3.call_count == 1, aws.s3.call_count  # both entries in one DeleteObjects
+        labels = body(gmail.lambda_handler(event('/read-email', emailId=target), None))['labels']
+        deleted = gmail.lambda_handler(event('/read-email', emailId=doomed), None)['response']['httpStatusCode']
+        assert 'STARRED' in labels and 'UNREAD' not in labels, labels
+        assert deleted == 500, deleted  # Gmail's 404 surfaces as the handler's error response
+        print(f"\nafter relabel + delete: labels {labels}, deleted message -> HTTP {deleted}")
+
+        # An expired watermark drops this user's in-process entries, not everyone's
+        other_key = gmail.message_cache_key('other-user', target)
+        gmail.message_cache.put(other_key, {'id': target}, 60)
+        gmail._message_cache_sync[USER]['history_id'] = '1'
+        gmail.refresh_message_cache(USER, gmail.get_user_gmail_service(USER), force=True)
+        assert gmail.message_cache.peek(gmail.message_cache_key(USER, target)) is None
+        assert gmail.message_cache.peek(other_key) is not None, 'another user\'s entries were evicted'
+        print(f"expired watermark: {USER}'s entries dropped, other-user's kept")
+
+        # Byte budget: read every message through a small in-process tier
+        gmail.message_cache = gmail.TieredCache('bench', maxsize=100_000, max_bytes=int(args.cache_mb * 1024 * 1024))
+        gmail.GMAIL_MESSAGE_CACHE_CHECK_SECONDS = 30
+        for message_id in list(server.messages)[:200]:
+            gmail.lambda_handler(event('/read-email', emailId=message_id), None)
+        stats = gmail.message_cache.stats()
+        assert stats['lru_bytes'] <= gmail.message_cache.lru.max_bytes
+        print(f"200 reads with a {args.cache_mb} MB budget: {stats['lru_size']} entries, {stats['lru_bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
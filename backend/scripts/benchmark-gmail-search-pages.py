@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark paginated /search-emails in gmail-action-handler against a fake Gmail server.
+Walks every result of a search with the continuation cursor, with the agent taking
+--think-ms between calls, once with next-page prefetch disabled and once enabled,
+and checks every response stays under the Bedrock response byte budget.
+
+Run: python backend/scripts/benchmark-gmail-search-pages.py [--latency-ms 30] [--messages 500] [--page-size 100]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+
+from fake_services import FakeAWS, FakeGmailServer, load_lambda_module
+
+USER = 'bench-user'
+SECRETS = {'patchline/gmail-oauth': {'web': {'client_id': 'bench-client', 'client_secret': 'bench-secret',
+                                             'token_uri': 'https://oauth2.googleapis.com/token'}}}
+
+
+def search_event(query, page_size, cursor=None):
+    properties = [{'name': 'query', 'value': query}, {'name': 'maxResults', 'value': str(page_size)}]
+    if cursor:
+        properties.append({'name': 'cursor', 'value': cursor})
+    return {'apiPath': '/search-emails', 'httpMethod': 'POST', 'sessionAttributes': {'userId': USER},
+            'requestBody': {'content': {'application/json': {'properties': properties}}}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark paginated Gmail search')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Simulated Gmail round trip')
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--think-ms', type=float, default=300.0, help='Agent time between pages')
+    args = parser.parse_args()
+
+    with FakeGmailServer(latency_ms=args.latency_ms, message_count=args.messages) as server, \
+            FakeAWS(secrets=SECRETS) as aws:
+        os.environ['GMAIL_API_ENDPOINT'] = server.base_url
+        os.environ['GMAIL_BATCH_URI'] = f"{server.base_url}batch/gmail/v1"
+        gmail = load_lambda_module('gmail-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+        aws.dynamodb.create_table(gmail.PLATFORM_CONNECTIONS_TABLE, key=('userId', 'provider'))
+        aws.dynamodb.put_item(gmail.PLATFORM_CONNECTIONS_TABLE, {
+            'userId': USER, 'provider': 'gmail', 'accessToken': 'bench-token', 'refreshToken': 'bench-refresh',
+            'tokenExpiry': '2099-01-01T00:00:00', 'gmailUserEmail': 'bench@example.com'})
+
+        def walk():
+            """Every result of one search; per-call latencies and response sizes"""
+            cursor, seen, timings, sizes = None, [], [], []
+            while True:
+                start = time.perf_counter()
+                response = gmail.lambda_handler(search_event('label:inbox', args.page_size, cursor), None)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response['response']['httpStatusCode'] == 200
+                payload = response['response']['responseBody']['application/json']['body']
+                sizes.append(len(json.dumps(response)))
+                body = json.loads(payload)
+                seen.extend(email['id'] for email in body['emails'])
+                cursor = body.get('nextCursor')
+                if not cursor:
+                    return seen, timings, sizes
+                time.sleep(args.think_ms / 1000)
+
+        gmail.lambda_handler(search_event('warmup', 1), None)  # build the Gmail service
+        start_prefetch = gmail.start_search_prefetch
+        modes = {'no prefetch': lambda *a, **k: None, 'prefetch': start_prefetch}
+
+        print(f"Fake Gmail {args.latency_ms:.0f} ms/request, {args.messages} messages, page size {args.page_size}, "
+              f"agent think time {args.think_ms:.0f} ms, budget {gmail.GMAIL_SEARCH_RESPONSE_BYTES} bytes")
+        print(f"{'mode':<12} {'calls':>6} {'results':>8} {'p50':>8} {'max':>8} {'search time':>12} {'max bytes':>10}")
+        for mode, fn in modes.items():
+            gmail.start_search_prefetch = fn
+            gmail._search_prefetch.clear()
+            seen, timings, sizes = walk()
+            assert len(seen) == len(set(seen)) == args.messages, (len(seen), len(set(seen)))
+            assert max(sizes) <= 25 * 1024
+            print(f"{mode:<12} {len(timings):>6} {len(seen):>8} {statistics.median(timings):>6.1f}ms "
+                  f"{max(timings):>6.1f}ms {sum(timings):>10.0f}ms {max(sizes):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark Gmail metadata fetching for /search-emails against a local fake Gmail server.
+Compares the old one-request-per-message loop with the batched fetch path.
+
+Run: python backend/scripts/benchmark-gmail-search.py [--latency-ms 30] [--rounds 3]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from fake_services import FakeGmailServer, load_lambda_module
+
+
+def fetch_sequential(service, message_ids):
+    """Previous behaviour: one messages().get round trip per message"""
+    results = {}
+    for message_id in message_ids:
+        results[message_id] = service.users().messages().get(
+            userId='me', id=message_id, format='metadata'
+        ).execute()
+    return results
+
+
+def time_call(fn, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched Gmail metadata fetch')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Simulated round trip per HTTP request')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100])
+    args = parser.parse_args()
+
+    with FakeGmailServer(latency_ms=args.latency_ms) as server:
+        os.environ['GMAIL_BATCH_URI'] = f"{server.base_url}batch/gmail/v1"
+        gmail = load_lambda_module('gmail-action-handler.py')
+
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+
+        service = build(
+            'gmail', 'v1',
+            credentials=Credentials(token='fake-token'),
+            client_options={'api_endpoint': server.base_url},
+            static_discovery=True,
+            cache_discovery=False,
+        )
+
+        print(f"Fake Gmail at {server.base_url} ({args.latency_ms:.0f} ms/request, "
+              f"batch cap {gmail.GMAIL_BATCH_MAX_CONCURRENCY})")
+        print(f"{'results':>8} {'sequential':>12} {'batched':>10} {'speedup':>8} {'requests':>14}")
+
+        for size in args.sizes:
+            ids = list(server.messages)[:size]
+
+            server.request_count = 0
+            sequential = time_call(lambda: fetch_sequential(service, ids), args.rounds)
+            sequential_requests = server.request_count // args.rounds
+
+            server.request_count = 0
+            batched = time_call(lambda: gmail.fetch_message_metadata(service, ids), args.rounds)
+            batched_requests = server.request_count // args.rounds
+
+            assert len(gmail.fetch_message_metadata(service, ids)) == size
+
+            print(f"{size:>8} {sequential * 1000:>10.1f}ms {batched * 1000:>8.1f}ms "
+                  f"{sequential / batched:>7.1f}x {sequential_requests:>6} -> {batched_requests:<4}")
+
+
+if __name__ == "__main__":
+    main()
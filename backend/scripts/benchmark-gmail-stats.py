@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark /get-email-stats (and /check-emails) against a local fake Gmail server.
+Compares the old three messages().list calls (reading resultSizeEstimate) with
+labels().get counts fetched in one batch, cached per user on the mailbox historyId.
+
+Run: python backend/scripts/benchmark-gmail-stats.py [--latency-ms 30] [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from fake_services import FakeGmailServer, load_lambda_module
+
+
+def stats_from_list(service):
+    """Previous behaviour: one messages().list per label, sequentially"""
+    return {
+        name: service.users().messages().list(userId='me', labelIds=[label]).execute().get('resultSizeEstimate', 0)
+        for name, label in (('inbox', 'INBOX'), ('sent', 'SENT'), ('unread', 'UNREAD'))
+    }
+
+
+def timed(server, fn, rounds, before=None):
+    """Median ms and HTTP requests per call"""
+    timings, requests = [], []
+    for _ in range(rounds):
+        if before:
+            before()
+        server.request_count = 0
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        requests.append(server.request_count)
+    return statistics.median(timings), statistics.median(requests), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Gmail mailbox stats')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Simulated round trip per HTTP request')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--messages', type=int, default=1500)
+    args = parser.parse_args()
+
+    with FakeGmailServer(latency_ms=args.latency_ms, message_count=args.messages) as server:
+        os.environ['GMAIL_BATCH_URI'] = f"{server.base_url}batch/gmail/v1"
+        gmail = load_lambda_module('gmail-action-handler.py')
+
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+
+        service = build('gmail', 'v1', credentials=Credentials(token='fake-token'),
+                        client_options={'api_endpoint': server.base_url}, static_discovery=True,
+                        cache_discovery=False)
+        labels = gmail.DEFAULT_STATS_LABELS
+
+        def batched():
+            counts, _ = gmail.get_label_stats('bench-user', service, labels)
+            return {label.lower(): counts[label]['messagesTotal'] for label in counts}
+
+        def clear_cache():
+            gmail._label_stats_cache.clear()
+
+        def mailbox_changed():
+            server.history_id += 1
+
+        exact = {label.lower(): server._label(label)['messagesTotal'] for label in labels}
+        scenarios = [
+            ('3x messages().list', lambda: stats_from_list(service), None),
+            ('batch, cold cache', batched, clear_cache),
+            ('batch, unchanged', batched, None),
+            ('batch, mailbox changed', batched, mailbox_changed),
+        ]
+
+        print(f"Fake Gmail at {server.base_url} ({args.latency_ms:.0f} ms/request, {args.messages} messages), "
+              f"median of {args.rounds}")
+        print(f"{'mode':<24} {'latency':>9} {'requests':>9}  counts (exact: {exact})")
+        batched()  # warm the cache for 'unchanged'
+        for name, fn, before in scenarios:
+            ms, requests, result = timed(server, fn, args.rounds, before)
+            accurate = 'exact' if result == exact else 'off'
+            print(f"{name:<24} {ms:>7.1f}ms {requests:>9.0f}  {result} ({accurate})")
+
+
+if __name__ == "__main__":
+    main()
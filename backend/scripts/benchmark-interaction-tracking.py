@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark write-behind interaction tracking in scout-action-handler against fake DynamoDB.
+Invokes lambda_handler with the previous synchronous put_item tracker (raw request body
+as metadata) and with the write-behind writer, on a route that calls Soundcharts and on
+one that doesn't, then compares stored item size and a burst of tracked interactions.
+
+Run: python backend/scripts/benchmark-interaction-tracking.py [--ddb-latency-ms 20] [--api-latency-ms 80]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from fake_services import FakeDynamoDBClient, FakeDynamoDBResource, FakeSoundchartsServer, load_lambda_module
+
+os.environ.setdefault('SOUNDCHARTS_RATE_PER_SECOND', '1000')  # the fake API has no quota
+
+
+def make_event(api_path, method, body_kb, artist=None):
+    """Bedrock action-group event with a request body of roughly body_kb"""
+    properties = [{'name': 'artist_id', 'value': 'artist-123'}, {'name': 'notes', 'value': 'n' * (body_kb * 1024)}]
+    event = {
+        'actionGroup': 'ScoutActions', 'apiPath': api_path, 'httpMethod': method,
+        'sessionAttributes': {'userId': 'bench-user'},
+        'requestBody': {'content': {'application/json': {'properties': properties}}},
+    }
+    if artist:
+        event['parameters'] = [{'name': 'artistName', 'value': artist}]
+    return event
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark write-behind interaction tracking')
+    parser.add_argument('--ddb-latency-ms', type=float, default=20.0)
+    parser.add_argument('--api-latency-ms', type=float, default=80.0)
+    parser.add_argument('--invocations', type=int, default=20)
+    parser.add_argument('--body-kb', type=int, default=20)
+    args = parser.parse_args()
+
+    names = [f"Artist {i}" for i in range(args.invocations)]
+    with FakeSoundchartsServer(latency_ms=args.api_latency_ms, artists=names) as api:
+        scout = load_lambda_module('scout-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+        scout.SOUNDCHARTS_API_BASE = api.base_url.rstrip('/')
+        scout.SOUNDCHARTS_ID, scout.SOUNDCHARTS_TOKEN = 'bench-app', 'bench-key'
+
+        ddb = FakeDynamoDBClient(latency_ms=args.ddb_latency_ms)
+        ddb.create_table(scout.INTERACTIONS_TABLE, key=('userId', 'timestamp'))
+        resource = FakeDynamoDBResource(ddb)
+        scout.dynamodb = resource
+        scout.interaction_writer.resource = resource
+        track_write_behind = scout.track_interaction
+        metadata_bounded = scout.interaction_metadata
+
+        def track_sync(user_id, action, metadata=None):
+            """Previous track_interaction: put_item on the request path"""
+            resource.Table(scout.INTERACTIONS_TABLE).put_item(Item={
+                'interactionId': str(uuid.uuid4()), 'userId': user_id, 'timestamp': datetime.now().isoformat(),
+                'action': f'scout_api_{action.replace("/", "_")}', 'agent': 'scout', 'metadata': metadata or {},
+                'ttl': int(datetime.now().timestamp() + 90 * 24 * 60 * 60),
+            })
+
+        modes = {
+            'sync put_item': (track_sync, lambda body: body),
+            'write-behind': (track_write_behind, metadata_bounded),
+        }
+
+        print(f"DynamoDB {args.ddb_latency_ms:.0f} ms, Soundcharts {args.api_latency_ms:.0f} ms, "
+              f"{args.body_kb} KB request bodies, median of {args.invocations} invocations")
+        print(f"{'route':<16} {'tracker':<14} {'p50':>8} {'max':>8} {'items':>6} {'bytes/item':>11}")
+        for route, method in (('/search/artist', 'GET'), ('/track-artist', 'POST')):
+            for mode, (tracker, metadata) in modes.items():
+                scout.track_interaction, scout.interaction_metadata = tracker, metadata
+                ddb.tables[scout.INTERACTIONS_TABLE] = {}
+                timings = []
+                for i, name in enumerate(names):
+                    scout.soundcharts_cache = scout.TieredCache('soundcharts', scout.SOUNDCHARTS_CACHE_SIZE)
+                    event = make_event(route, method, args.body_kb, artist=name)
+                    start = time.perf_counter()
+                    response = scout.lambda_handler(event, None)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    assert response['response']['httpStatusCode'] == 200
+                items = list(ddb.tables[scout.INTERACTIONS_TABLE].values())
+                assert len(items) == args.invocations  # every interaction is stored before the handler returns
+                size = statistics.mean(len(json.dumps(item, default=str)) for item in items)
+                print(f"{route:<16} {mode:<14} {statistics.median(timings):>6.1f}ms {max(timings):>6.1f}ms "
+                      f"{len(items):>6} {size:>11.0f}")
+
+        # Burst: many interactions inside one invocation (e.g. a fan-out) share batches
+        scout.track_interaction = track_write_behind
+        for count in (25, 100):
+            ddb.tables[scout.INTERACTIONS_TABLE] = {}
+            ddb.call_count = 0
+            start = time.perf_counter()
+            for i in range(count):
+                track_sync('burst-user', f'/burst/{i}')
+            sync_ms = (time.perf_counter() - start) * 1000
+            sync_calls = ddb.call_count
+
+            ddb.call_count = 0
+            start = time.perf_counter()
+            for i in range(count):
+                scout.track_interaction('burst-user', f'/burst/{i}')
+            queued_ms = (time.perf_counter() - start) * 1000
+            scout.interaction_writer.flush()
+            total_ms = (time.perf_counter() - start) * 1000
+            assert len(ddb.tables[scout.INTERACTIONS_TABLE]) == 2 * count
+            print(f"\n{count} interactions: sync {sync_ms:.0f} ms ({sync_calls} calls); write-behind "
+                  f"{queued_ms:.1f} ms to queue, {total_ms:.0f} ms incl. flush ({ddb.call_count} calls)", end='')
+        print(f"\nwriter stats: {scout.interaction_writer.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark network status / fee estimation in blockchain-action-handler against a stub RPC node.
+Fires concurrent callers at a cold container and checks they share one batched
+upstream fetch (getEpochInfo + getRecentPerformanceSamples + getRecentPrioritizationFees),
+compares the percentile computation with a sort-per-percentile baseline, and
+takes the node down to show the cached snapshot / static fallback.
+
+Run: python backend/scripts/benchmark-network-status.py [--latency-ms 50] [--callers 50] [--window 150]
+"""
+
+import argparse
+import logging
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from fake_services import FakeSolanaRPCServer, load_lambda_module
+
+
+def percentiles_sort_each(fees):
+    """Baseline: sort the window again for every percentile"""
+    result = {}
+    for name, pct in (('p25', 25), ('p50', 50), ('p75', 75), ('p95', 95)):
+        ordered = sorted(fees)
+        result[name] = ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark shared network snapshot')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Simulated RPC round trip')
+    parser.add_argument('--callers', type=int, default=50, help='Concurrent requests on a cold container')
+    parser.add_argument('--window', type=int, default=150, help='Prioritization fee samples (slots)')
+    parser.add_argument('--ttl', type=int, default=1)
+    args = parser.parse_args()
+
+    with FakeSolanaRPCServer(latency_ms=args.latency_ms) as server:
+        os.environ['RPC_URL'] = server.base_url
+        os.environ['NETWORK_SNAPSHOT_TTL_SECONDS'] = str(args.ttl)
+        blockchain = load_lambda_module('blockchain-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+
+        rng = random.Random(7)
+        server.priority_fees = [0] * (args.window // 3) + [rng.randint(1, 200_000) for _ in range(args.window - args.window // 3)]
+
+        # Concurrent callers on a cold container
+        server.request_count = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.callers) as pool:
+            fees = list(pool.map(lambda i: blockchain.calculate_transaction_fees('token', 'fast'), range(args.callers)))
+        elapsed = (time.perf_counter() - start) * 1000
+        assert len({fee['fee_lamports'] for fee in fees}) == 1
+        assert all(fee['fee_source'] == 'network' for fee in fees)
+        print(f"Stub RPC {args.latency_ms:.0f} ms, {args.callers} concurrent callers, TTL {args.ttl}s")
+        print(f"  cold: {elapsed:.0f} ms, {server.request_count} HTTP request(s), calls {dict(sorted(server.calls.items()))}")
+        print(f"        without the cache: {args.callers * 3} RPC calls")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            blockchain.calculate_transaction_fees('transfer', 'standard')
+        print(f"  warm: {(time.perf_counter() - start) * 1000:.2f} ms for 1000 estimates, {server.request_count} HTTP request(s) total")
+
+        # Fee math: exact lamports, checked against the window
+        snapshot = blockchain.get_network_snapshot()
+        window = server.priority_fees
+        cuts = statistics.quantiles(window, n=100, method='inclusive')
+        for level, pct in (('slow', 25), ('standard', 50), ('fast', 75), ('urgent', 95)):
+            fee = blockchain.calculate_transaction_fees('token', level)
+            micro = math.ceil(cuts[pct - 1])
+            assert fee['priority_fee_micro_lamports'] == micro, (level, fee, micro)
+            lamports = 5000 + -(-micro * blockchain.COMPUTE_UNITS['token'] // 1_000_000)
+            assert fee['fee_lamports'] == lamports and Decimal(fee['fee_sol']) == Decimal(lamports) / 10 ** 9
+            print(f"  {level:>8}: p{pct} {micro:>7} µlamports/CU -> {fee['fee_sol']} SOL ({fee['estimated_confirmation_time']})")
+        print(f"  tps {snapshot['tps']}, non-vote {snapshot['non_vote_tps']}, slot {snapshot['avg_slot_time_ms']} ms, "
+              f"epoch {snapshot['epoch']} at {snapshot['epoch_progress']:.1%}")
+
+        print(f"\n{'window':>8} {'sort each':>10} {'quantiles':>10}")
+        for size in (150, 1_000, 10_000):
+            sample = [rng.randint(0, 200_000) for _ in range(size)]
+            start = time.perf_counter()
+            for _ in range(100):
+                percentiles_sort_each(sample)
+            baseline = (time.perf_counter() - start) * 10
+            start = time.perf_counter()
+            for _ in range(100):
+                blockchain.fee_percentiles(sample)
+            single = (time.perf_counter() - start) * 10
+            print(f"{size:>8} {baseline:>8.3f}ms {single:>8.3f}ms")
+
+        # Node down: last snapshot served, then static estimate on a cold container
+        server.fail_next = 10 ** 6
+        time.sleep(args.ttl + 0.1)
+        start = time.perf_counter()
+        stale = blockchain.calculate_transaction_fees('transfer', 'standard')
+        down_ms = (time.perf_counter() - start) * 1000
+        assert stale['fee_source'] == 'network'
+        blockchain._network_snapshot.update(data=None, fetched_at=0.0, failed_at=0.0)
+        cold = blockchain.calculate_transaction_fees('transfer', 'standard')
+        start = time.perf_counter()
+        again = blockchain.calculate_transaction_fees('transfer', 'standard')
+        again_ms = (time.perf_counter() - start) * 1000
+        assert cold['fee_source'] == again['fee_source'] == 'estimate'
+        print(f"\nNode down: stale snapshot in {down_ms:.0f} ms ({stale['fee_sol']} SOL), "
+              f"cold -> {cold['fee_sol']} SOL ({cold['fee_source']}), next call {again_ms:.2f} ms (no retry within TTL)")
+
+
+if __name__ == "__main__":
+    main()
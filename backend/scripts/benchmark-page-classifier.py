@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark transaction-page classification on a corpus of synthetic statement pages.
+Compares a per-indicator loop (indicator list rebuilt per page, one re.search
+or substring scan per indicator) with PageClassifier's single compiled pass,
+which must classify every page the same way, edge-case pages included. Per-
+indicator hit counts from scan() are checked against re.findall per indicator.
+
+The previous should_process_page tested its date/amount regexes as plain
+substrings, so they never matched; the pages whose outcome changed now that
+they do are counted.
+
+Run: python backend/scripts/benchmark-page-classifier.py [--pages 2000] [--rounds 3]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from fake_services import load_lambda_module
+
+preprocessor = load_lambda_module('pdf-preprocessor.py')
+
+BANK_TYPES = ['chase-checking', 'chase-sapphire', 'bilt', 'bofa']
+# The previous date/amount regexes, for checking the classifier's hit counts
+PATTERNS = {
+    'dollar_amount': r'\$[\d,]+\.\d{2}',
+    'amount': r'[\d,]+\.\d{2}',
+    'mm_dd_slash': r'\d{1,2}/\d{1,2}',
+    'mm_dd_dash': r'\d{1,2}-\d{1,2}',
+}
+
+
+def legacy_should_process_page(text: str, bank_type: str, evaluate_regexes: bool = True) -> bool:
+    """Previous implementation with its regexes evaluated; evaluate_regexes=False is it verbatim"""
+    text_lower = text.lower()
+    if len(text.strip()) < 100:
+        return False
+    if 'page' in text_lower and 'of' in text_lower and len(text.strip()) < 200:
+        return False
+    transaction_indicators = [
+        r'\d{1,2}/\d{1,2}', r'\d{1,2}-\d{1,2}', r'\$[\d,]+\.\d{2}', r'[\d,]+\.\d{2}',
+        'transaction', 'purchase', 'payment', 'deposit', 'withdrawal',
+        'debit', 'credit', 'balance', 'amount'
+    ]
+    if bank_type == 'chase-sapphire':
+        transaction_indicators.extend(['purchase', 'payment', 'cash advance'])
+    elif bank_type == 'bilt':
+        transaction_indicators.extend(['transaction summary', 'reference number'])
+    elif bank_type == 'bofa':
+        transaction_indicators.extend(['posted transactions', 'pending transactions'])
+    indicator_count = 0
+    for indicator in transaction_indicators:
+        if evaluate_regexes and indicator.startswith(('\\', '[')):
+            if re.search(indicator, text_lower):
+                indicator_count += 1
+        elif indicator in text_lower:
+            indicator_count += 1
+    return indicator_count >= 3
+
+
+def make_corpus(count: int, seed: int = 7) -> list:
+    """Mix of transaction pages, legal/notice pages, short footers and summary pages"""
+    rng = random.Random(seed)
+    legal = ("This statement is provided for informational purposes. Please review it carefully "
+             "and contact us within sixty days regarding any errors. ") * 30
+    pages = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            rows = [f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} PURCHASE AUTHORIZED MERCHANT {i}-{r} "
+                    f"{rng.uniform(1, 2000):,.2f}" for r in range(rng.randint(20, 45))]
+            pages.append("TRANSACTION DETAIL\nDATE DESCRIPTION AMOUNT\n" + "\n".join(rows))
+        elif kind < 0.7:
+            rows = [f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} AUTOPAY THANK YOU "
+                    f"{rng.uniform(1, 2000):,.2f}" for r in range(rng.randint(5, 15))]
+            pages.append("PAYMENTS\n" + "\n".join(rows))
+        elif kind < 0.8:
+            pages.append(legal)
+        elif kind < 0.9:
+            pages.append(f"Page {i} of {count}\nCustomer Service 1-800-555-0100")
+        else:
+            pages.append(f"Account summary\nPrevious balance ${rng.uniform(0, 9000):,.2f}\n"
+                         f"Payments and credits -${rng.uniform(0, 900):,.2f}\nTransaction Summary\n" + legal[:800])
+    return pages
+
+
+def edge_cases() -> list:
+    """Pages near the threshold: adjacent indicators, duplicated and nested keywords, literal patterns"""
+    filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit sed do eiusmod tempor. " * 3
+    pages = [
+        filler + "01/15 02/16 03/17 $1,234.56 12.00 4-5",                    # numbers alone never counted
+        filler + "Purchase Payment",                                          # chase-sapphire: 4, others: 2
+        filler + "purchasepayment",                                           # adjacent keywords
+        filler + "Transaction Summary",                                       # bilt: 2 entries + 'transaction'
+        filler + "posted transactions pending transactions",                  # bofa extras
+        filler + "cash advance credit",
+        filler + "debit credit",
+        filler + "debit credit balance",
+        filler + "$1,234.56 purchase",                                        # dollar amount holds an amount
+        filler + "5/12.00 debit",                                             # date and amount overlap
+        filler + "1-800-555-0100 credit",                                     # phone number reads as MM-DD
+        "Page 1 of 2 transaction purchase payment deposit " + "x" * 60,      # header/footer under 200 chars
+        "transaction purchase payment",                                       # under 100 chars
+        filler + "reference number deposit",
+    ]
+    return pages
+
+
+def throughput(fn, pages, bank_type, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in pages:
+            fn(text, bank_type)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark transaction page classification')
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.pages)
+    print(f"{len(corpus)} synthetic pages, avg {sum(map(len, corpus)) // len(corpus)} chars")
+    print(f"{'bank type':>15} {'verbatim/s':>11} {'loop/s':>11} {'compiled/s':>11} {'vs loop':>8} "
+          f"{'tx pages':>9} {'changed':>8}")
+
+    samples = corpus + edge_cases()
+    for bank_type in BANK_TYPES + ['unknown']:
+        expected = [legacy_should_process_page(text, bank_type) for text in samples]
+        actual = [preprocessor.should_process_page(text, bank_type) for text in samples]
+        assert actual == expected, f"classification differs for {bank_type}"
+        changed = sum(a != legacy_should_process_page(text, bank_type, evaluate_regexes=False)
+                      for a, text in zip(actual[:len(corpus)], corpus))
+
+        classifier = preprocessor.get_page_classifier(bank_type)
+        for text in samples[:200] + edge_cases():
+            expected_counts = {name: len(re.findall(pattern, text.lower())) for name, pattern in PATTERNS.items()}
+            expected_counts.update({name: text.lower().count(keyword) for name, keyword in classifier.keywords.items()})
+            assert classifier.scan(text) == expected_counts, f"hit counts differ for {bank_type}"
+
+        def verbatim(text, bank_type):
+            return legacy_should_process_page(text, bank_type, evaluate_regexes=False)
+
+        old = throughput(verbatim, corpus, bank_type, args.rounds)
+        loop = throughput(legacy_should_process_page, corpus, bank_type, args.rounds)
+        compiled = throughput(preprocessor.should_process_page, corpus, bank_type, args.rounds)
+        print(f"{bank_type:>15} {old:>11,.0f} {loop:>11,.0f} {compiled:>11,.0f} {compiled / loop:>7.1f}x "
+              f"{sum(actual[:len(corpus)]):>9} {changed:>8}")
+    print(f"\n{len(edge_cases())} edge-case pages classified identically for every bank type")
+
+    counts = preprocessor.get_page_classifier('bilt').scan(corpus[0])
+    print("Per-indicator hits on page 1 (bilt):", {k: v for k, v in counts.items() if v})
+
+if __name__ == "__main__":
+    main()
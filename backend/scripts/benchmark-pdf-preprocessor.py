@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark pdf-preprocessor on a synthetic multi-page statement against in-process
+S3 and Textract stand-ins. Compares the previous serial loop (temp file +
+upload_file + start job per page) with the pooled upload/submission path.
+
+Run: python backend/scripts/benchmark-pdf-preprocessor.py [--pages 60] [--s3-ms 40] [--textract-ms 80]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from fake_services import FakeS3Client, FakeTextractClient, load_lambda_module
+
+preprocessor = load_lambda_module('pdf-preprocessor.py')
+
+
+def make_statement(path: str, pages: int):
+    """Statement PDF: a cover page, transaction pages, and every 10th page a notice"""
+    doc = fitz.open()
+    for page_num in range(1, pages + 1):
+        page = doc.new_page()
+        if page_num == 1 or page_num % 10 == 0:
+            page.insert_text((72, 72), f"Important notices - Page {page_num} of {pages}")
+            continue
+        y = 72
+        page.insert_text((72, y), "Date  Description  Amount  Balance  TRANSACTION DETAIL")
+        for row in range(40):
+            y += 16
+            page.insert_text((72, y), f"07/{row % 28 + 1:02d}  PURCHASE AMAZON MKTPL {page_num}-{row}  "
+                                      f"${row * 3.17 + 1:,.2f}  {1000 + row * 7.5:,.2f}", fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def process_pdf_serial(pdf_path, bucket, document_id, bank_type):
+    """Previous behaviour: each transaction page written to a temp file, uploaded and submitted in turn"""
+    doc = fitz.open(pdf_path)
+    transaction_pages = []
+    for page_num in range(len(doc)):
+        if not preprocessor.should_process_page(doc[page_num].get_text(), bank_type):
+            continue
+        page_doc = fitz.open()
+        page_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        page_key = f"preprocessed/{document_id}/page_{page_num + 1}.pdf"
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_page:
+            page_doc.save(tmp_page.name)
+            preprocessor.s3.upload_file(tmp_page.name, bucket, page_key)
+            os.unlink(tmp_page.name)
+        page_doc.close()
+        job_id = preprocessor.start_textract_job(bucket, page_key, document_id, page_num + 1)
+        transaction_pages.append({'page_num': page_num + 1, 's3_key': page_key, 'job_id': job_id})
+    doc.close()
+    return transaction_pages
+
+
+def run(fn, args, pdf_path):
+    preprocessor.s3 = FakeS3Client(latency_ms=args.s3_ms)
+    preprocessor.textract = FakeTextractClient(latency_ms=args.textract_ms)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(pdf_path, 'bench-bucket', 'bench-doc', 'chase-checking')
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF preprocessing')
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--s3-ms', type=float, default=40.0, help='Simulated S3 PutObject round trip')
+    parser.add_argument('--textract-ms', type=float, default=80.0, help='Simulated StartDocumentAnalysis round trip')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, 'statement.pdf')
+        make_statement(pdf_path, args.pages)
+
+        serial, serial_pages = run(process_pdf_serial, args, pdf_path)
+        pooled, result = run(preprocessor.process_pdf, args, pdf_path)
+
+    assert [p['page_num'] for p in result['transaction_pages']] == [p['page_num'] for p in serial_pages]
+    print(f"{args.pages}-page statement, {len(serial_pages)} transaction pages "
+          f"(S3 {args.s3_ms:.0f} ms, Textract {args.textract_ms:.0f} ms per call)")
+    print(f"{'serial':>22}: {serial * 1000:8.0f} ms")
+    print(f"{'pooled (' + str(preprocessor.PDF_UPLOAD_CONCURRENCY) + ' workers)':>22}: "
+          f"{pooled * 1000:8.0f} ms  ({serial / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
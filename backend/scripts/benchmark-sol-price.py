@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark SOL price lookups in blockchain-action-handler against a slow fake price feed.
+Compares a fresh feed request per call (previous behaviour) with the TTL cache
+and its stale-while-revalidate refresh, then takes the feed down.
+
+Run: python backend/scripts/benchmark-sol-price.py [--latency-ms 300] [--calls 20]
+"""
+
+import argparse
+import logging
+import os
+import time
+import urllib.request
+
+from fake_services import FakePriceServer, load_lambda_module
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def fetch_every_call(url):
+    """Previous get_sol_price: one feed request per call"""
+    with urllib.request.urlopen(urllib.request.Request(url), timeout=5) as response:
+        return response.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached SOL price lookups')
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Simulated price feed latency')
+    parser.add_argument('--calls', type=int, default=20, help='Price lookups per phase')
+    parser.add_argument('--ttl', type=int, default=1)
+    args = parser.parse_args()
+
+    with FakePriceServer(latency_ms=args.latency_ms) as feed:
+        os.environ['SOL_PRICE_URL'] = f"{feed.base_url}api/v3/simple/price?ids=solana&vs_currencies=usd"
+        os.environ['SOL_PRICE_TTL_SECONDS'] = str(args.ttl)
+        blockchain = load_lambda_module('blockchain-action-handler.py')
+        logging.getLogger().setLevel(logging.ERROR)
+
+        total, _ = timed(lambda: [fetch_every_call(os.environ['SOL_PRICE_URL']) for _ in range(args.calls)])
+        print(f"Feed latency {args.latency_ms:.0f} ms, TTL {args.ttl}s")
+        print(f"  uncached: {args.calls} lookups in {total:.0f} ms ({total / args.calls:.1f} ms each)")
+
+        cold_ms, cold = timed(blockchain.get_sol_price_quote)
+        warm_ms, _ = timed(lambda: [blockchain.get_sol_price_quote() for _ in range(args.calls - 1)])
+        print(f"  cached:   first lookup {cold_ms:.0f} ms ({cold['source']}), "
+              f"next {args.calls - 1} in {warm_ms:.2f} ms total")
+
+        time.sleep(args.ttl + 0.1)
+        feed.price = 155.0
+        stale_ms, stale = timed(blockchain.get_sol_price_quote)
+        time.sleep(args.latency_ms / 1000 + 0.2)
+        fresh = blockchain.get_sol_price_quote()
+        print(f"  after TTL: {stale_ms:.2f} ms -> {stale['price']} ({stale['source']}, "
+              f"age {stale['age_seconds']}s); after background refresh -> {fresh['price']} ({fresh['source']})")
+
+        feed.fail = True
+        blockchain._sol_price_cache.update(price=None, fetched_at=0.0, failed_at=0.0, refreshing=False)
+        down_ms, down = timed(blockchain.get_sol_price_quote)
+        next_ms, _ = timed(lambda: [blockchain.get_sol_price_quote() for _ in range(args.calls - 1)])
+        print(f"  feed down (cold): first lookup {down_ms:.0f} ms -> {down['price']} ({down['source']}), "
+              f"next {args.calls - 1} in {next_ms:.2f} ms total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark multi-wallet balance lookups against a local stub Solana RPC server.
+Compares the previous pattern (new urllib connection + getBalance per wallet),
+getBalance over the pooled keep-alive client, and getMultipleAccounts.
+
+Run: python backend/scripts/benchmark-solana-rpc.py [--latency-ms 20] [--sizes 1 10 100]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+
+from fake_services import FakeSolanaRPCServer, load_lambda_module
+
+solana_rpc = load_lambda_module('solana_rpc.py', 'solana_rpc')
+
+
+def get_balance_urllib(url, address):
+    """Previous get_wallet_balance: a fresh request/connection per wallet"""
+    payload = {"jsonrpc": "2.0", "id": 1, "method": "getBalance", "params": [address]}
+    req = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return json.loads(response.read().decode())['result']['value']
+
+
+def time_call(fn, rounds):
+    timings = []
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Solana RPC balance lookups')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Simulated RPC round trip')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    wallets = [f"Wallet{i:038d}"[:44] for i in range(max(args.sizes))]
+    accounts = {address: (i + 1) * 1_000_000 for i, address in enumerate(wallets)}
+
+    with FakeSolanaRPCServer(latency_ms=args.latency_ms, accounts=accounts) as server:
+        url = server.base_url
+        client = solana_rpc.SolanaRPCClient(url)
+
+        print(f"Stub RPC at {url} ({args.latency_ms:.0f} ms/request)")
+        print(f"{'wallets':>8} {'urllib each':>12} {'pooled each':>12} {'getMultipleAccounts':>20} {'speedup':>8} {'requests':>14}")
+        for size in args.sizes:
+            addresses = wallets[:size]
+            expected = {a: accounts[a] for a in addresses}
+
+            server.request_count = 0
+            urllib_ms, result = time_call(lambda: {a: get_balance_urllib(url, a) for a in addresses}, args.rounds)
+            assert result == expected
+            sequential_requests = server.request_count // args.rounds
+
+            pooled_ms, result = time_call(lambda: {a: client.get_balance(a) for a in addresses}, args.rounds)
+            assert result == expected
+
+            server.request_count = 0
+            batched_ms, result = time_call(lambda: client.get_balances(addresses), args.rounds)
+            assert result == expected
+            batched_requests = server.request_count // args.rounds
+
+            print(f"{size:>8} {urllib_ms:>10.1f}ms {pooled_ms:>10.1f}ms {batched_ms:>18.1f}ms "
+                  f"{urllib_ms / batched_ms:>7.1f}x {sequential_requests:>6} -> {batched_requests:<4}")
+
+        # Retry with jitter: two 503s, then success
+        server.fail_next = 2
+        start = time.perf_counter()
+        balances = client.get_balances(wallets[:10])
+        print(f"\nAfter two 503 responses: {len(balances)} balances in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Soundcharts response cache in scout-action-handler against a slow fake API.
+Replays a skewed artist-search workload (a few hundred artists, some asked about
+far more often) uncached, through a cold container, through a second container
+that only shares the DynamoDB tier, and with concurrent identical searches.
+
+Run: python backend/scripts/benchmark-soundcharts-cache.py [--latency-ms 100] [--requests 200] [--artists 300]
+"""
+
+import argparse
+import logging
+import os
+import random
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fake_services import FakeDynamoDBClient, FakeDynamoDBResource, FakeSoundchartsServer, load_lambda_module
+
+os.environ.setdefault('SOUNDCHARTS_ID', 'bench-app')
+os.environ.setdefault('SOUNDCHARTS_TOKEN', 'bench-key')
+os.environ.setdefault('SOUNDCHARTS_RATE_PER_SECOND', '1000')  # the fake API has no quota
+
+
+def search_uncached(base_url, name):
+    """Previous search_artist_soundcharts: /artist/search then /current/stats on every request"""
+    headers = {'x-app-id': 'bench-app', 'x-api-key': 'bench-key', 'Content-Type': 'application/json'}
+    response = requests.get(f"{base_url}/api/v2/artist/search/{urllib.parse.quote(name)}",
+                            headers=headers, params={'limit': 1}, timeout=30)
+    response.raise_for_status()
+    artist = response.json()['items'][0]
+    stats = requests.get(f"{base_url}/api/v2/artist/{artist['uuid']}/current/stats", headers=headers, timeout=30)
+    return {'id': artist['uuid'], 'stats': stats.json().get('object', {})}
+
+
+def replay(fn, names):
+    start = time.perf_counter()
+    results = [fn(name) for name in names]
+    return (time.perf_counter() - start) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Soundcharts response cache')
+    parser.add_argument('--latency-ms', type=float, default=100.0, help='Simulated Soundcharts round trip')
+    parser.add_argument('--ddb-latency-ms', type=float, default=5.0, help='Simulated DynamoDB round trip')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--artists', type=int, default=300)
+    args = parser.parse_args()
+
+    names = [f"Artist {i}" for i in range(args.artists)]
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(args.artists)]  # Zipf-like popularity
+    workload = [rng.choices(names, weights)[0] for _ in range(args.requests)]
+    # Scouts type names inconsistently; these must still hit the same entry
+    workload = [name.upper() if i % 5 == 0 else f" {name} " if i % 7 == 0 else name for i, name in enumerate(workload)]
+
+    with FakeSoundchartsServer(latency_ms=args.latency_ms, artists=names) as api:
+        scout = load_lambda_module('scout-action-handler.py')
+        logging.getLogger().setLevel(logging.CRITICAL)
+        scout.SOUNDCHARTS_API_BASE = api.base_url.rstrip('/')
+        scout.SOUNDCHARTS_ID, scout.SOUNDCHARTS_TOKEN = 'bench-app', 'bench-key'
+
+        ddb = FakeDynamoDBClient(key='cacheKey', latency_ms=args.ddb_latency_ms)
+
+        def new_container():
+            scout.soundcharts_cache = scout.TieredCache(
+                'soundcharts', scout.SOUNDCHARTS_CACHE_SIZE,
+                scout.DynamoDBCacheTier(scout.SOUNDCHARTS_CACHE_TABLE, FakeDynamoDBResource(ddb)))
+
+        print(f"{args.requests} searches over {len(set(n.strip().casefold() for n in workload))} distinct artists, "
+              f"API {args.latency_ms:.0f} ms, DynamoDB {args.ddb_latency_ms:.0f} ms")
+        print(f"{'phase':<22} {'total':>9} {'per search':>11} {'API calls':>10} {'hit rate':>9}")
+
+        uncached_ms, expected = replay(lambda n: search_uncached(scout.SOUNDCHARTS_API_BASE, n.strip()), workload)
+        print(f"{'uncached':<22} {uncached_ms:>7.0f}ms {uncached_ms / args.requests:>9.1f}ms {api.request_count:>10} {'-':>9}")
+
+        for phase in ('cold container', 'second container'):
+            new_container()
+            api.request_count = 0
+            elapsed, results = replay(scout.search_artist_soundcharts, workload)
+            assert [(r['id'], r['stats']) for r in results] == [(e['id'], e['stats']) for e in expected]
+            stats = scout.soundcharts_cache.stats()
+            print(f"{phase:<22} {elapsed:>7.0f}ms {elapsed / args.requests:>9.1f}ms {api.request_count:>10} {stats['hit_rate']:>9.1%}")
+        print(f"  second container: {stats['lru_hits']} LRU hits, {stats['persistent_hits']} DynamoDB hits, "
+              f"{stats['misses']} misses, {len(ddb.tables[scout.SOUNDCHARTS_CACHE_TABLE])} items in the table")
+
+        # Concurrent identical searches on a fresh container with an empty table collapse to one fetch
+        ddb.tables.clear()
+        new_container()
+        api.request_count = 0
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(lambda i: scout.search_artist_soundcharts('Artist 7'), range(20)))
+        assert len({r['id'] for r in results}) == 1
+        stats = scout.soundcharts_cache.stats()
+        print(f"\n20 concurrent searches for one artist: {api.request_count} API calls "
+              f"({stats['misses']} misses, {stats['shared']} waited on an in-flight fetch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk artist stats retrieval against a rate-limited fake Soundcharts API.
+Compares the previous bare requests.get loop, an unpaced thread pool, and
+SoundchartsClient.fetch_many with and without the token bucket matched to the quota.
+
+Run: python backend/scripts/benchmark-soundcharts-client.py [--latency-ms 80] [--artists 100] [--quota 30]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from fake_services import FakeSoundchartsServer
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'lambda'))
+from soundcharts_client import ARTIST_STATS_PATH, SoundchartsClient, SoundchartsError  # noqa: E402
+
+
+def get_stats_bare(base_url, uuid):
+    """Previous pattern: headers rebuilt and a new connection per call, no retry"""
+    headers = {'x-app-id': 'bench-app', 'x-api-key': 'bench-key', 'Content-Type': 'application/json'}
+    response = requests.get(f"{base_url}{ARTIST_STATS_PATH.format(uuid=uuid)}", headers=headers, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def run(label, api, fn, expected):
+    api.request_count, api.throttled = 0, 0
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for r in results.values() if isinstance(r, Exception))
+    assert all(results[u] == expected[u] for u in expected if not isinstance(results[u], Exception))
+    print(f"{label:<34} {elapsed * 1000:>8.0f}ms {api.request_count:>9} {api.throttled:>6} {failed:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk Soundcharts fetches')
+    parser.add_argument('--latency-ms', type=float, default=80.0, help='Simulated Soundcharts round trip')
+    parser.add_argument('--artists', type=int, default=100)
+    parser.add_argument('--quota', type=float, default=30.0, help='Requests per second the fake API allows')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    names = [f"Artist {i}" for i in range(args.artists)]
+    with FakeSoundchartsServer(latency_ms=args.latency_ms, artists=names, rate_limit=args.quota) as api:
+        base_url = api.base_url.rstrip('/')
+        uuids = list(api.by_uuid)
+        expected = {}
+        for uuid in uuids:
+            expected[uuid] = get_stats_bare(base_url, uuid)
+            time.sleep(1 / args.quota)
+
+        print(f"{args.artists} artists, API {args.latency_ms:.0f} ms, quota {args.quota:.0f} req/s, {args.workers} workers")
+        print(f"{'':<34} {'total':>10} {'requests':>9} {'429s':>6} {'failed':>7}")
+
+        def bare_each(uuid):
+            try:
+                return get_stats_bare(base_url, uuid)
+            except requests.HTTPError as e:
+                return e
+
+        run('bare requests.get, sequential', api, lambda: {u: bare_each(u) for u in uuids}, expected)
+        time.sleep(1)
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            run('bare requests.get, thread pool', api, lambda: dict(zip(uuids, pool.map(bare_each, uuids))), expected)
+        time.sleep(1)
+
+        unpaced = SoundchartsClient('bench-app', 'bench-key', base_url, requests_per_second=1000, burst=1000,
+                                    pool_size=args.workers, max_retries=5)
+        run('fetch_many, unpaced (Retry-After)', api, lambda: unpaced.fetch_many(uuids), expected)
+        time.sleep(1)
+
+        paced = SoundchartsClient('bench-app', 'bench-key', base_url, requests_per_second=args.quota * 0.9,
+                                  burst=args.quota * 0.1, pool_size=args.workers)
+        run('fetch_many, token bucket', api, lambda: paced.fetch_many(uuids), expected)
+
+        # A 404 is not retried and is reported per uuid
+        result = paced.fetch_many(['missing-uuid', uuids[0]])
+        assert isinstance(result['missing-uuid'], SoundchartsError) and result['missing-uuid'].status_code == 404
+        assert result[uuids[0]] == expected[uuids[0]]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark Chase statement parsing on synthetic Textract output of growing size.
+Compares the indexed TextractDocument parser with the previous linear block lookup,
+then streams the same documents from a fake paginated Textract and reports peak
+memory. Pagination and per-page job merging are covered by backend/tests.
+
+Run: python backend/scripts/benchmark-textract-parsing.py [--pages 1 5 10 20] [--legacy-max-pages 10]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from fake_services import FakeTextractClient, load_lambda_module
+
+expense_processor = load_lambda_module('expense-processor.py')
+
+
+def make_textract_document(pages: int, rows_per_page: int = 40) -> dict:
+    """Synthetic get_document_analysis output: one transaction table per page"""
+    blocks = []
+    counter = 0
+
+    def new_id():
+        nonlocal counter
+        counter += 1
+        return f"block-{counter:07d}"
+
+    for page in range(1, pages + 1):
+        blocks.append({'Id': new_id(), 'BlockType': 'PAGE', 'Page': page})
+        cell_ids = []
+        for row in range(1, rows_per_page + 1):
+            day = (row % 28) + 1
+            values = (
+                ['Date', 'Description', 'Reference', 'Amount'] if row == 1 else
+                [f"07/{day:02d}", f"AMAZON MARKETPLACE ORDER {page}-{row}", f"REF{page:03d}{row:04d}", f"{row * 3.17:.2f}"]
+            )
+            for column, value in enumerate(values, start=1):
+                word_ids = []
+                for word in value.split():
+                    word_id = new_id()
+                    blocks.append({'Id': word_id, 'BlockType': 'WORD', 'Text': word, 'Page': page})
+                    word_ids.append(word_id)
+                cell_id = new_id()
+                blocks.append({
+                    'Id': cell_id, 'BlockType': 'CELL', 'RowIndex': row, 'ColumnIndex': column, 'Page': page,
+                    'Relationships': [{'Type': 'CHILD', 'Ids': word_ids}],
+                })
+                cell_ids.append(cell_id)
+            blocks.append({'Id': new_id(), 'BlockType': 'LINE', 'Text': ' '.join(values), 'Page': page})
+        blocks.append({
+            'Id': new_id(), 'BlockType': 'TABLE', 'Page': page,
+            'Relationships': [{'Type': 'CHILD', 'Ids': cell_ids}],
+        })
+    return {'Blocks': blocks}
+
+
+class LegacyChaseParser(expense_processor.ChaseStatementParser):
+    """Previous implementation: every block reference resolved by a linear scan"""
+
+    def parse_textract_output(self, textract_data):
+        expenses = []
+        for item in textract_data.get('Blocks', []):
+            if item['BlockType'] == 'TABLE':
+                expenses.extend(self._parse_legacy_table(item, textract_data))
+        return expenses
+
+    def _parse_legacy_table(self, table_block, full_data):
+        cells = []
+        for relationship in table_block.get('Relationships', []):
+            if relationship['Type'] == 'CHILD':
+                for cell_id in relationship['Ids']:
+                    cell_block = self._get_block_by_id(cell_id, full_data)
+                    if cell_block and cell_block['BlockType'] == 'CELL':
+                        cells.append(cell_block)
+        rows = {}
+        for cell in cells:
+            rows.setdefault(cell.get('RowIndex', 0), []).append(cell)
+        expenses = []
+        for row_index in sorted(rows):
+            if row_index == 1:
+                continue
+            row_cells = sorted(rows[row_index], key=lambda x: x.get('ColumnIndex', 0))
+            if len(row_cells) >= 3:
+                date = self.extract_date(self._get_cell_text(row_cells[0], full_data))
+                desc_text = self._get_cell_text(row_cells[1], full_data)
+                amount = self.extract_amount(self._get_cell_text(row_cells[-1], full_data))
+                if date and amount and desc_text:
+                    expenses.append({'expenseId': self.generate_expense_id(date, str(amount), desc_text)})
+        return expenses
+
+    def _get_block_by_id(self, block_id, full_data):
+        for block in full_data.get('Blocks', []):
+            if block.get('Id') == block_id:
+                return block
+        return None
+
+    def _get_cell_text(self, cell, full_data):
+        text_parts = []
+        for relationship in cell.get('Relationships', []):
+            if relationship['Type'] == 'CHILD':
+                for child_id in relationship['Ids']:
+                    child_block = self._get_block_by_id(child_id, full_data)
+                    if child_block and child_block['BlockType'] in ['WORD', 'LINE']:
+                        text_parts.append(child_block.get('Text', ''))
+        return ' '.join(text_parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Textract statement parsing')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 5, 10, 20, 40])
+    parser.add_argument('--legacy-max-pages', type=int, default=10, help='Skip the slow legacy parser above this size')
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'blocks':>8} {'indexed':>10} {'per page':>10} {'legacy':>10} {'speedup':>8}")
+    for pages in args.pages:
+        data = make_textract_document(pages)
+
+        parser_new = expense_processor.ChaseStatementParser('chase-checking', 'bench-user', 'bench-doc')
+        start = time.perf_counter()
+        parser_new.parse_textract_output(data)
+        indexed = time.perf_counter() - start
+
+        legacy_text, speedup_text = '-', '-'
+        if pages <= args.legacy_max_pages:
+            parser_old = LegacyChaseParser('chase-checking', 'bench-user', 'bench-doc')
+            start = time.perf_counter()
+            parser_old.parse_textract_output(data)
+            legacy = time.perf_counter() - start
+            legacy_text = f"{legacy * 1000:.0f}ms"
+            speedup_text = f"{legacy / indexed:.0f}x"
+
+        print(f"{pages:>6} {len(data['Blocks']):>8} {indexed * 1000:>8.1f}ms "
+              f"{indexed * 1000 / pages:>8.2f}ms {legacy_text:>10} {speedup_text:>8}")
+
+    print("\nStreaming from fake Textract (NextToken every 1000 blocks)")
+    print(f"{'pages':>6} {'calls':>6} {'expenses':>9} {'peak (collect all)':>19} {'peak (streamed)':>16}")
+    for pages in args.pages:
+        data = make_textract_document(pages)
+        client = FakeTextractClient({'job-1': data['Blocks']})
+        job_refs = [{'jobId': 'job-1', 'pageNum': 1}]
+
+        # Baseline: pull every NextToken page into memory, then parse once
+        parser_full = expense_processor.ChaseStatementParser('chase-checking', 'bench-user', 'bench-doc')
+        tracemalloc.start()
+        document = expense_processor.TextractDocument()
+        for response in expense_processor.iter_textract_responses('job-1', client):
+            document.add_blocks(response['Blocks'])
+        parser_full.parse_textract_output(document)
+        full_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del document
+
+        client.call_count = 0
+        parser_stream = expense_processor.ChaseStatementParser('chase-checking', 'bench-user', 'bench-doc')
+        tracemalloc.start()
+        streamed = parser_stream.parse_pages(expense_processor.iter_document_pages(job_refs, client))
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"{pages:>6} {client.call_count:>6} {len(streamed):>9} "
+              f"{full_peak / 1024 / 1024:>17.1f}MB {stream_peak / 1024 / 1024:>14.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark on-chain /get-transaction-history against a stub Solana RPC server and
+an in-process DynamoDB stand-in for the Web3Transactions cache.
+
+Shows the RPC/DynamoDB traffic and latency of a cold page (signatures + batched
+getTransaction + cache write), the same page again (signatures + cache hits),
+a naive one-getTransaction-per-signature loop for comparison, and paging back
+through the whole history with the cursor.
+
+Run: python backend/scripts/benchmark-transaction-history.py [--transfers 200] [--limit 50]
+"""
+
+import argparse
+import logging
+import os
+import time
+
+from fake_services import FakeDynamoDBClient, FakeDynamoDBResource, FakeSolanaRPCServer, load_lambda_module
+
+WALLET = '7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU'
+OTHER = '9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM'
+
+
+def snapshot(server, ddb):
+    return dict(server.calls), ddb.call_count
+
+
+def describe(server, ddb, before):
+    calls, ddb_calls = before
+    delta = {m: n - calls.get(m, 0) for m, n in server.calls.items() if n - calls.get(m, 0)}
+    return f"RPC {delta or '{}'}, DynamoDB requests {ddb.call_count - ddb_calls}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark on-chain transaction history')
+    parser.add_argument('--transfers', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--rpc-latency-ms', type=float, default=20.0)
+    parser.add_argument('--ddb-latency-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with FakeSolanaRPCServer(latency_ms=args.rpc_latency_ms, per_call_ms=1.0) as server:
+        base_time = 1_700_000_000
+        for i in range(args.transfers):
+            sender, recipient = (WALLET, OTHER) if i % 3 else (OTHER, WALLET)
+            # The newest few are confirmed but not finalized yet, so they are never cached
+            server.add_transfer(sender, recipient, (i + 1) * 1_000_000, base_time + i * 60,
+                                finalized=i < args.transfers - 3)
+
+        os.environ['RPC_URL'] = server.base_url
+        blockchain = load_lambda_module('blockchain-action-handler.py')
+        logging.getLogger().setLevel(logging.ERROR)
+
+        ddb = FakeDynamoDBClient(key='transactionId', latency_ms=args.ddb_latency_ms)
+        ddb.create_table(blockchain.TRANSACTIONS_TABLE, key=('transactionId',),
+                         indexes={blockchain.WALLET_TIMESTAMP_INDEX: ('walletAddress', 'timestamp')})
+        blockchain.dynamodb = FakeDynamoDBResource(ddb)
+
+        print(f"{args.transfers} transfers, page size {args.limit}; RPC {args.rpc_latency_ms:.0f} ms/request, "
+              f"DynamoDB {args.ddb_latency_ms:.0f} ms/request")
+
+        client = blockchain.rpc_client()
+        signatures = [info['signature'] for info in client.call('getSignaturesForAddress', [WALLET, {'limit': args.limit}])]
+        start = time.perf_counter()
+        for signature in signatures:
+            client.call('getTransaction', [signature, {'encoding': 'jsonParsed', 'maxSupportedTransactionVersion': 0}])
+        naive_ms = (time.perf_counter() - start) * 1000
+        print(f"  one getTransaction per signature: {naive_ms:7.1f} ms")
+
+        for label in ('cold page (empty cache)', 'same page again'):
+            before = snapshot(server, ddb)
+            start = time.perf_counter()
+            page, cursor = blockchain.get_transaction_history(WALLET, args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  {label:<32}: {elapsed:7.1f} ms, {describe(server, ddb, before)}")
+
+        assert [t['id'] for t in page] == signatures
+        assert all(t['type'] in ('send', 'receive') for t in page)
+
+        before = snapshot(server, ddb)
+        start = time.perf_counter()
+        seen, pages = [t['id'] for t in page], 1
+        while cursor:
+            more, cursor = blockchain.get_transaction_history(WALLET, args.limit, cursor)
+            seen.extend(t['id'] for t in more)
+            pages += 1
+        elapsed = (time.perf_counter() - start) * 1000
+        assert len(seen) == len(set(seen)) == args.transfers
+        print(f"  paged back through {args.transfers} with the cursor ({pages} pages): {elapsed:.1f} ms, "
+              f"{describe(server, ddb, before)}")
+        print(f"  cached transactions: {len(ddb.tables[blockchain.TRANSACTIONS_TABLE])}")
+
+
+if __name__ == "__main__":
+    main()
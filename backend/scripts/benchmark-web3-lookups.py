@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Load test of the blockchain handler's DynamoDB lookups as the Web3 tables grow,
+against an in-process DynamoDB stand-in that charges a round trip per request
+plus a per-item read cost.
+
+For each table size it compares:
+  - the previous single scan with Limit (Limit applies before the filter, so it
+    returns too few rows once the table is bigger than Limit)
+  - a scan paginated until enough rows match (correct, but O(table size))
+  - the GSI / hash-key query path used by the handler now (get_logged_history,
+    the transaction-log side of /get-transaction-history)
+
+Run: python backend/scripts/benchmark-web3-lookups.py [--sizes 1000 10000 100000] [--latency-ms 5]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from fake_services import FakeDynamoDBClient, FakeDynamoDBResource, load_lambda_module
+
+blockchain = load_lambda_module('blockchain-action-handler.py')
+
+WALLET = '7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU'
+USER = 'bench-user'
+HISTORY = 50  # transactions of the benchmarked wallet
+
+
+def populate(client, size):
+    client.create_table(blockchain.TRANSACTIONS_TABLE, key=('transactionId',),
+                        indexes={blockchain.WALLET_TIMESTAMP_INDEX: ('walletAddress', 'timestamp')})
+    client.create_table(blockchain.WALLETS_TABLE, key=('userId', 'walletAddress'))
+    for i in range(size):
+        wallet = WALLET if i % max(1, size // HISTORY) == 0 and i // max(1, size // HISTORY) < HISTORY else f"wallet{i % 997:04d}"
+        client._store(blockchain.TRANSACTIONS_TABLE, {
+            'transactionId': f"tx{i:08d}", 'walletAddress': wallet, 'userId': f"user{i % 997}",
+            'timestamp': f"{1700000000 + i}", 'type': 'send', 'status': 'confirmed', 'amount': '0.1',
+        })
+        client._store(blockchain.WALLETS_TABLE, {
+            'userId': USER if i == size // 2 else f"user{i:08d}", 'walletAddress': f"addr{i:08d}", 'isActive': True,
+        })
+    # Build the fake's partition maps up front so they aren't charged to the first query
+    client._partition(blockchain.TRANSACTIONS_TABLE, blockchain.WALLET_TIMESTAMP_INDEX, WALLET)
+    client._partition(blockchain.WALLETS_TABLE, None, USER)
+
+
+def scan_single(table, limit):
+    """Previous get_transaction_history: one scan, Limit before the filter"""
+    return table.scan(FilterExpression='walletAddress = :addr',
+                      ExpressionAttributeValues={':addr': WALLET}, Limit=limit)['Items']
+
+
+def scan_paginated(table, attr, value, limit=None):
+    """What a correct scan would need: read pages until done"""
+    items, kwargs = [], {'FilterExpression': f'{attr} = :v', 'ExpressionAttributeValues': {':v': value}}
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test Web3 table lookups')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Simulated round trip per request')
+    parser.add_argument('--read-us', type=float, default=1.0, help='Simulated read cost per item examined')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"History page of {args.limit} for a wallet with {HISTORY} transactions; "
+          f"{args.latency_ms:.0f} ms/request + {args.read_us:.1f} us/item read")
+    print(f"{'table rows':>10} | {'scan + Limit':>19} | {'scan (all pages)':>19} | {'query':>13} | "
+          f"{'wallet scan':>11} {'wallet query':>12}")
+
+    for size in args.sizes:
+        client = FakeDynamoDBClient(latency_ms=args.latency_ms, read_us_per_item=args.read_us)
+        populate(client, size)
+        blockchain.dynamodb = FakeDynamoDBResource(client)
+        transactions = blockchain.dynamodb.Table(blockchain.TRANSACTIONS_TABLE)
+        wallets = blockchain.dynamodb.Table(blockchain.WALLETS_TABLE)
+
+        single_ms, single = timed(scan_single, transactions, args.limit)
+        full_ms, full = timed(scan_paginated, transactions, 'walletAddress', WALLET)
+        with contextlib.redirect_stdout(io.StringIO()):
+            query_ms, (page, cursor) = timed(blockchain.get_logged_history, WALLET, args.limit)
+
+        expected = sorted(full, key=lambda i: i['timestamp'], reverse=True)[:args.limit]
+        assert [t['id'] for t in page] == [i['transactionId'] for i in expected]
+
+        # Walk every page with the cursor: all transactions, newest first, no repeats
+        seen = [t['id'] for t in page]
+        while cursor:
+            more, cursor = blockchain.get_logged_history(WALLET, args.limit, blockchain.decode_cursor(cursor)['lastKey'])
+            seen.extend(t['id'] for t in more)
+        assert seen == [i['transactionId'] for i in sorted(full, key=lambda i: i['timestamp'], reverse=True)]
+
+        wallet_scan_ms, _ = timed(scan_paginated, wallets, 'userId', USER)
+        wallet_query_ms, wallet = timed(blockchain.get_user_wallet, USER)
+        assert wallet['userId'] == USER
+
+        print(f"{size:>10} | {single_ms:>6.1f}ms {len(single):>2}/{args.limit:<2} rows | "
+              f"{full_ms:>8.1f}ms {len(full):>3} rows | {query_ms:>5.1f}ms {len(page):>2}/{args.limit:<2} | "
+              f"{wallet_scan_ms:>9.1f}ms {wallet_query_ms:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
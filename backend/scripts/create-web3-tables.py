@@ -7,6 +7,7 @@ Run: python backend/scripts/create-web3-tables.py
 import boto3
 import os
 import sys
+import time
 from botocore.exceptions import ClientError
 
 def get_aws_region():
@@ -45,6 +46,7 @@ def create_web3_tables():
             'attribute_definitions': [
                 {'AttributeName': 'transactionId', 'AttributeType': 'S'},
                 {'AttributeName': 'userId', 'AttributeType': 'S'},
+                {'AttributeName': 'walletAddress', 'AttributeType': 'S'},
                 {'AttributeName': 'timestamp', 'AttributeType': 'S'}
             ],
             'global_secondary_indexes': [
@@ -55,6 +57,15 @@ def create_web3_tables():
                         {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
                     ],
                     'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    # Wallet history lookups in blockchain-action-handler (newest first)
+                    'IndexName': 'walletAddress-timestamp-index',
+                    'KeySchema': [
+                        {'AttributeName': 'walletAddress', 'KeyType': 'HASH'},
+                        {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
                 }
             ],
             'description': 'Web3 transaction history'
@@ -90,6 +101,7 @@ def create_web3_tables():
                 existing_table = dynamodb.Table(table_name)
                 existing_table.load()
                 print(f"✅ Table {table_name} already exists")
+                add_missing_indexes(existing_table, table_config)
                 continue
             except ClientError as e:
                 if e.response['Error']['Code'] != 'ResourceNotFoundException':
@@ -141,6 +153,41 @@ def create_web3_tables():
     
     return True
 
+def add_missing_indexes(table, table_config):
+    """Create GSIs that were added to table_config after the table was created.
+    
+    DynamoDB accepts one new GSI per UpdateTable call, and backfills it in the
+    background, so this waits for each index to become ACTIVE before the next.
+    """
+    existing = {gsi['IndexName'] for gsi in (table.global_secondary_indexes or [])}
+    attribute_types = {a['AttributeName']: a for a in table_config['attribute_definitions']}
+    
+    for gsi in table_config.get('global_secondary_indexes', []):
+        if gsi['IndexName'] in existing:
+            continue
+        
+        print(f"🔨 Adding index {gsi['IndexName']} to {table.name}...")
+        table.meta.client.update_table(
+            TableName=table.name,
+            AttributeDefinitions=[attribute_types[k['AttributeName']] for k in gsi['KeySchema']],
+            GlobalSecondaryIndexUpdates=[{
+                'Create': {
+                    'IndexName': gsi['IndexName'],
+                    'KeySchema': gsi['KeySchema'],
+                    'Projection': gsi['Projection']
+                }
+            }]
+        )
+        
+        print(f"⏳ Waiting for {gsi['IndexName']} to backfill...")
+        while True:
+            time.sleep(10)
+            table.reload()
+            statuses = {i['IndexName']: i['IndexStatus'] for i in table.global_secondary_indexes or []}
+            if statuses.get(gsi['IndexName']) == 'ACTIVE':
+                break
+        print(f"✅ Added {gsi['IndexName']} to {table.name}")
+
 def verify_tables():
     """Verify that all tables were created successfully"""
     
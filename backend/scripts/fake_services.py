@@ -0,0 +1,999 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the external services our Lambda handlers talk to.
+Used by the benchmark scripts so they can run without network access.
+
+Every fake server binds to 127.0.0.1 on a free port, adds a configurable
+per-request latency to simulate the network round trip, and counts the
+HTTP requests it receives.
+"""
+
+import base64
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).parent.parent / 'lambda'
+
+
+def load_lambda_module(handler_file: str, module_name: str = None):
+    """Import a Lambda handler (e.g. 'gmail-action-handler.py') as a module.
+
+    Handler files use dashes so they cannot be imported by name. Boto3
+    clients are created at import time, so a default region is set first.
+    """
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    if str(LAMBDA_DIR) not in sys.path:
+        sys.path.insert(0, str(LAMBDA_DIR))
+
+    module_name = module_name or handler_file.replace('-', '_').replace('.py', '')
+    spec = importlib.util.spec_from_file_location(module_name, LAMBDA_DIR / handler_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeServer:
+    """Base class - subclasses implement handle(method, path, query, headers, body)"""
+
+    def __init__(self, latency_ms: float = 30.0):
+        self.latency_ms = latency_ms
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _dispatch(self):
+                with fake._lock:
+                    fake.request_count += 1
+                time.sleep(fake.latency_ms / 1000.0)
+
+                parsed = urllib.parse.urlparse(self.path)
+                query = dict(urllib.parse.parse_qsl(parsed.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+
+                status, headers, payload = fake.handle(self.command, parsed.path, query, self.headers, body)
+                if isinstance(payload, (dict, list)):
+                    payload = json.dumps(payload).encode('utf-8')
+                    headers.setdefault('Content-Type', 'application/json; charset=UTF-8')
+                elif isinstance(payload, str):
+                    payload = payload.encode('utf-8')
+
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _dispatch
+            do_POST = _dispatch
+            do_PUT = _dispatch
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, method, path, query, headers, body):
+        raise NotImplementedError
+
+
+class FakeGmailServer(FakeServer):
+    """Minimal Gmail REST + batch endpoint.
+
+    Serves messages (list/get/send), attachments (get), drafts
+    (create/send), labels (list/get), history (list) and the profile. Every third message is
+    unread and every fifth was sent by us; `history_id` moves on every send
+    or draft, and add_message(), modify_labels() and delete_message() record
+    history entries. Gets of the message ids in `fail_messages` answer 500. Within a batch the sub-requests are served without the per-request
+    latency (Gmail runs them server side), plus a small per-item cost.
+    """
+
+    def __init__(self, latency_ms: float = 30.0, message_count: int = 500, per_item_ms: float = 0.5):
+        super().__init__(latency_ms)
+        self.per_item_ms = per_item_ms
+        self.messages = {}
+        for i in range(message_count):
+            labels = ['SENT'] if i % 5 == 0 else ['INBOX'] + (['UNREAD'] if i % 3 == 0 else [])
+            text = f"Body of message {i}.\n" * 20
+            self.messages[f"msg{i:05d}"] = {
+                'id': f"msg{i:05d}",
+                'threadId': f"thread{i:05d}",
+                'labelIds': labels,
+                'snippet': f"Snippet for message {i}: " + 'lorem ipsum dolor sit amet ' * 5,  # ~160 chars, like Gmail
+                'payload': {
+                    'mimeType': 'text/plain',
+                    'headers': [
+                        {'name': 'Subject', 'value': f"Subject {i}"},
+                        {'name': 'From', 'value': f"sender{i}@example.com"},
+                        {'name': 'Date', 'value': 'Mon, 1 Jan 2024 10:00:00 +0000'},
+                        {'name': 'To', 'value': 'me@example.com'},
+                        {'name': 'Received', 'value': 'by mx.example.com'},
+                    ],
+                    'body': {'size': len(text), 'data': base64.urlsafe_b64encode(text.encode()).decode()},
+                },
+            }
+        self.drafts = {}
+        self.sent = []
+        self.history_id = 1000
+        self.history = []  # messageAdded records, oldest first
+        self.attachments = {}  # attachmentId -> encoded attachments().get response
+        self.fail_messages = set()
+
+    def add_message(self, labels=('INBOX', 'UNREAD'), text='New message.'):
+        """Deliver a new message (newest first in list results) and record it in history"""
+        i = len(self.messages)
+        message_id = f"msg{i:05d}"
+        self.messages = {message_id: {
+            'id': message_id, 'threadId': f"thread{i:05d}", 'labelIds': list(labels), 'snippet': text[:100],
+            'payload': {
+                'mimeType': 'text/plain',
+                'headers': [{'name': 'Subject', 'value': f"Subject {i}"},
+                            {'name': 'From', 'value': f"sender{i}@example.com"},
+                            {'name': 'Date', 'value': 'Tue, 2 Jan 2024 10:00:00 +0000'}],
+                'body': {'size': len(text), 'data': base64.urlsafe_b64encode(text.encode()).decode()},
+            },
+        }, **self.messages}
+        self.history_id += 1
+        self.history.append({'id': str(self.history_id), 'messagesAdded': [{'message': {
+            'id': message_id, 'threadId': f"thread{i:05d}", 'labelIds': list(labels)}}]})
+        return message_id
+
+    def add_attachment(self, data: bytes, filename='statement.pdf', mime_type='application/pdf', inline=False):
+        """Deliver a message with one attachment; returns (message_id, attachmentId or None if inline).
+
+        The attachments().get response is encoded here, so serving it allocates nothing per request.
+        """
+        message_id = self.add_message(text=f"Attached: {filename}")
+        message = self.messages[message_id]
+        encoded = base64.urlsafe_b64encode(data)
+        body = {'size': len(data)}
+        attachment_id = None
+        if inline:
+            body['data'] = encoded.decode()
+        else:
+            attachment_id = f"att-{message_id}-" + 'A' * 64  # Gmail's ids are long opaque strings
+            self.attachments[attachment_id] = b'{\n  "size": %d,\n  "data": "%s"\n}\n' % (len(data), encoded)
+            body['attachmentId'] = attachment_id
+        text_part = dict(message['payload'], partId='0', headers=[])
+        message['payload'] = {
+            'mimeType': 'multipart/mixed', 'headers': message['payload']['headers'], 'body': {'size': 0},
+            'parts': [text_part, {'partId': '1', 'mimeType': mime_type, 'filename': filename, 'headers': [],
+                                  'body': body}],
+        }
+        return message_id, attachment_id
+
+    def modify_labels(self, message_id, add=(), remove=()):
+        message = self.messages[message_id]
+        message['labelIds'] = [l for l in message['labelIds'] if l not in remove] + list(add)
+        self.history_id += 1
+        record = {'id': str(self.history_id)}
+        ref = {'message': {'id': message_id, 'threadId': message['threadId'], 'labelIds': message['labelIds']}}
+        if add:
+            record['labelsAdded'] = [{**ref, 'labelIds': list(add)}]
+        if remove:
+            record['labelsRemoved'] = [{**ref, 'labelIds': list(remove)}]
+        self.history.append(record)
+
+    def delete_message(self, message_id):
+        message = self.messages.pop(message_id)
+        self.history_id += 1
+        self.history.append({'id': str(self.history_id), 'messagesDeleted': [
+            {'message': {'id': message_id, 'threadId': message['threadId']}}]})
+
+    def handle(self, method, path, query, headers, body):
+        if method == 'POST' and path.rstrip('/').endswith('/batch/gmail/v1'):
+            return self._handle_batch(headers, body)
+        return self._route(method, path, query, body)
+
+    def _label(self, label_id):
+        messages = [m for m in self.messages.values() if label_id in m['labelIds']]
+        unread = [m for m in messages if 'UNREAD' in m['labelIds']]
+        return {'id': label_id, 'name': label_id, 'type': 'system',
+                'messagesTotal': len(messages), 'messagesUnread': len(unread),
+                'threadsTotal': len(messages), 'threadsUnread': len(unread)}
+
+    def _route(self, method, path, query, body=b''):
+        parts = [p for p in path.split('/') if p]
+        if parts[:4] != ['gmail', 'v1', 'users', 'me'] or len(parts) < 5:
+            return 404, {}, {'error': {'code': 404, 'message': f"Unknown path {path}"}}
+        resource, rest = parts[4], parts[5:]
+        if resource == 'history':
+            return self._history(query)
+        if resource == 'profile':
+            return 200, {}, {'emailAddress': 'me@example.com', 'messagesTotal': len(self.messages),
+                             'historyId': str(self.history_id)}
+        if method == 'POST':
+            self.history_id += 1
+        # gmail/v1/users/me/messages[/id | /send]
+        if resource == 'messages':
+            if not rest:
+                max_results = int(query.get('maxResults', 100))
+                start = int(query.get('pageToken', 0))
+                label = query.get('labelIds')  # the q search syntax is not modelled: q matches everything
+                ids = [i for i, m in self.messages.items() if label is None or label in m['labelIds']]
+                response = {
+                    'messages': [{'id': i, 'threadId': self.messages[i]['threadId']}
+                                 for i in ids[start:start + max_results]],
+                    'resultSizeEstimate': min(len(ids), 201),  # Gmail's estimate is capped and rough
+                }
+                if start + max_results < len(ids):
+                    response['nextPageToken'] = str(start + max_results)
+                return 200, {}, response
+            if rest == ['send'] and method == 'POST':
+                self.sent.append(json.loads(body or b'{}'))
+                return 200, {}, {'id': f"sent{len(self.sent):05d}", 'labelIds': ['SENT']}
+            if len(rest) == 3 and rest[1] == 'attachments':
+                if rest[0] not in self.messages or rest[2] not in self.attachments:
+                    return 404, {}, {'error': {'code': 404, 'message': 'Requested entity was not found.'}}
+                return 200, {'Content-Type': 'application/json; charset=UTF-8'}, self.attachments[rest[2]]
+            if rest[0] in self.fail_messages:
+                return 500, {}, {'error': {'code': 500, 'message': 'Backend Error'}}
+            message = self.messages.get(rest[0])
+            if message is None:
+                return 404, {}, {'error': {'code': 404, 'message': 'Requested entity was not found.'}}
+            return 200, {}, message
+        # gmail/v1/users/me/drafts[/send]
+        if resource == 'drafts' and method == 'POST':
+            if rest == ['send']:
+                draft = self.drafts.pop(json.loads(body or b'{}').get('id'), None)
+                if draft is None:
+                    return 404, {}, {'error': {'code': 404, 'message': 'Requested entity was not found.'}}
+                self.sent.append(draft)
+                return 200, {}, {'id': f"sent{len(self.sent):05d}", 'labelIds': ['SENT']}
+            draft_id = f"draft{len(self.drafts):05d}"
+            self.drafts[draft_id] = json.loads(body or b'{}')
+            return 200, {}, {'id': draft_id, 'message': {'id': f"m-{draft_id}"}}
+        # gmail/v1/users/me/labels[/id]
+        if resource == 'labels':
+            if not rest:
+                return 200, {}, {'labels': [{'id': l, 'name': l, 'type': 'system'}
+                                            for l in ('INBOX', 'SENT', 'UNREAD', 'DRAFT', 'SPAM')]}
+            return 200, {}, self._label(rest[0])
+        return 404, {}, {'error': {'code': 404, 'message': f"Unknown path {path}"}}
+
+    def _history(self, query):
+        start_id = int(query['startHistoryId'])
+        if self.history and start_id < int(self.history[0]['id']) - 1:
+            return 404, {}, {'error': {'code': 404, 'message': 'Requested entity was not found.'}}
+        records = [r for r in self.history if int(r['id']) > start_id]
+        start = int(query.get('pageToken', 0))
+        max_results = int(query.get('maxResults', 100))
+        response = {'history': records[start:start + max_results], 'historyId': str(self.history_id)}
+        if start + max_results < len(records):
+            response['nextPageToken'] = str(start + max_results)
+        return 200, {}, response
+
+    def _handle_batch(self, headers, body):
+        content_type = headers.get('Content-Type')
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body)
+
+        boundary = 'batch_fake_gmail_boundary'
+        out = []
+        for part in message.get_payload():
+            content_id = part['Content-ID'].strip('<>')
+            request_line = part.get_payload().splitlines()[0]
+            sub_method, sub_url, _ = request_line.split(' ', 2)
+            parsed = urllib.parse.urlparse(sub_url)
+
+            time.sleep(self.per_item_ms / 1000.0)
+            status, _, payload = self._route(sub_method, parsed.path, dict(urllib.parse.parse_qsl(parsed.query)))
+            reason = 'OK' if status == 200 else 'Not Found'
+
+            out.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {reason}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return 200, {'Content-Type': f"multipart/mixed; boundary={boundary}"}, ''.join(out)
+
+
+class FakeTextractClient:
+    """In-process stand-in for the boto3 Textract client.
+
+    get_document_analysis pages through each job's blocks with NextToken,
+    like the real API (at most MaxResults blocks per response).
+    start_document_analysis registers an empty job and returns its JobId.
+    """
+
+    def __init__(self, jobs: dict = None, latency_ms: float = 0.0):
+        self.jobs = jobs if jobs is not None else {}  # jobId -> list of blocks
+        self.latency_ms = latency_ms
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+    def start_document_analysis(self, DocumentLocation, **kwargs):
+        time.sleep(self.latency_ms / 1000.0)
+        with self._lock:
+            self.call_count += 1
+            job_id = f"job-{len(self.jobs) + 1:05d}"
+            self.jobs[job_id] = []
+        return {'JobId': job_id}
+
+    def get_document_analysis(self, JobId, MaxResults=1000, NextToken=None):
+        with self._lock:
+            self.call_count += 1
+        time.sleep(self.latency_ms / 1000.0)
+        blocks = self.jobs[JobId]
+        start = int(NextToken or 0)
+        response = {
+            'JobStatus': 'SUCCEEDED',
+            'DocumentMetadata': {'Pages': max((b.get('Page', 1) for b in blocks), default=0)},
+            'Blocks': [dict(b) for b in blocks[start:start + MaxResults]],
+        }
+        if start + MaxResults < len(blocks):
+            response['NextToken'] = str(start + MaxResults)
+        return response
+
+
+class FakeS3Client:
+    """In-process stand-in for the boto3 S3 client; objects kept in memory.
+
+    Each call costs one simulated round trip (latency_ms), and calls are
+    thread-safe so the fake can sit behind a worker pool. With
+    keep_bodies=False only each object's size and SHA-256 are kept (in
+    `digests`), so benchmarks of large uploads measure the caller's memory
+    rather than the fake's.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, keep_bodies: bool = True):
+        self.latency_ms = latency_ms
+        self.keep_bodies = keep_bodies
+        self.objects = {}  # (bucket, key) -> bytes
+        self.digests = {}  # (bucket, key) -> (size, sha256 hex), when not keeping bodies
+        self.uploads = {}  # UploadId -> multipart upload in progress
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+    def _store(self, Bucket, Key, body):
+        with self._lock:
+            if self.keep_bodies:
+                self.objects[(Bucket, Key)] = bytes(body)
+            else:
+                self.digests[(Bucket, Key)] = (len(body), hashlib.sha256(body).hexdigest())
+
+    def _round_trip(self):
+        with self._lock:
+            self.call_count += 1
+        time.sleep(self.latency_ms / 1000.0)
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._round_trip()
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        elif hasattr(Body, 'read'):
+            Body = Body.read()
+        self._store(Bucket, Key, Body)
+        return {}
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        with open(Filename, 'rb') as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read())
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._round_trip()
+        if (Bucket, Key) not in self.objects:
+            error = KeyError(f"NoSuchKey: {Key}")
+            error.response = {'Error': {'Code': 'NoSuchKey'}}  # the shape botocore's ClientError carries
+            raise error
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._round_trip()
+        with self._lock:
+            if (Bucket, Key) in self.objects:
+                return {'ContentLength': len(self.objects[(Bucket, Key)])}
+            if (Bucket, Key) in self.digests:
+                return {'ContentLength': self.digests[(Bucket, Key)][0]}
+        error = KeyError(f"Not Found: {Key}")
+        error.response = {'Error': {'Code': '404'}}  # HEAD responses carry no error body
+        raise error
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._round_trip()
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+            self.digests.pop((Bucket, Key), None)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        self._round_trip()
+        if len(Delete['Objects']) > 1000:
+            raise ValueError('MalformedXML: at most 1000 keys per DeleteObjects request')
+        with self._lock:
+            for obj in Delete['Objects']:
+                self.objects.pop((Bucket, obj['Key']), None)
+                self.digests.pop((Bucket, obj['Key']), None)
+        return {} if Delete.get('Quiet') else {'Deleted': [{'Key': obj['Key']} for obj in Delete['Objects']]}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._round_trip()
+        with self._lock:
+            upload_id = f"upload{len(self.uploads) + 1:05d}-{Key}"
+            self.uploads[upload_id] = {'parts': {}, 'next': 1, 'size': 0, 'sha256': hashlib.sha256()}
+        return {'Bucket': Bucket, 'Key': Key, 'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self._round_trip()
+        with self._lock:
+            upload = self.uploads[UploadId]
+            upload['parts'][PartNumber] = Body
+            if not self.keep_bodies:
+                # Hash parts as soon as they are contiguous, so only out-of-order parts are held
+                while upload['next'] in upload['parts']:
+                    part = upload['parts'].pop(upload['next'])
+                    upload['sha256'].update(part)
+                    upload['size'] += len(part)
+                    upload['next'] += 1
+        return {'ETag': f'"{UploadId}-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._round_trip()
+        with self._lock:
+            upload = self.uploads.pop(UploadId)
+            numbers = [p['PartNumber'] for p in MultipartUpload['Parts']]
+            if numbers != list(range(1, len(numbers) + 1)):
+                raise ValueError(f"InvalidPartOrder: {numbers}")
+            if self.keep_bodies:
+                self.objects[(Bucket, Key)] = b''.join(bytes(upload['parts'][n]) for n in numbers)
+            else:
+                if upload['parts'] or upload['next'] != len(numbers) + 1:
+                    raise ValueError(f"InvalidPart: uploaded parts do not match {numbers}")
+                self.digests[(Bucket, Key)] = (upload['size'], upload['sha256'].hexdigest())
+        return {'Bucket': Bucket, 'Key': Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self._round_trip()
+        with self._lock:
+            self.uploads.pop(UploadId, None)
+        return {}
+
+
+class FakeDynamoDBClient:
+    """In-process stand-in for a DynamoDB client (resource-style, plain Python values).
+
+    Items are stored per table under their primary key: `key` is the default
+    key attribute, and create_table registers a composite key and GSIs
+    (IndexName -> (hash, range)) for a table. Every call costs one simulated
+    round trip; `throttle_rate` is the fraction of batch_write_item requests
+    returned as UnprocessedItems, like a table running out of write capacity.
+
+    query serves one partition from a per-index map, so its cost tracks the
+    page size. scan walks the table in storage order, `scan_page_items` at a
+    time (DynamoDB stops a scan page at 1 MB), applying Limit before the
+    filter like the real API. Reads add `read_us_per_item` per item examined.
+    """
+
+    def __init__(self, key: str = 'expenseId', latency_ms: float = 0.0, throttle_rate: float = 0.0, seed: int = 0,
+                 read_us_per_item: float = 0.0, scan_page_items: int = 2000):
+        self.key = key
+        self.latency_ms = latency_ms
+        self.throttle_rate = throttle_rate
+        self.read_us_per_item = read_us_per_item
+        self.scan_page_items = scan_page_items
+        self.tables = {}
+        self.schemas = {}  # table -> {'key': (hash[, range]), 'indexes': {name: (hash, range)}}
+        self.call_count = 0
+        self._partitions = {}  # (table, index) -> {hash value: sorted items}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def create_table(self, TableName, key=None, indexes=None):
+        self.schemas[TableName] = {'key': tuple(key or (self.key,)), 'indexes': dict(indexes or {})}
+        self.tables.setdefault(TableName, {})
+
+    def _round_trip(self, items_read: int = 0):
+        with self._lock:
+            self.call_count += 1
+        time.sleep(self.latency_ms / 1000.0 + items_read * self.read_us_per_item / 1e6)
+
+    def _key_attrs(self, table_name):
+        return self.schemas.get(table_name, {}).get('key', (self.key,))
+
+    def _store(self, table_name, item):
+        attrs = self._key_attrs(table_name)
+        key = item[attrs[0]] if len(attrs) == 1 else tuple(item[a] for a in attrs)
+        self.tables.setdefault(table_name, {})[key] = dict(item)
+        self._partitions = {k: v for k, v in self._partitions.items() if k[0] != table_name}
+        return key
+
+    def put_item(self, TableName, Item):
+        self._round_trip()
+        self._store(TableName, Item)
+        return {}
+
+    def get_item(self, TableName, Key):
+        self._round_trip(1)
+        attrs = self._key_attrs(TableName)
+        item = self.tables.get(TableName, {}).get(Key[attrs[0]] if len(attrs) == 1 else tuple(Key[a] for a in attrs))
+        return {'Item': dict(item)} if item is not None else {}
+
+    def batch_write_item(self, RequestItems):
+        self._round_trip()
+        if sum(len(requests) for requests in RequestItems.values()) > 25:
+            raise ValueError('Too many items requested for the BatchWriteItem call')
+
+        unprocessed = {}
+        for table_name, requests in RequestItems.items():
+            attrs = self._key_attrs(table_name)
+            keys = [tuple((r.get('PutRequest', {}).get('Item') or r['DeleteRequest']['Key'])[a] for a in attrs)
+                    for r in requests]
+            if len(keys) != len(set(keys)):
+                raise ValueError('Provided list of item keys contains duplicates')
+            for request, key in zip(requests, keys):
+                if self._random.random() < self.throttle_rate:
+                    unprocessed.setdefault(table_name, []).append(request)
+                    continue
+                if 'DeleteRequest' in request:
+                    self.tables.get(table_name, {}).pop(key[0] if len(key) == 1 else key, None)
+                    self._partitions = {k: v for k, v in self._partitions.items() if k[0] != table_name}
+                else:
+                    self._store(table_name, request['PutRequest']['Item'])
+        return {'UnprocessedItems': unprocessed}
+
+    def batch_get_item(self, RequestItems):
+        self._round_trip(sum(len(r['Keys']) for r in RequestItems.values()))
+        if sum(len(r['Keys']) for r in RequestItems.values()) > 100:
+            raise ValueError('Too many items requested for the BatchGetItem call')
+
+        responses = {}
+        for table_name, request in RequestItems.items():
+            attrs = self._key_attrs(table_name)
+            table = self.tables.get(table_name, {})
+            found = responses.setdefault(table_name, [])
+            for key in request['Keys']:
+                item = table.get(key[attrs[0]] if len(attrs) == 1 else tuple(key[a] for a in attrs))
+                if item is not None:
+                    found.append(dict(item))
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def _partition(self, table_name, index_name, hash_value):
+        cache_key = (table_name, index_name)
+        if cache_key not in self._partitions:
+            schema = self.schemas[table_name]
+            hash_attr, range_attr = schema['indexes'][index_name] if index_name else (schema['key'] + (None,))[:2]
+            partitions = {}
+            for item in self.tables.get(table_name, {}).values():
+                if hash_attr in item and (range_attr is None or range_attr in item):  # GSIs are sparse
+                    partitions.setdefault(item[hash_attr], []).append(item)
+            table_key = schema['key']
+            for items in partitions.values():
+                items.sort(key=lambda i: (str(i.get(range_attr, '')), tuple(str(i[a]) for a in table_key)))
+            self._partitions[cache_key] = (hash_attr, range_attr, partitions)
+        hash_attr, range_attr, partitions = self._partitions[cache_key]
+        return hash_attr, range_attr, partitions.get(hash_value, [])
+
+    def query(self, TableName, KeyConditionExpression, IndexName=None, ScanIndexForward=True,
+              Limit=None, ExclusiveStartKey=None, **kwargs):
+        """Equality on the partition key (a boto3 Key('attr').eq(value) condition)"""
+        expression = KeyConditionExpression.get_expression()
+        key_condition, hash_value = expression['values']
+        hash_attr, range_attr, items = self._partition(TableName, IndexName, hash_value)
+        assert key_condition.name == hash_attr and expression['operator'] == '='
+        if not ScanIndexForward:
+            items = items[::-1]
+
+        start = 0
+        if ExclusiveStartKey:
+            table_key = self.schemas[TableName]['key']
+            marker = tuple(ExclusiveStartKey[a] for a in table_key)
+            start = next(i + 1 for i, item in enumerate(items) if tuple(item[a] for a in table_key) == marker)
+
+        page = items[start:start + Limit] if Limit else items[start:]
+        self._round_trip(len(page))
+        response = {'Items': [dict(i) for i in page], 'Count': len(page), 'ScannedCount': len(page)}
+        if Limit and len(page) == Limit:  # DynamoDB returns a key whenever Limit is hit
+            last = page[-1]
+            key_attrs = set(self.schemas[TableName]['key']) | {hash_attr} | ({range_attr} if range_attr else set())
+            response['LastEvaluatedKey'] = {a: last[a] for a in key_attrs}
+        return response
+
+    def scan(self, TableName, FilterExpression=None, ExpressionAttributeValues=None, Limit=None,
+             ExclusiveStartKey=None, **kwargs):
+        """Filter as a plain 'attr = :value' string, the form our handlers use"""
+        items = list(self.tables.get(TableName, {}).values())
+        start = int(ExclusiveStartKey['_offset']) if ExclusiveStartKey else 0
+        examined = items[start:start + min(Limit or self.scan_page_items, self.scan_page_items)]
+        self._round_trip(len(examined))
+
+        matched = examined
+        if FilterExpression:
+            attr, placeholder = [part.strip() for part in FilterExpression.split('=')]
+            value = ExpressionAttributeValues[placeholder]
+            matched = [i for i in examined if i.get(attr) == value]
+
+        response = {'Items': [dict(i) for i in matched], 'Count': len(matched), 'ScannedCount': len(examined)}
+        if start + len(examined) < len(items):
+            response['LastEvaluatedKey'] = {'_offset': start + len(examined)}
+        return response
+
+
+class FakeDynamoDBTable:
+    """Table facade over FakeDynamoDBClient, as returned by dynamodb.Table(name)"""
+
+    def __init__(self, client: FakeDynamoDBClient, table_name: str):
+        self.client = client
+        self.table_name = table_name
+
+    def put_item(self, Item):
+        return self.client.put_item(TableName=self.table_name, Item=Item)
+
+    def get_item(self, Key):
+        return self.client.get_item(TableName=self.table_name, Key=Key)
+
+    def query(self, **kwargs):
+        return self.client.query(TableName=self.table_name, **kwargs)
+
+    def scan(self, **kwargs):
+        return self.client.scan(TableName=self.table_name, **kwargs)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None, **kwargs):
+        """'SET a = :x, b = :y' updates only"""
+        self.client._round_trip()
+        attrs = self.client._key_attrs(self.table_name)
+        table = self.client.tables.setdefault(self.table_name, {})
+        key = Key[attrs[0]] if len(attrs) == 1 else tuple(Key[a] for a in attrs)
+        item = table.setdefault(key, dict(Key))
+        assert UpdateExpression.startswith('SET ')
+        for assignment in UpdateExpression[4:].split(','):
+            attr, placeholder = [part.strip() for part in assignment.split('=')]
+            item[attr] = ExpressionAttributeValues[placeholder]
+        return {}
+
+    def delete_item(self, Key):
+        self.client._round_trip()
+        attrs = self.client._key_attrs(self.table_name)
+        self.client.tables.get(self.table_name, {}).pop(Key[attrs[0]] if len(attrs) == 1 else tuple(Key[a] for a in attrs), None)
+        return {}
+
+
+class FakeDynamoDBResource:
+    """Stand-in for boto3.resource('dynamodb') - patch it over a handler's module-level `dynamodb`"""
+
+    def __init__(self, client: FakeDynamoDBClient):
+        self.client = client
+
+    def Table(self, name):
+        return FakeDynamoDBTable(self.client, name)
+
+    def batch_get_item(self, **kwargs):
+        return self.client.batch_get_item(**kwargs)
+
+    def batch_write_item(self, **kwargs):
+        return self.client.batch_write_item(**kwargs)
+
+
+class FakeSecretsManagerClient:
+    """In-process stand-in for the boto3 Secrets Manager client; `secrets` maps SecretId -> dict"""
+
+    def __init__(self, secrets: dict = None, latency_ms: float = 0.0):
+        self.secrets = secrets if secrets is not None else {}
+        self.latency_ms = latency_ms
+        self.call_count = 0
+
+    def get_secret_value(self, SecretId, **kwargs):
+        self.call_count += 1
+        time.sleep(self.latency_ms / 1000.0)
+        if SecretId not in self.secrets:
+            raise KeyError(f"Secrets Manager can't find the specified secret: {SecretId}")
+        return {'Name': SecretId, 'SecretString': json.dumps(self.secrets[SecretId])}
+
+
+class FakeBedrockAgentClient:
+    """In-process stand-in for the boto3 bedrock-agent client: records start_ingestion_job calls"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.ingestion_jobs = []
+
+    def start_ingestion_job(self, knowledgeBaseId, dataSourceId, **kwargs):
+        time.sleep(self.latency_ms / 1000.0)
+        job_id = f"job{len(self.ingestion_jobs):04d}"
+        self.ingestion_jobs.append({'ingestionJobId': job_id, 'knowledgeBaseId': knowledgeBaseId,
+                                    'dataSourceId': dataSourceId})
+        return {'ingestionJob': {'ingestionJobId': job_id, 'status': 'STARTING'}}
+
+
+class FakeLambdaClient:
+    """In-process stand-in for the boto3 Lambda client.
+
+    Every invoke is recorded in `invocations`. A RequestResponse invoke of a
+    function in `handlers` (name -> lambda_handler) runs it in-process and
+    returns its result as the Payload; 'Event' invokes are only queued.
+    """
+
+    def __init__(self, handlers: dict = None, latency_ms: float = 0.0):
+        self.handlers = handlers if handlers is not None else {}
+        self.latency_ms = latency_ms
+        self.invocations = []
+
+    def invoke(self, FunctionName, Payload=b'{}', InvocationType='RequestResponse', **kwargs):
+        time.sleep(self.latency_ms / 1000.0)
+        event = json.loads(Payload)
+        self.invocations.append({'FunctionName': FunctionName, 'InvocationType': InvocationType, 'event': event})
+        if InvocationType == 'Event':
+            return {'StatusCode': 202, 'Payload': io.BytesIO(b'')}
+        if FunctionName not in self.handlers:
+            raise KeyError(f"ResourceNotFoundException: Function not found: {FunctionName}")
+        try:
+            result = self.handlers[FunctionName](event, None)
+        except Exception as e:
+            return {'StatusCode': 200, 'FunctionError': 'Unhandled',
+                    'Payload': io.BytesIO(json.dumps({'errorMessage': str(e)}).encode())}
+        return {'StatusCode': 200, 'Payload': io.BytesIO(json.dumps(result).encode())}
+
+
+class FakeAWS:
+    """moto-style AWS backend: while active, boto3.client()/boto3.resource() return the in-process fakes.
+
+    Handlers build their clients lazily (lazy_init), so entering this before
+    loading a handler routes every DynamoDB, S3, Secrets Manager, Textract,
+    bedrock-agent and Lambda call it makes to the fakes below, each costing `latency_ms`.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, secrets: dict = None):
+        self.dynamodb = FakeDynamoDBClient(latency_ms=latency_ms)
+        self.s3 = FakeS3Client(latency_ms=latency_ms)
+        self.secretsmanager = FakeSecretsManagerClient(secrets, latency_ms=latency_ms)
+        self.textract = FakeTextractClient(latency_ms=latency_ms)
+        self.bedrock_agent = FakeBedrockAgentClient(latency_ms=latency_ms)
+        self.lambda_ = FakeLambdaClient(latency_ms=latency_ms)
+        self._saved = None
+
+    def client(self, service_name, *args, **kwargs):
+        fake = getattr(self, 'lambda_' if service_name == 'lambda' else service_name.replace('-', '_'), None)
+        if fake is None:
+            raise ValueError(f"FakeAWS has no stand-in for {service_name}")
+        return fake
+
+    def resource(self, service_name, *args, **kwargs):
+        if service_name != 'dynamodb':
+            raise ValueError(f"FakeAWS has no resource stand-in for {service_name}")
+        return FakeDynamoDBResource(self.dynamodb)
+
+    def __enter__(self):
+        import boto3
+        self._saved = (boto3.client, boto3.resource)
+        boto3.client, boto3.resource = self.client, self.resource
+        return self
+
+    def __exit__(self, *exc):
+        import boto3
+        boto3.client, boto3.resource = self._saved
+
+
+class FakePriceServer(FakeServer):
+    """CoinGecko simple/price stand-in. Set `price`, or `fail = True` to answer 503."""
+
+    def __init__(self, latency_ms: float = 300.0, price: float = 150.0):
+        super().__init__(latency_ms)
+        self.price = price
+        self.fail = False
+
+    def handle(self, method, path, query, headers, body):
+        if self.fail:
+            return 503, {}, {'status': {'error_message': 'Service Unavailable'}}
+        return 200, {}, {'solana': {'usd': self.price}}
+
+
+class FakeSoundchartsServer(FakeServer):
+    """Soundcharts API stand-in: artist search, current stats and top artists.
+
+    `artists` is a list of names; each gets a stable uuid. `calls` counts
+    requests per endpoint ('search', 'stats', 'top'). With `rate_limit` set,
+    requests beyond that many per second get 429 with Retry-After, counted
+    in `throttled`.
+    """
+
+    def __init__(self, latency_ms: float = 150.0, artists: list = None, rate_limit: float = None,
+                 retry_after: str = '1'):
+        super().__init__(latency_ms)
+        names = artists or [f"Artist {i}" for i in range(500)]
+        self.artists = {name.casefold(): {'uuid': f"11e8-{i:08d}", 'name': name} for i, name in enumerate(names)}
+        self.by_uuid = {artist['uuid']: artist for artist in self.artists.values()}
+        self.calls = {}
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.throttled = 0
+        self._recent = []  # arrival times within the last second
+
+    def _over_limit(self):
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            if len(self._recent) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def _count(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def handle(self, method, path, query, headers, body):
+        if not headers.get('x-app-id') or not headers.get('x-api-key'):
+            return 401, {}, {'errors': [{'message': 'Unauthorized'}]}
+        if self._over_limit():
+            return 429, {'Retry-After': self.retry_after}, {'errors': [{'message': 'Too many requests'}]}
+        parts = path.strip('/').split('/')  # api/v2/...
+        if parts[2:4] == ['artist', 'search']:
+            self._count('search')
+            artist = self.artists.get(urllib.parse.unquote(parts[4]).casefold())
+            items = [{**artist, 'platforms': {'spotify': {'url': f"https://open.spotify.com/artist/{artist['uuid']}"}}}] if artist else []
+            return 200, {}, {'items': items, 'page': {'offset': 0, 'total': len(items)}}
+        if parts[2] == 'artist' and parts[4:] == ['current', 'stats']:
+            self._count('stats')
+            artist = self.by_uuid.get(parts[3])
+            if artist is None:
+                return 404, {}, {'errors': [{'message': 'Artist not found'}]}
+            seed = int(artist['uuid'][-8:])
+            return 200, {}, {'object': {
+                'spotify': {'followers': 10_000 + seed * 1_000, 'monthly_listeners': 50_000 + seed * 3_000},
+                'score': {'value': seed % 100},
+            }}
+        if parts[2:4] == ['top', 'artists']:
+            self._count('top')
+            limit = int(query.get('limit', 10))
+            items = [{**artist, 'stats': {'spotify': {'followers': 10_000 + i * 1_000}}}
+                     for i, artist in enumerate(list(self.by_uuid.values())[:limit])]
+            return 200, {}, {'items': items}
+        return 404, {}, {'errors': [{'message': 'Not found'}]}
+
+
+class FakeSolanaRPCServer(FakeServer):
+    """Solana JSON-RPC stand-in supporting single calls and batches.
+
+    `accounts` maps address -> lamports; add_transfer records SOL transfers
+    for getSignaturesForAddress / getTransaction; `priority_fees` is the
+    getRecentPrioritizationFees window (micro-lamports per CU, oldest first). Within a batch the calls are
+    served without the per-request latency, plus `per_call_ms` each. Set
+    `fail_next` to answer that many HTTP requests with 503 (for retry tests).
+    """
+
+    def __init__(self, latency_ms: float = 20.0, accounts: dict = None, per_call_ms: float = 0.2):
+        super().__init__(latency_ms)
+        self.accounts = accounts or {}
+        self.per_call_ms = per_call_ms
+        self.fail_next = 0
+        self.calls = {}  # method -> count
+        self.transactions = {}  # signature -> getTransaction result
+        self.signatures = {}  # address -> signature infos, newest first
+        self.priority_fees = [0] * 50 + [1000 * i for i in range(1, 101)]
+
+    def handle(self, method, path, query, headers, body):
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return 503, {'Retry-After': '0'}, {'error': 'Service Unavailable'}
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            return 200, {}, [self._call(request, batched=True) for request in payload]
+        return 200, {}, self._call(payload)
+
+    def _call(self, request, batched=False):
+        method, params = request['method'], request.get('params', [])
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if batched:
+            time.sleep(self.per_call_ms / 1000.0)
+        handler = getattr(self, f"rpc_{method}", None)
+        if handler is None:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32601, 'message': 'Method not found'}}
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': handler(*params)}
+
+    def _context(self):
+        return {'slot': 250000000, 'apiVersion': '1.18.0'}
+
+    def rpc_getBalance(self, address, config=None):
+        return {'context': self._context(), 'value': self.accounts.get(address, 0)}
+
+    def rpc_getMultipleAccounts(self, addresses, config=None):
+        config = config or {}
+        data_length = config.get('dataSlice', {}).get('length', 165)
+        value = []
+        for address in addresses:
+            if address not in self.accounts:
+                value.append(None)
+                continue
+            value.append({
+                'lamports': self.accounts[address], 'owner': '11111111111111111111111111111111',
+                'data': ['A' * (data_length * 4 // 3), 'base64'], 'executable': False, 'rentEpoch': 361,
+            })
+        return {'context': self._context(), 'value': value}
+
+    def add_transfer(self, sender, recipient, lamports, block_time, fee=5000, finalized=True):
+        """Record a SOL transfer; returns its signature"""
+        signature = f"sig{len(self.transactions):06d}".ljust(88, 'x')
+        slot = 250000000 + len(self.transactions)
+        self.transactions[signature] = {
+            'slot': slot,
+            'blockTime': block_time,
+            'meta': {
+                'err': None, 'fee': fee,
+                'preBalances': [10_000_000_000, 1_000_000_000, 1],
+                'postBalances': [10_000_000_000 - lamports - fee, 1_000_000_000 + lamports, 1],
+            },
+            'transaction': {
+                'signatures': [signature],
+                'message': {'accountKeys': [
+                    {'pubkey': sender, 'signer': True, 'writable': True},
+                    {'pubkey': recipient, 'signer': False, 'writable': True},
+                    {'pubkey': '11111111111111111111111111111111', 'signer': False, 'writable': False},
+                ]},
+            },
+        }
+        info = {'signature': signature, 'slot': slot, 'blockTime': block_time, 'err': None, 'memo': None,
+                'confirmationStatus': 'finalized' if finalized else 'confirmed'}
+        for address in (sender, recipient):
+            self.signatures.setdefault(address, []).insert(0, info)
+        return signature
+
+    def rpc_getSignaturesForAddress(self, address, config=None):
+        config = config or {}
+        infos = self.signatures.get(address, [])
+        if config.get('before'):
+            index = next((i for i, info in enumerate(infos) if info['signature'] == config['before']), len(infos))
+            infos = infos[index + 1:]
+        return infos[:config.get('limit', 1000)]
+
+    def rpc_getTransaction(self, signature, config=None):
+        return self.transactions.get(signature)
+
+    def rpc_getEpochInfo(self, config=None):
+        return {'absoluteSlot': 250000000, 'blockHeight': 229000000, 'epoch': 578,
+                'slotIndex': 324000, 'slotsInEpoch': 432000, 'transactionCount': 300000000000}
+
+    def rpc_getRecentPerformanceSamples(self, limit=720):
+        return [{'slot': 250000000 - 150 * i, 'numSlots': 150, 'numTransactions': 240000,
+                 'numNonVoteTransactions': 60000, 'samplePeriodSecs': 60} for i in range(limit)]
+
+    def rpc_getRecentPrioritizationFees(self, addresses=None):
+        return [{'slot': 250000000 - len(self.priority_fees) + i, 'prioritizationFee': fee}
+                for i, fee in enumerate(self.priority_fees)]
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Replay / load test for the Bedrock action-group Lambdas.
+
+Builds a Bedrock event for every path in backend/lambda/*-actions-openapi.json
+(or replays recorded events from --events, one JSON event per line) and invokes
+each handler's lambda_handler in-process. Downstream services are local
+stand-ins: FakeAWS for DynamoDB, S3 and Secrets Manager (--aws-latency-ms), and
+fake Gmail, Soundcharts, Solana RPC and CoinGecko servers (--api-latency-ms).
+
+Concurrency is modelled the way Lambda scales: --concurrency containers, each a
+fresh process that serves one invocation at a time (module-level clients and
+caches are per container, never shared between routes). Every container runs
+--warmup invocations, then they all start together and split --requests. The
+report has p50/p95/p99 latency, throughput, peak RSS (largest container) and
+status codes per route. --output saves it as JSON stamped with the commit, and
+--compare prints the change against a saved report (e.g. from the previous commit).
+
+Run: python backend/scripts/load-test.py [--concurrency 4] [--requests 50] [--routes /search-emails ...]
+                                         [--output report.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from fake_services import (FakeAWS, FakeGmailServer, FakePriceServer, FakeSolanaRPCServer, FakeSoundchartsServer,
+                           LAMBDA_DIR, load_lambda_module)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# OpenAPI schema -> handler it documents
+HANDLERS = {
+    'blockchain-actions-openapi.json': 'blockchain-action-handler.py',
+    'gmail-actions-openapi.json': 'gmail-action-handler.py',
+    'legal-actions-openapi.json': 'legal-action-handler.py',
+    'scout-actions-openapi.json': 'scout-action-handler.py',
+}
+
+LOAD_USER = 'load-test-user'
+WALLET = '7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU'
+RECIPIENT = '9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM'
+ATTACHMENT_EMAIL = 'msg00500'  # main() delivers it to the fake Gmail server (after its 500 messages)
+ARTISTS = ['glaive', 'Alice Gas', 'umru'] + [f"Artist {i}" for i in range(50)]
+
+CONTRACT = (
+    "This Recording Agreement is entered into between the Label and the Artist. The Artist grants the Label "
+    "exclusive rights to the masters in perpetuity throughout the universe. Royalty rate: 15% of net receipts. "
+    "Advance: $25,000 recoupable from royalties. Term: three albums. 360 provisions apply to touring and merch. "
+) * 8
+
+# Request values by parameter name; a (path, name) entry overrides it for one route and None leaves it out
+SAMPLE_VALUES = {
+    'query': 'invoice', 'maxResults': '10', 'emailId': 'msg00001', 'labels': 'INBOX,SENT,UNREAD',
+    'to': 'collaborator@example.com', 'subject': 'Load test', 'body': 'Sent by the load test harness.',
+    'artistName': 'glaive', 'artist_id': 'glaive', 'genre': 'hyperpop', 'location': 'US',
+    'career_stage': 'emerging', 'platform': 'spotify', 'notes': 'Strong streaming growth', 'report_type': 'quick',
+    'wallet_address': WALLET, 'address': WALLET, 'recipient_address': RECIPIENT, 'amount_sol': '0.05',
+    'memo': 'Load test', 'limit': '20', 'transaction_type': 'transfer', 'priority_level': 'standard',
+    'contractText': CONTRACT, 'context': 'Independent artist reviewing a first label offer',
+}
+ROUTE_VALUES = {
+    ('/send-email', 'draftId'): None,  # send a new message rather than a draft that doesn't exist
+    ('/search-emails', 'cursor'): None,  # first page
+    ('/export-attachment', 'emailId'): ATTACHMENT_EMAIL,  # its only attachment, so none is named
+    ('/export-attachment', 'attachmentId'): None,
+    ('/export-attachment', 'filename'): None,
+    ('/get-artist-stats', 'artist_id'): '11e8-00000000',  # Soundcharts uuid of ARTISTS[0]
+    ('/get-artist-stats', 'artist_ids'): None,
+    ('/check-wallet-balance', 'wallet_addresses'): None,
+    ('/get-transaction-history', 'cursor'): None,
+}
+# Handlers that read a JSON 'body' string instead of Bedrock's properties list
+BODY_STYLE_HANDLERS = {'legal-action-handler.py'}
+
+SECRETS = {
+    'patchline/gmail-oauth': {'web': {'client_id': 'load-test-client', 'client_secret': 'load-test-secret',
+                                      'token_uri': 'https://oauth2.googleapis.com/token'}},
+    'patchline/soundcharts-api': {'id': 'load-test-app', 'token': 'load-test-key'},
+}
+
+
+def sample_value(path, name, schema):
+    if (path, name) in ROUTE_VALUES:
+        return ROUTE_VALUES[path, name]
+    if name in SAMPLE_VALUES:
+        return SAMPLE_VALUES[name]
+    if 'enum' in schema:
+        return str(schema['enum'][0])
+    return {'integer': '5', 'number': '1.0', 'boolean': 'true', 'array': 'a,b'}.get(schema.get('type'), 'test')
+
+
+def synthetic_event(handler, path, method, operation):
+    """Bedrock action-group event for one OpenAPI operation, filled with SAMPLE_VALUES"""
+    parameters = []
+    for param in operation.get('parameters', []):
+        value = sample_value(path, param['name'], param.get('schema', {}))
+        if value is not None:
+            parameters.append({'name': param['name'], 'type': param.get('schema', {}).get('type', 'string'),
+                               'value': value})
+    event = {
+        'messageVersion': '1.0', 'actionGroup': 'LoadTest', 'apiPath': path, 'httpMethod': method.upper(),
+        'sessionId': 'load-test-session', 'sessionAttributes': {'userId': LOAD_USER}, 'parameters': parameters,
+    }
+
+    schema = operation.get('requestBody', {}).get('content', {}).get('application/json', {}).get('schema', {})
+    if schema.get('properties'):
+        properties = []
+        for name, prop in schema['properties'].items():
+            value = sample_value(path, name, prop)
+            if value is not None:
+                properties.append({'name': name, 'type': prop.get('type', 'string'), 'value': value})
+        if handler in BODY_STYLE_HANDLERS:
+            content = {'body': json.dumps({p['name']: p['value'] for p in properties})}
+        else:
+            content = {'properties': properties}
+        event['requestBody'] = {'content': {'application/json': content}}
+    return event
+
+
+def load_routes(events_file=None):
+    """route key ('POST /search-emails') -> {'handler', 'events'}; every OpenAPI path, or the recorded events"""
+    routes = {}
+    path_handlers = {}
+    for spec_file, handler in HANDLERS.items():
+        spec = json.loads((LAMBDA_DIR / spec_file).read_text(encoding='utf-8'))
+        for path, operations in spec['paths'].items():
+            for method, operation in operations.items():
+                path_handlers[path, method.upper()] = handler
+                if not events_file:
+                    routes[f"{method.upper()} {path}"] = {
+                        'handler': handler, 'events': [synthetic_event(handler, path, method, operation)]}
+
+    if events_file:
+        for line in Path(events_file).read_text(encoding='utf-8').splitlines():
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            key = (event.get('apiPath', ''), event.get('httpMethod', '').upper())
+            if key not in path_handlers:
+                print(f"[WARN] skipping recorded event for {key[1]} {key[0]}: not in any OpenAPI schema")
+                continue
+            route = routes.setdefault(f"{key[1]} {key[0]}", {'handler': path_handlers[key], 'events': []})
+            route['events'].append(event)
+    return routes
+
+
+def seed_tables(aws, module):
+    """Create the tables a handler uses (by its own table-name constants) and the load-test user's data"""
+    ddb = aws.dynamodb
+    if hasattr(module, 'PLATFORM_CONNECTIONS_TABLE'):
+        ddb.create_table(module.PLATFORM_CONNECTIONS_TABLE, key=('userId', 'provider'))
+        ddb.put_item(module.PLATFORM_CONNECTIONS_TABLE, {
+            'userId': LOAD_USER, 'provider': 'gmail', 'accessToken': 'load-test-token',
+            'refreshToken': 'load-test-refresh', 'tokenExpiry': '2099-01-01T00:00:00',
+            'scopes': 'https://www.googleapis.com/auth/gmail.readonly https://www.googleapis.com/auth/gmail.send',
+            'gmailUserEmail': 'load-test@example.com'})
+    if hasattr(module, 'INTERACTIONS_TABLE'):
+        ddb.create_table(module.INTERACTIONS_TABLE, key=('userId', 'timestamp'))
+    if hasattr(module, 'SOUNDCHARTS_CACHE_TABLE'):
+        ddb.create_table(module.SOUNDCHARTS_CACHE_TABLE, key=('cacheKey',))
+    if hasattr(module, 'WALLETS_TABLE'):
+        ddb.create_table(module.WALLETS_TABLE, key=('userId', 'walletAddress'))
+        ddb.put_item(module.WALLETS_TABLE, {'userId': LOAD_USER, 'walletAddress': WALLET,
+                                            'walletType': 'phantom', 'createdAt': '2024-01-01T00:00:00'})
+    if hasattr(module, 'TRANSACTIONS_TABLE'):
+        ddb.create_table(module.TRANSACTIONS_TABLE, key=('transactionId',),
+                         indexes={module.WALLET_TIMESTAMP_INDEX: ('walletAddress', 'timestamp')})
+    ddb.call_count = 0
+
+
+def response_status(response):
+    if not isinstance(response, dict):
+        return 'invalid'
+    return str(response.get('response', {}).get('httpStatusCode') or response.get('statusCode') or 'invalid')
+
+
+def percentile(values, q):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+def run_worker(job):
+    """One container (child process): warm up, wait for the go signal, invoke its share sequentially"""
+    logging.disable(logging.CRITICAL)  # handlers log every request; keep that cost and noise out of the numbers
+    with FakeAWS(latency_ms=job['aws_latency_ms'], secrets=SECRETS) as aws:
+        module = load_lambda_module(job['handler'])
+        if hasattr(module, 'SOUNDCHARTS_API_BASE'):
+            module.SOUNDCHARTS_API_BASE = os.environ['LOAD_TEST_SOUNDCHARTS_URL']
+        seed_tables(aws, module)
+        encoded = [json.dumps(event) for event in job['events']]
+
+        def invoke(i):
+            event = json.loads(encoded[i % len(encoded)])  # handlers may mutate the event
+            start = time.perf_counter()
+            try:
+                status = response_status(module.lambda_handler(event, None))
+            except Exception as e:
+                status = f"raised {type(e).__name__}"
+            return (time.perf_counter() - start) * 1000, status
+
+        warmup = [invoke(i) for i in range(job['warmup'])]
+        aws.dynamodb.call_count = 0
+        print('ready', flush=True)
+        sys.stdin.readline()  # all containers start the measured run together
+
+        start = time.perf_counter()
+        results = [invoke(job['offset'] + i) for i in range(job['requests'])]
+        elapsed = time.perf_counter() - start
+
+    return {
+        'latencies': [ms for ms, _ in results],
+        'statuses': [status for _, status in results],
+        'first_ms': warmup[0][0] if warmup else None,
+        'elapsed': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KB on Linux
+        'dynamodb_calls': aws.dynamodb.call_count,
+    }
+
+
+def run_route(route, args, env):
+    """Start --concurrency containers for one route, release them together, and aggregate"""
+    share, extra = divmod(args.requests, args.concurrency)
+    containers = []
+    with tempfile.TemporaryDirectory() as tmp:
+        offset = 0
+        for index in range(args.concurrency):
+            count = share + (1 if index < extra else 0)
+            job_file = Path(tmp) / f"job-{index}.json"
+            job_file.write_text(json.dumps({
+                'handler': route['handler'], 'events': route['events'], 'requests': count, 'offset': offset,
+                'warmup': args.warmup, 'aws_latency_ms': args.aws_latency_ms}), encoding='utf-8')
+            offset += count
+            stderr = open(Path(tmp) / f"stderr-{index}.log", 'w+', encoding='utf-8')
+            containers.append((subprocess.Popen(
+                [sys.executable, __file__, '--worker', str(job_file)], env=env, cwd=Path(__file__).parent,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr, text=True), stderr))
+
+        def failure(proc, stderr):
+            for other, _ in containers:
+                other.kill()
+                other.wait()
+            stderr.seek(0)
+            return {'handler': route['handler'], 'error': (stderr.read().strip().splitlines() or ['?'])[-1]}
+
+        try:
+            for proc, stderr in containers:
+                line = proc.stdout.readline()
+                while line and line.strip() != 'ready':  # skip anything the handler printed during warmup
+                    line = proc.stdout.readline()
+                if not line:
+                    return failure(proc, stderr)
+            for proc, _ in containers:
+                proc.stdin.write('go\n')
+                proc.stdin.flush()
+            outputs = [proc.communicate(timeout=600)[0] for proc, _ in containers]
+            for proc, stderr in containers:
+                if proc.returncode != 0:
+                    return failure(proc, stderr)
+        finally:
+            for _, stderr in containers:
+                stderr.close()
+    results = [json.loads(stdout.strip().splitlines()[-1]) for stdout in outputs]
+
+    latencies = [ms for r in results for ms in r['latencies']]
+    return {
+        'handler': route['handler'],
+        'requests': len(latencies),
+        'concurrency': args.concurrency,
+        'first_ms': statistics.median(r['first_ms'] for r in results) if args.warmup else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies),
+        'throughput_rps': len(latencies) / max(r['elapsed'] for r in results),
+        'peak_rss_mb': max(r['peak_rss_mb'] for r in results),
+        'statuses': dict(Counter(status for r in results for status in r['statuses'])),
+        'dynamodb_calls': sum(r['dynamodb_calls'] for r in results),
+    }
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    commit = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    dirty = bool(git('status', '--porcelain', '--', 'backend/lambda'))
+    return commit + ('-dirty' if dirty else '')
+
+
+def print_report(report):
+    print(f"commit {report['commit']}, {report['settings']['requests']} requests at concurrency "
+          f"{report['settings']['concurrency']}, AWS {report['settings']['aws_latency_ms']:.0f} ms, "
+          f"APIs {report['settings']['api_latency_ms']:.0f} ms")
+    print(f"{'route':<36} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>7} {'RSS MB':>7} {'statuses':<20}")
+    for route, r in report['routes'].items():
+        if 'error' in r:
+            print(f"{route:<36} worker failed: {r['error']}")
+            continue
+        statuses = ' '.join(f"{status}x{count}" for status, count in sorted(r['statuses'].items()))
+        print(f"{route:<36} {r['p50_ms']:>6.1f}ms {r['p95_ms']:>6.1f}ms {r['p99_ms']:>6.1f}ms "
+              f"{r['throughput_rps']:>7.1f} {r['peak_rss_mb']:>7.1f} {statuses:<20}")
+
+
+def print_comparison(report, baseline):
+    print(f"\nchange vs {baseline['commit']} (negative latency / positive req/s is better)")
+    print(f"{'route':<36} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'RSS':>8}")
+
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+.0f}%" if old else 'n/a'
+
+    for route, r in report['routes'].items():
+        old = baseline['routes'].get(route)
+        if not old or 'error' in old or 'error' in r:
+            print(f"{route:<36} {'(not in both reports)':>8}")
+            continue
+        print(f"{route:<36} {delta(r['p50_ms'], old['p50_ms']):>8} {delta(r['p95_ms'], old['p95_ms']):>8} "
+              f"{delta(r['p99_ms'], old['p99_ms']):>8} {delta(r['throughput_rps'], old['throughput_rps']):>8} "
+              f"{delta(r['peak_rss_mb'], old['peak_rss_mb']):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the action-group Lambdas against local stand-ins')
+    parser.add_argument('--concurrency', type=int, default=4, help='Containers serving the route at once')
+    parser.add_argument('--requests', type=int, default=50, help='Measured invocations per route')
+    parser.add_argument('--warmup', type=int, default=1, help='Unmeasured invocations per route first')
+    parser.add_argument('--aws-latency-ms', type=float, default=10.0)
+    parser.add_argument('--api-latency-ms', type=float, default=50.0)
+    parser.add_argument('--routes', nargs='+', help="Only these paths (e.g. /search-emails)")
+    parser.add_argument('--events', help='Recorded Bedrock events to replay (JSON lines)')
+    parser.add_argument('--output', help='Write the report as JSON')
+    parser.add_argument('--compare', help='Earlier JSON report to compare against')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(Path(args.worker).read_text(encoding='utf-8')))))
+        return
+
+    routes = load_routes(args.events)
+    if args.routes:
+        routes = {key: route for key, route in routes.items() if key.split(' ', 1)[1] in args.routes}
+
+    with FakeGmailServer(latency_ms=args.api_latency_ms) as gmail, \
+            FakeSoundchartsServer(latency_ms=args.api_latency_ms, artists=ARTISTS) as soundcharts, \
+            FakeSolanaRPCServer(latency_ms=args.api_latency_ms, accounts={WALLET: 2_500_000_000}) as rpc, \
+            FakePriceServer(latency_ms=args.api_latency_ms) as price:
+        email_id, _ = gmail.add_attachment(os.urandom(2 * 1024 * 1024))
+        assert email_id == ATTACHMENT_EMAIL, email_id
+        for i in range(30):
+            rpc.add_transfer(WALLET, RECIPIENT, (i + 1) * 1_000_000, 1_700_000_000 + i * 60)
+        env = dict(os.environ,
+                   AWS_DEFAULT_REGION='us-east-1', RPC_URL=rpc.base_url, SOL_PRICE_URL=price.base_url,
+                   GMAIL_API_ENDPOINT=gmail.base_url, GMAIL_BATCH_URI=f"{gmail.base_url}batch/gmail/v1",
+                   LOAD_TEST_SOUNDCHARTS_URL=soundcharts.base_url.rstrip('/'),
+                   SOUNDCHARTS_RATE_PER_SECOND='1000')  # the fake API has no quota
+
+        report = {
+            'commit': git_revision(),
+            'created': datetime.utcnow().isoformat() + 'Z',
+            'python': sys.version.split()[0],
+            'settings': {key: getattr(args, key) for key in
+                         ('concurrency', 'requests', 'warmup', 'aws_latency_ms', 'api_latency_ms', 'events')},
+            'routes': {},
+        }
+        for key, route in routes.items():
+            report['routes'][key] = run_route(route, args, env)
+
+    print_report(report)
+    if args.compare:
+        print_comparison(report, json.loads(Path(args.compare).read_text(encoding='utf-8')))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"\nreport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
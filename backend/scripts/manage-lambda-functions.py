@@ -65,7 +65,8 @@ LAMBDA_FUNCTIONS = {
         {
             'name': 'legal-action-handler',
             'handler_file': 'legal-action-handler.py',
-            'description': 'Legal contract analysis handler'
+            'description': 'Legal contract analysis handler',
+            'requirements': ['PyMuPDF==1.23.26']  # load_contract_text reads PDF contracts exported from Gmail
         }
     ],
     'blockchain': [
@@ -139,7 +140,8 @@ def get_or_create_lambda_role() -> str:
         'arn:aws:iam::aws:policy/AmazonDynamoDBFullAccess',
         'arn:aws:iam::aws:policy/SecretsManagerReadWrite',
         'arn:aws:iam::aws:policy/AmazonS3FullAccess',
-        'arn:aws:iam::aws:policy/AmazonBedrockFullAccess'
+        'arn:aws:iam::aws:policy/AmazonBedrockFullAccess',
+        'arn:aws:iam::aws:policy/service-role/AWSLambdaRole'  # gmail-action-handler invokes the document pipelines
     ]
     
     for policy in policies:
@@ -156,8 +158,13 @@ def get_or_create_lambda_role() -> str:
 # DEPLOYMENT PACKAGE
 # ---------------------------------------------------------------------------
 
-def create_deployment_package(function_name: str, handler_file: str) -> bytes:
-    """Create deployment package with Lambda code and dependencies."""
+def create_deployment_package(function_name: str, handler_file: str, requirements: Optional[list] = None) -> bytes:
+    """Create deployment package with Lambda code and dependencies.
+    
+    `requirements` are extra packages for this function only. They are
+    installed as manylinux wheels for the Lambda runtime, so packages with
+    native code (PyMuPDF) work whatever machine builds the zip.
+    """
     lambda_src_dir = get_project_root() / 'backend' / 'lambda'
     source_path = lambda_src_dir / handler_file
     
@@ -171,7 +178,7 @@ def create_deployment_package(function_name: str, handler_file: str) -> bytes:
         (tmp_path / 'index.py').write_text(source_path.read_text(encoding='utf-8'))
         
         # Only copy essential shared files (like debug_logger.py)
-        essential_files = ['debug_logger.py']  # Add other shared modules here if needed
+        essential_files = ['debug_logger.py', 'solana_rpc.py', 'tiered_cache.py', 'soundcharts_client.py', 'write_behind.py', 'lazy_init.py']  # Add other shared modules here if needed
         for filename in essential_files:
             py_file = lambda_src_dir / filename
             if py_file.exists() and py_file.name != handler_file:
@@ -190,6 +197,19 @@ def create_deployment_package(function_name: str, handler_file: str) -> bytes:
                 '--quiet'
             ], check=True)
         
+        if requirements:
+            print(f"[INFO] Installing {', '.join(requirements)} for {function_name}...")
+            python_version = os.environ.get('LAMBDA_RUNTIME', 'python3.9').replace('python', '')
+            subprocess.run([
+                sys.executable, '-m', 'pip', 'install', *requirements,
+                '-t', str(tmp_path),
+                '--platform', 'manylinux2014_x86_64',
+                '--implementation', 'cp',
+                '--python-version', python_version,
+                '--only-binary=:all:',
+                '--quiet'
+            ], check=True)
+        
         # Create zip
         zip_bytes_io = tempfile.SpooledTemporaryFile()
         with zipfile.ZipFile(zip_bytes_io, 'w', zipfile.ZIP_DEFLATED) as zf:
@@ -272,7 +292,7 @@ def deploy_lambda_function(function_config: Dict, role_arn: str, env_vars: Dict,
     
     try:
         # Create deployment package
-        zip_bytes = create_deployment_package(function_name, handler_file)
+        zip_bytes = create_deployment_package(function_name, handler_file, function_config.get('requirements'))
         
         # Check if function exists
         try:
@@ -352,7 +372,7 @@ def deploy_lambda_function(function_config: Dict, role_arn: str, env_vars: Dict,
 # SUPPORTING RESOURCES
 # ---------------------------------------------------------------------------
 
-def ensure_dynamodb_table(table_name: str):
+def ensure_dynamodb_table(table_name: str, key: str = 'userId', ttl_attribute: str = None):
     """Ensure DynamoDB table exists."""
     try:
         dynamodb.describe_table(TableName=table_name)
@@ -360,12 +380,17 @@ def ensure_dynamodb_table(table_name: str):
     except dynamodb.exceptions.ResourceNotFoundException:
         dynamodb.create_table(
             TableName=table_name,
-            KeySchema=[{'AttributeName': 'userId', 'KeyType': 'HASH'}],
-            AttributeDefinitions=[{'AttributeName': 'userId', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
             BillingMode='PAY_PER_REQUEST'
         )
         print(f"[SUCCESS] Created DynamoDB table: {table_name}")
         dynamodb.get_waiter('table_exists').wait(TableName=table_name)
+        if ttl_attribute:
+            dynamodb.update_time_to_live(
+                TableName=table_name,
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': ttl_attribute}
+            )
 
 def ensure_s3_bucket(bucket_name: str):
     """Ensure S3 bucket exists."""
@@ -514,6 +539,10 @@ def main():
             'DEBUG_MODE': 'dev',  # Enable debug logging
         'PATCHLINE_SECRETS_ID': 'patchline/gmail-oauth',
         'SOUNDCHARTS_SECRET_ID': 'patchline/soundcharts-api',
+        'SOUNDCHARTS_CACHE_TABLE': 'SoundchartsCache-staging',
+        # Email Knowledge Base the Gmail sync ingests into (sync writes shards only when unset)
+        'EMAIL_KNOWLEDGE_BASE_ID': os.environ.get('EMAIL_KNOWLEDGE_BASE_ID', ''),
+        'EMAIL_KB_DATA_SOURCE_ID': os.environ.get('EMAIL_KB_DATA_SOURCE_ID', ''),
         # Web3 tables for blockchain agent
         'WEB3_WALLETS_TABLE': 'Web3Wallets-staging',
         'WEB3_TRANSACTIONS_TABLE': 'Web3Transactions-staging',
@@ -543,6 +572,7 @@ def main():
         store_gmail_secret()
     if 'scout' in agents_to_process:
         store_soundcharts_secret()
+        ensure_dynamodb_table(env_vars['SOUNDCHARTS_CACHE_TABLE'], key='cacheKey', ttl_attribute='ttl')
     
     # Track failed functions
     failed_functions = []
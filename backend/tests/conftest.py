@@ -0,0 +1,8 @@
+"""Make the in-process fakes in backend/scripts importable from the tests"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent / 'scripts'
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
@@ -0,0 +1,42 @@
+"""debug_logger sampling and environment handling"""
+
+import random
+
+from fake_services import load_lambda_module
+
+debug_logger = load_lambda_module('debug_logger.py')
+
+
+def test_guarded_debug_is_sampled_once(monkeypatch):
+    logger = debug_logger.DevDebugLogger('test-agent', sample_rate=0.5)
+    monkeypatch.setattr(debug_logger, 'random', random.Random(0))
+    monkeypatch.setattr(logger, 'flush', lambda wait=True: None)
+
+    for i in range(4000):
+        if logger.enabled_for('DEBUG'):
+            logger.debug(f"line {i}")
+
+    assert 1800 < len(logger._buffer) < 2200
+
+
+def test_errors_are_never_sampled():
+    logger = debug_logger.DevDebugLogger('test-agent', sample_rate=0.0)
+
+    logger.error('kept')
+    logger.debug('dropped')
+
+    assert logger.enabled_for('ERROR') and not logger.enabled_for('DEBUG')
+    assert len(logger._buffer) == 1 and '"kept"' in logger._buffer[0]
+
+
+def test_sample_rate_is_only_parsed_in_dev(monkeypatch):
+    monkeypatch.setenv('DEBUG_LOG_SAMPLE_RATE', 'ten percent')
+
+    monkeypatch.setenv('DEBUG_MODE', 'prod')
+    assert isinstance(debug_logger.get_logger('test-agent'), debug_logger.ProdLogger)
+
+    monkeypatch.setenv('DEBUG_MODE', 'dev')
+    assert debug_logger.get_logger('test-agent').sample_rate == 1.0
+
+    monkeypatch.setenv('DEBUG_LOG_SAMPLE_RATE', '0.25')
+    assert debug_logger.get_logger('test-agent').sample_rate == 0.25
@@ -0,0 +1,152 @@
+"""expense-processor behaviour against the in-process AWS fakes"""
+
+import pytest
+
+from fake_services import FakeDynamoDBClient, FakeTextractClient, load_lambda_module
+
+expense_processor = load_lambda_module('expense-processor.py')
+
+TABLE = 'TaxExpenses-test'
+
+
+def make_statement_blocks(pages: int, rows_per_page: int) -> list:
+    """get_document_analysis blocks for a Chase statement: one transaction table per page"""
+    blocks = []
+
+    def add(block):
+        block['Id'] = f"block-{len(blocks) + 1:06d}"
+        blocks.append(block)
+        return block['Id']
+
+    for page in range(1, pages + 1):
+        add({'BlockType': 'PAGE', 'Page': page})
+        cell_ids = []
+        for row in range(1, rows_per_page + 1):
+            values = (['Date', 'Description', 'Amount'] if row == 1 else
+                      [f"07/{row % 28 + 1:02d}", f"ORDER {page}-{row}", f"{row * 3.17:.2f}"])
+            for column, value in enumerate(values, start=1):
+                word_ids = [add({'BlockType': 'WORD', 'Text': word, 'Page': page}) for word in value.split()]
+                cell_ids.append(add({
+                    'BlockType': 'CELL', 'RowIndex': row, 'ColumnIndex': column, 'Page': page,
+                    'Relationships': [{'Type': 'CHILD', 'Ids': word_ids}],
+                }))
+        add({'BlockType': 'TABLE', 'Page': page, 'Relationships': [{'Type': 'CHILD', 'Ids': cell_ids}]})
+    return blocks
+
+
+def parse(jobs, client):
+    parser = expense_processor.ChaseStatementParser('chase-checking', 'test-user', 'test-doc')
+    return parser.parse_pages(expense_processor.iter_document_pages(jobs, client))
+
+
+def test_textract_responses_follow_next_token():
+    blocks = make_statement_blocks(pages=3, rows_per_page=60)
+    client = FakeTextractClient({'job-1': blocks})
+
+    responses = list(expense_processor.iter_textract_responses('job-1', client))
+
+    assert len(responses) == client.call_count == -(-len(blocks) // 1000) > 1
+    assert [b['Id'] for r in responses for b in r['Blocks']] == [b['Id'] for b in blocks]
+
+
+def test_failed_textract_job_raises():
+    client = FakeTextractClient({'job-1': []})
+    client.get_document_analysis = lambda **kwargs: {'JobStatus': 'FAILED', 'StatusMessage': 'bad pdf'}
+
+    with pytest.raises(Exception, match='FAILED'):
+        list(expense_processor.iter_textract_responses('job-1', client))
+
+
+def test_document_pages_split_across_responses():
+    blocks = make_statement_blocks(pages=4, rows_per_page=60)
+    client = FakeTextractClient({'job-1': blocks})
+
+    pages = list(expense_processor.iter_document_pages([{'jobId': 'job-1', 'pageNum': 1}], client))
+
+    assert client.call_count > 1
+    assert [{b['Page'] for b in page} for page in pages] == [{1}, {2}, {3}, {4}]
+    assert sum(len(page) for page in pages) == len(blocks)
+
+
+def test_streamed_parse_matches_whole_document():
+    blocks = make_statement_blocks(pages=3, rows_per_page=60)
+    parser = expense_processor.ChaseStatementParser('chase-checking', 'test-user', 'test-doc')
+    expected = parser.parse_textract_output({'Blocks': [dict(b) for b in blocks]})
+
+    streamed = parse([{'jobId': 'job-1', 'pageNum': 1}], FakeTextractClient({'job-1': blocks}))
+
+    assert len(expected) == 3 * 59
+    assert [e['expenseId'] for e in streamed] == [e['expenseId'] for e in expected]
+
+
+def test_per_page_jobs_merge_in_page_order():
+    blocks = make_statement_blocks(pages=3, rows_per_page=20)
+    expected = parse([{'jobId': 'job-1', 'pageNum': 1}], FakeTextractClient({'job-1': blocks}))
+    # pdf-preprocessor starts one job per transaction page; Textract numbers each job's only page 1
+    jobs = {f"job-p{page}": [dict(b, Page=1) for b in blocks if b['Page'] == page] for page in (1, 2, 3)}
+    refs = [{'jobId': f"job-p{page}", 'pageNum': page} for page in (3, 1, 2)]
+
+    merged = parse(refs, FakeTextractClient(jobs))
+
+    assert [e['expenseId'] for e in merged] == [e['expenseId'] for e in expected]
+
+
+def make_expenses(count: int) -> list:
+    parser = expense_processor.ChaseStatementParser('chase-checking', 'test-user', 'test-doc')
+    expenses = []
+    for i in range(count):
+        description, amount = f"ORDER {i}", f"{i * 3.17 + 1:.2f}"
+        expenses.append({
+            'expenseId': parser.generate_expense_id('2024-07-01', amount, description),
+            'userId': 'test-user', 'documentId': 'test-doc', 'date': '2024-07-01',
+            'description': description, 'amount': amount, 'category': 'software',
+        })
+    return expenses
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(expense_processor, 'BATCH_WRITE_BASE_DELAY', 0.0)
+
+
+def test_write_expenses_batches_and_collapses_duplicates():
+    expenses = make_expenses(60)
+    client = FakeDynamoDBClient()
+
+    result = expense_processor.write_expenses(expenses + [dict(expenses[0])], table_name=TABLE, client=client)
+
+    assert client.call_count == result['batches'] == 3
+    assert (result['saved'], result['failed'], result['duplicates']) == (60, 0, 1)
+    assert set(client.tables[TABLE]) == {e['expenseId'] for e in expenses}
+
+
+def test_write_expenses_retries_unprocessed_items(no_backoff):
+    expenses = make_expenses(100)
+    client = FakeDynamoDBClient(throttle_rate=0.3)
+
+    result = expense_processor.write_expenses(expenses, table_name=TABLE, client=client)
+
+    assert result['retries'] > 0 and client.call_count == result['batches'] + result['retries']
+    assert (result['saved'], result['failed']) == (100, 0)
+    assert set(client.tables[TABLE]) == {e['expenseId'] for e in expenses}
+
+
+def test_write_expenses_counts_items_left_after_max_retries(no_backoff):
+    client = FakeDynamoDBClient(throttle_rate=1.0)
+
+    result = expense_processor.write_expenses(make_expenses(30), table_name=TABLE, client=client)
+
+    assert result['retries'] == 2 * expense_processor.BATCH_WRITE_MAX_RETRIES
+    assert (result['saved'], result['failed']) == (0, 30)
+    assert not client.tables.get(TABLE)
+
+
+def test_rewriting_a_statement_is_an_upsert(no_backoff):
+    expenses = make_expenses(40)
+    client = FakeDynamoDBClient(throttle_rate=0.3)
+    expense_processor.write_expenses(expenses, table_name=TABLE, client=client)
+    before = dict(client.tables[TABLE])
+
+    expense_processor.write_expenses(expenses, table_name=TABLE, client=client)
+
+    assert client.tables[TABLE] == before